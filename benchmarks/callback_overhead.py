@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Measure the per-block overhead of the stream callbacks.
+
+The callback functions created by the stream classes (and by play(),
+rec() and playrec()) are called directly with synthetic CFFI buffers,
+no audio device is needed (the virtual backend is used, see
+sounddevice_virtual.py).
+
+For each case, the time per block (minimum of several repetitions) and
+the peak amount of memory allocated during a single block (as reported
+by the tracemalloc module) are shown.
+
+"""
+import argparse
+import os
+import time
+import tracemalloc
+
+os.environ['SD_VIRTUAL_BACKEND'] = '1'
+
+import numpy as np  # noqa: E402
+import sounddevice as sd  # noqa: E402
+
+
+def int_list(text):
+    """Helper function for argument parsing."""
+    return [int(x) for x in text.split(',')]
+
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument(
+    '-c', '--channels', type=int_list, default=[1, 2, 8, 32, 64, 128],
+    help='comma-separated list of channel counts (default: %(default)s)')
+parser.add_argument(
+    '-b', '--blocksizes', type=int_list, default=[64, 256, 1024],
+    help='comma-separated list of block sizes (default: %(default)s)')
+parser.add_argument(
+    '-n', '--number', type=int, default=100,
+    help='number of blocks per repetition (default: %(default)s)')
+parser.add_argument(
+    '-r', '--repeat', type=int, default=5,
+    help='number of repetitions (default: %(default)s)')
+parser.add_argument(
+    '-k', '--keyword', default='',
+    help='only run cases whose name contains this string')
+args = parser.parse_args()
+
+ffi = sd._ffi
+lib = sd._lib
+
+
+class Case:
+    """Callback function pointer plus arguments for one block."""
+
+    def __init__(self, callback, frames, ibytes=0, obytes=0, reset=None):
+        self.callback = callback
+        self.frames = frames
+        self.ibuffer = ffi.new('char[]', ibytes) if ibytes else ffi.NULL
+        self.obuffer = ffi.new('char[]', obytes) if obytes else ffi.NULL
+        self.time_info = ffi.new('PaStreamCallbackTimeInfo*')
+        self.reset = reset
+
+    def run(self, number):
+        if self.reset:
+            self.reset()
+        callback = self.callback
+        args = (self.ibuffer, self.obuffer, self.frames, self.time_info, 0,
+                ffi.NULL)
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            callback(*args)
+        return time.perf_counter_ns() - start
+
+    def peak_memory(self, number):
+        if self.reset:
+            self.reset()
+        args = (self.ibuffer, self.obuffer, self.frames, self.time_info, 0,
+                ffi.NULL)
+        total = 0
+        tracemalloc.start()
+        try:
+            for _ in range(number):
+                current, _ = tracemalloc.get_traced_memory()
+                tracemalloc.reset_peak()
+                self.callback(*args)
+                total += tracemalloc.get_traced_memory()[1] - current
+        finally:
+            tracemalloc.stop()
+        return total / number
+
+
+def measure(name, channels, blocksize, case):
+    if args.keyword not in name:
+        return
+    case.run(args.number)  # warm-up
+    ns = min(case.run(args.number) for _ in range(args.repeat)) / args.number
+    peak = case.peak_memory(min(args.number, 20))
+    print(f'{name:28} {channels:8} {blocksize:9} {ns:12.0f} {peak:12.0f}')
+
+
+def noop(*args):
+    pass
+
+
+def flags_callback(iptr, optr, frames, time, status, userdata):
+    sd.CallbackFlags(status)
+    return 0
+
+
+def stream_case(StreamClass, channels, blocksize, **kwargs):
+    """Create (but don't start) a stream and get its callback pointer."""
+    stream = StreamClass(channels=channels, blocksize=blocksize,
+                         callback=noop, dtype='float32', **kwargs)
+    framesize = channels * 4
+    ibytes = obytes = blocksize * framesize
+    if isinstance(stream, sd._InputStreamBase):
+        obytes = 0
+    elif not isinstance(stream, (sd.Stream, sd.RawStream)):
+        ibytes = 0
+    case = Case(stream._callback, blocksize, ibytes, obytes)
+    case.stream = stream  # Keep stream alive
+    return case
+
+
+def session_case(function, channels, blocksize, mapping=None):
+    """Set up a _CallbackContext like play(), rec() or playrec() do.
+
+    The callback functions are the same as in the `Session` methods,
+    the stream is created but not started.
+
+    """
+    frames = blocksize * args.number
+    data = np.zeros((frames, channels))
+    ctx = sd._CallbackContext(loop=function == 'play')
+    if function != 'rec':
+        ctx.frames = ctx.check_data(data, mapping, None)
+    if function != 'play':
+        _, ctx.frames = ctx.check_out(None, frames, channels, 'float32',
+                                      mapping)
+    kwargs = dict(samplerate=48000, blocksize=blocksize)
+
+    if function == 'play':
+        def callback(outdata, frames, time, status):
+            ctx.callback_enter(status, outdata)
+            ctx.write_outdata(outdata)
+            ctx.callback_exit()
+
+        stream = sd.OutputStream(
+            channels=ctx.output_channels, dtype=ctx.output_dtype,
+            callback=callback, **kwargs)
+    elif function == 'rec':
+        def callback(indata, frames, time, status):
+            ctx.callback_enter(status, indata)
+            ctx.read_indata(indata)
+            ctx.callback_exit()
+
+        stream = sd.InputStream(
+            channels=ctx.input_channels, dtype=ctx.input_dtype,
+            callback=callback, **kwargs)
+    elif function == 'playrec':
+        def callback(indata, outdata, frames, time, status):
+            ctx.callback_enter(status, indata)
+            ctx.read_indata(indata)
+            ctx.write_outdata(outdata)
+            ctx.callback_exit()
+
+        stream = sd.Stream(
+            channels=(ctx.input_channels, ctx.output_channels),
+            dtype=(ctx.input_dtype, ctx.output_dtype),
+            callback=callback, **kwargs)
+    ctx.stream = stream
+
+    def reset():
+        ctx.frame = 0
+
+    ibytes = 0 if function == 'play' else blocksize * ctx.input_channels * 4
+    obytes = 0 if function == 'rec' else blocksize * ctx.output_channels * 4
+    case = Case(stream._callback, blocksize, ibytes, obytes, reset)
+    case.stream = stream  # Keep stream alive
+    return case
+
+
+print(f'{"case":28} {"channels":>8} {"blocksize":>9} {"ns/block":>12} '
+      f'{"peak bytes":>12}')
+
+baseline = ffi.callback('PaStreamCallback', lambda *args: 0)
+measure('ffi.callback (baseline)', 0, 0, Case(baseline, 0))
+flags_case = Case(ffi.callback('PaStreamCallback', flags_callback), 0)
+measure('CallbackFlags()', 0, 0, flags_case)
+wrap_case = Case(ffi.callback(
+    'PaStreamCallback',
+    lambda i, o, f, t, s, u: sd._wrap_callback(noop, None, f, t, s)), 0)
+measure('_wrap_callback()', 0, 0, wrap_case)
+
+streams = [
+    ('RawInputStream', sd.RawInputStream, {}),
+    ('RawOutputStream', sd.RawOutputStream, {}),
+    ('RawStream', sd.RawStream, {}),
+    ('InputStream', sd.InputStream, {}),
+    ('OutputStream', sd.OutputStream, {}),
+    ('Stream', sd.Stream, {}),
+    ('InputStream(reuse_arrays)', sd.InputStream, {'reuse_arrays': True}),
+    ('OutputStream(reuse_arrays)', sd.OutputStream, {'reuse_arrays': True}),
+    ('Stream(reuse_arrays)', sd.Stream, {'reuse_arrays': True}),
+]
+
+for channels in args.channels:
+    for blocksize in args.blocksizes:
+        for name, StreamClass, kwargs in streams:
+            if args.keyword in name:
+                measure(name, channels, blocksize,
+                        stream_case(StreamClass, channels, blocksize,
+                                    **kwargs))
+        for function in 'play', 'rec', 'playrec':
+            name = function + '()'
+            if args.keyword in name:
+                measure(name, channels, blocksize,
+                        session_case(function, channels, blocksize))
+            # Every other channel of a device with twice as many channels:
+            name = function + '(mapping)'
+            if args.keyword in name:
+                measure(name, channels, blocksize,
+                        session_case(function, channels, blocksize,
+                                     range(1, 2 * channels + 1, 2)))
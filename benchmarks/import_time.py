@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Measure the time needed for "import sounddevice".
+
+Each measurement is done in a fresh Python interpreter, once without
+and once with the environment variable SD_INITIALIZE_ON_IMPORT (which
+initializes PortAudio during the import instead of on first use).
+The time needed by the first query_devices() call is shown as well,
+because that's where the initialization happens in the lazy case.
+The medians over all runs are shown.
+
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+parser = argparse.ArgumentParser(description=__doc__)
+parser.add_argument(
+    '-r', '--repeat', type=int, default=10,
+    help='number of interpreter runs per case (default: %(default)s)')
+parser.add_argument(
+    '--virtual', action='store_true',
+    help='use the virtual backend (see sounddevice_virtual.py) '
+         'instead of PortAudio')
+args = parser.parse_args()
+
+CODE = """
+import time
+start = time.perf_counter()
+import sounddevice
+middle = time.perf_counter()
+sounddevice.query_devices()
+end = time.perf_counter()
+print(middle - start, end - middle)
+"""
+
+
+def run(initialize_on_import):
+    env = dict(os.environ)
+    env.pop('SD_INITIALIZE_ON_IMPORT', None)
+    if initialize_on_import:
+        env['SD_INITIALIZE_ON_IMPORT'] = '1'
+    if args.virtual:
+        env['SD_VIRTUAL_BACKEND'] = '1'
+    output = subprocess.run([sys.executable, '-c', CODE], env=env,
+                            check=True, capture_output=True, text=True)
+    return [float(x) for x in output.stdout.split()]
+
+
+print(f'{"case":26} {"import (ms)":>12} {"first query (ms)":>17}')
+for name, initialize_on_import in [
+        ('lazy (default)', False),
+        ('SD_INITIALIZE_ON_IMPORT', True)]:
+    results = [run(initialize_on_import) for _ in range(args.repeat)]
+    imports, queries = zip(*results)
+    print(f'{name:26} {statistics.median(imports) * 1000:12.1f} '
+          f'{statistics.median(queries) * 1000:17.1f}')
@@ -40,6 +40,14 @@ else:
     package_data = None
     zip_safe = True
 
+cffi_modules = ['sounddevice_build.py:ffibuilder']
+if os.environ.get('PYTHON_SOUNDDEVICE_API_MODE'):
+    # Optional compiled module, linked to PortAudio (see sounddevice_build.py)
+    cffi_modules.append('sounddevice_build.py:ffibuilder_api')
+if os.environ.get('PYTHON_SOUNDDEVICE_RINGBUFFER'):
+    # Optional compiled module, needed for RingBufferStream and friends
+    cffi_modules.append('sounddevice_ringbuffer_build.py:ffibuilder')
+
 try:
     from wheel.bdist_wheel import bdist_wheel
 except ImportError:
@@ -65,7 +73,7 @@ else:
 setup(
     name='sounddevice',
     version=__version__,
-    py_modules=['sounddevice'],
+    py_modules=['sounddevice', 'sounddevice_virtual'],
     packages=packages,
     package_data=package_data,
     zip_safe=zip_safe,
@@ -73,7 +81,7 @@ setup(
     setup_requires=['CFFI>=1.0'],
     install_requires=['CFFI>=1.0'],
     extras_require={'NumPy': ['NumPy']},
-    cffi_modules=['sounddevice_build.py:ffibuilder'],
+    cffi_modules=cffi_modules,
     author='Matthias Geier',
     author_email='Matthias.Geier@gmail.com',
     description='Play and Record Sound with Python',
@@ -23,10 +23,11 @@
 API overview:
   * Convenience functions to play and record NumPy arrays:
     `play()`, `rec()`, `playrec()` and the related functions
-    `wait()`, `stop()`, `get_status()`, `get_stream()`
+    `wait()`, `stop()`, `get_status()`, `get_stream()`,
+    multiple simultaneous invocations are possible with `Session`
 
   * Functions to get information about the available hardware:
-    `query_devices()`, `query_hostapis()`,
+    `query_devices()`, `query_hostapis()`, `refresh_devices()`,
     `check_input_settings()`, `check_output_settings()`
 
   * Module-wide default settings: `default`
@@ -40,8 +41,18 @@ API overview:
   * PortAudio streams, using Python buffer objects (NumPy not needed):
     `RawStream`, `RawInputStream`, `RawOutputStream`
 
+  * PortAudio streams, using ring buffers and a compiled callback:
+    `RingBufferStream`, `RingBufferInputStream`, `RingBufferOutputStream`
+
+  * PortAudio streams for asyncio, using NumPy arrays:
+    `AsyncStream`, `AsyncInputStream`, `AsyncOutputStream`
+
+  * Streaming playback and recording with background threads:
+    `Player`, `Recorder`
+
   * Miscellaneous functions and classes:
-    `sleep()`, `get_portaudio_version()`, `CallbackFlags`,
+    `initialize()`, `sleep()`, `get_portaudio_version()`,
+    `get_portaudio_library()`, `CallbackFlags`,
     `CallbackStop`, `CallbackAbort`
 
 Online documentation:
@@ -54,36 +65,77 @@ import atexit as _atexit
 import os as _os
 import platform as _platform
 import sys as _sys
+import threading as _threading
 from ctypes.util import find_library as _find_library
-from _sounddevice import ffi as _ffi
-
 
-try:
-    for _libname in (
-            'portaudio',  # Default name on POSIX systems
-            'bin\\libportaudio-2.dll',  # DLL from conda-forge
-            'lib/libportaudio.dylib',  # dylib from anaconda
-            ):
-        _libname = _find_library(_libname)
-        if _libname is not None:
-            break
+if 'SD_VIRTUAL_BACKEND' in _os.environ:
+    # Software-only replacement for PortAudio, see sounddevice_virtual.py
+    import sounddevice_virtual as _sounddevice_virtual
+    from _sounddevice import ffi as _ffi
+    _lib = _sounddevice_virtual.load(_ffi)
+    _libname = _sounddevice_virtual.__file__
+    _libsource = 'virtual'
+else:
+    try:
+        # Optional "API mode" module, linked to PortAudio at build time
+        import _sounddevice_api
+    except ImportError:
+        from _sounddevice import ffi as _ffi
+        _lib = None
     else:
-        raise OSError('PortAudio library not found')
+        _ffi = _sounddevice_api.ffi
+        _lib = _sounddevice_api.lib
+        _libname = _sounddevice_api.__file__
+        _libsource = 'API mode'
+
+if _lib is None and _os.environ.get('SD_PORTAUDIO_LIBRARY'):
+    _libname = _os.environ['SD_PORTAUDIO_LIBRARY']
     _lib = _ffi.dlopen(_libname)
-except OSError:
-    if _platform.system() == 'Darwin':
-        _libname = 'libportaudio.dylib'
-    elif _platform.system() == 'Windows':
-        if 'SD_ENABLE_ASIO' in _os.environ:
-            _libname = 'libportaudio' + _platform.architecture()[0] + '-asio.dll'
+    _libsource = 'SD_PORTAUDIO_LIBRARY'
+
+if _lib is None and _platform.system() not in ('Darwin', 'Windows'):
+    # On Linux, find_library() may start subprocesses (e.g. "ldconfig -p"),
+    # therefore the usual library names are tried first:
+    for _libname in 'libportaudio.so.2', 'libportaudio.so':
+        try:
+            _lib = _ffi.dlopen(_libname)
+        except OSError:
+            continue
+        _libsource = 'soname'
+        break
+
+if _lib is None:
+    try:
+        for _libname in (
+                'portaudio',  # Default name on POSIX systems
+                'bin\\libportaudio-2.dll',  # DLL from conda-forge
+                'lib/libportaudio.dylib',  # dylib from anaconda
+                ):
+            _libname = _find_library(_libname)
+            if _libname is not None:
+                break
         else:
-            _libname = 'libportaudio' + _platform.architecture()[0] + '.dll'
-    else:
-        raise
-    import _sounddevice_data
-    _libname = _os.path.join(
-        next(iter(_sounddevice_data.__path__)), 'portaudio-binaries', _libname)
-    _lib = _ffi.dlopen(_libname)
+            raise OSError('PortAudio library not found')
+        _lib = _ffi.dlopen(_libname)
+        _libsource = 'find_library'
+    except OSError:
+        if _platform.system() == 'Darwin':
+            _libname = 'libportaudio.dylib'
+        elif _platform.system() == 'Windows':
+            if 'SD_ENABLE_ASIO' in _os.environ:
+                _libname = ('libportaudio' + _platform.architecture()[0] +
+                            '-asio.dll')
+            else:
+                _libname = ('libportaudio' + _platform.architecture()[0] +
+                            '.dll')
+        else:
+            raise
+        import _sounddevice_data
+        _libname = _os.path.join(
+            next(iter(_sounddevice_data.__path__)), 'portaudio-binaries',
+            _libname)
+        _lib = _ffi.dlopen(_libname)
+        _libsource = 'bundled'
 
 _sampleformats = {
     'float32': _lib.paFloat32,
@@ -95,15 +147,19 @@ _sampleformats = {
 }
 
 _initialized = 0
-_last_callback = None
+_initialize_lock = _threading.Lock()
+_active_contexts = set()  # Running play()/rec()/playrec(), see Session
+_device_info = None  # Cached device/host API info, see _get_device_info()
+_device_name_index = None  # See _get_device_name_index()
 
 
 def play(data, samplerate=None, mapping=None, blocking=False, loop=False,
-         **kwargs):
+         prefetch=None, convert=False, **kwargs):
     """Play back a NumPy array containing audio data.
 
     This is a convenience function for interactive use and for small
-    scripts.  It cannot be used for multiple overlapping playbacks.
+    scripts.  It cannot be used for multiple overlapping playbacks
+    (but see `Session`).
 
     This function does the following steps internally:
 
@@ -134,6 +190,8 @@ def play(data, samplerate=None, mapping=None, blocking=False, loop=False,
         and *uint8* can be used.
         *float64* data is simply converted to *float32* before passing
         it to PortAudio, because it's not supported natively.
+        By default, this conversion happens block-wise in the audio
+        callback, see *convert*.
     mapping : array_like, optional
         List of channel numbers (starting with 1) where the columns of
         *data* shall be played back on.  Must have the same length as
@@ -146,13 +204,32 @@ def play(data, samplerate=None, mapping=None, blocking=False, loop=False,
         is finished.  A non-blocking invocation can be stopped with
         `stop()` or turned into a blocking one with `wait()`.
     loop : bool, optional
-        Play *data* in a loop.
+        Play *data* in a loop.  *data* must not be empty in this case.
+    prefetch : int, optional
+        If specified, a helper thread reads ahead in *data* (touching
+        one byte of each memory page) up to this many frames ahead of
+        the current playback position (and the first *prefetch* frames
+        before the stream is started).
+        This avoids page faults in the audio callback, which can cause
+        output underflows, especially when playing a `numpy.memmap`
+        directly from disk.
+        *data* has to be C-contiguous in this case.
+    convert : bool, optional
+        If ``True``, *data* is converted to the sample format of the
+        stream (i.e. *float64* to *float32*) once before playback is
+        started, instead of block-wise in the audio callback.
+        This needs memory for a converted copy of *data*, but makes the
+        callback cheaper.  The time spent for the conversion can be
+        obtained with `get_conversion_time()`.
 
     Other Parameters
     ----------------
     samplerate, **kwargs
         All parameters of `OutputStream` -- except *channels*, *dtype*,
         *callback* and *finished_callback* -- can be used.
+        For *int32* data (with values between ``-2**23`` and
+        ``2**23 - 1``), ``dtype='int24'`` can be given to use the packed
+        24 bit format for the stream.
 
     Notes
     -----
@@ -166,23 +243,13 @@ def play(data, samplerate=None, mapping=None, blocking=False, loop=False,
     rec, playrec
 
     """
-    ctx = _CallbackContext(loop=loop)
-    ctx.frames = ctx.check_data(data, mapping, kwargs.get('device'))
-
-    def callback(outdata, frames, time, status):
-        assert len(outdata) == frames
-        ctx.callback_enter(status, outdata)
-        ctx.write_outdata(outdata)
-        ctx.callback_exit()
-
-    ctx.start_stream(OutputStream, samplerate, ctx.output_channels,
-                     ctx.output_dtype, callback, blocking,
-                     prime_output_buffers_using_stream_callback=False,
-                     **kwargs)
+    _default_session.play(data, samplerate, mapping, blocking, loop,
+                          prefetch=prefetch, convert=convert, **kwargs)
 
 
 def rec(frames=None, samplerate=None, channels=None, dtype=None,
-        out=None, mapping=None, blocking=False, **kwargs):
+        out=None, mapping=None, blocking=False, prefault=None,
+        flush_interval=None, convert=False, **kwargs):
     """Record audio data into a NumPy array.
 
     This is a convenience function for interactive use and for small
@@ -220,8 +287,10 @@ def rec(frames=None, samplerate=None, channels=None, dtype=None,
         The data types *float64*, *float32*, *int32*, *int16*, *int8*
         and *uint8* can be used.  For ``dtype='float64'``, audio data is
         recorded in *float32* format and converted afterwards, because
-        it's not natively supported by PortAudio.  The default value can
-        be changed with `default.dtype`.
+        it's not natively supported by PortAudio (see also *convert*).
+        For ``dtype='int24'``, audio data is recorded in the packed
+        24 bit format and returned as *int32* array (see `Stream`).
+        The default value can be changed with `default.dtype`.
     mapping : array_like, optional
         List of channel numbers (starting with 1) to record.
         If *mapping* is given, *channels* is silently ignored.
@@ -244,13 +313,46 @@ def rec(frames=None, samplerate=None, channels=None, dtype=None,
 
     Other Parameters
     ----------------
-    out : numpy.ndarray or subclass, optional
+    out : numpy.ndarray or subclass or str or path-like, optional
         If *out* is specified, the recorded data is written into the
         given array instead of creating a new array.
         In this case, the arguments *frames*, *channels* and *dtype* are
         silently ignored!
         If *mapping* is given, its length must match the number of
         channels in *out*.
+
+        This can also be a `numpy.memmap`, which allows recording
+        directly into a file without holding the whole recording in
+        memory.  If a file name is given, a memory-mapped ``.npy`` file
+        is created (see `numpy.lib.format.open_memmap()`) using
+        *frames*, *channels* and *dtype*, which can later be opened
+        with `numpy.load()`.
+    prefault : int, optional
+        If specified, a helper thread touches the memory pages of *out*
+        up to this many frames ahead of the current recording position
+        by reading one byte of each page.  The first *prefault* frames
+        are touched before the stream is started, those pages are also
+        written to (without changing their contents).
+        This avoids page faults in the audio callback, which can cause
+        input overflows, especially when recording into a
+        `numpy.memmap`.
+    flush_interval : float, optional
+        If specified (and *out* is a `numpy.memmap`), the recorded data
+        is periodically written to disk (using `numpy.memmap.flush()`)
+        every *flush_interval* seconds by a helper thread, as well as
+        after recording has finished.
+    convert : bool, optional
+        By default, *float32* data is converted block-wise to *float64*
+        in the audio callback if *out* (or *dtype*) is *float64*.
+        If ``True``, the data is instead recorded into a temporary
+        *float32* array and converted into *out* in one go by a helper
+        thread after the recording has finished (before `wait()`
+        returns).
+        This needs additional memory, but makes the callback cheaper.
+        This cannot be used if *out* is a `numpy.memmap` (or a file
+        name).
+        The time spent for the conversion can be obtained with
+        `get_conversion_time()`.
     samplerate, **kwargs
         All parameters of `InputStream` -- except *callback* and
         *finished_callback* -- can be used.
@@ -267,22 +369,15 @@ def rec(frames=None, samplerate=None, channels=None, dtype=None,
     play, playrec
 
     """
-    ctx = _CallbackContext()
-    out, ctx.frames = ctx.check_out(out, frames, channels, dtype, mapping)
-
-    def callback(indata, frames, time, status):
-        assert len(indata) == frames
-        ctx.callback_enter(status, indata)
-        ctx.read_indata(indata)
-        ctx.callback_exit()
-
-    ctx.start_stream(InputStream, samplerate, ctx.input_channels,
-                     ctx.input_dtype, callback, blocking, **kwargs)
-    return out
+    return _default_session.rec(frames, samplerate, channels, dtype, out,
+                                mapping, blocking, prefault=prefault,
+                                flush_interval=flush_interval,
+                                convert=convert, **kwargs)
 
 
 def playrec(data, samplerate=None, channels=None, dtype=None,
             out=None, input_mapping=None, output_mapping=None, blocking=False,
+            prefault=None, flush_interval=None, prefetch=None, convert=False,
             **kwargs):
     """Simultaneous playback and recording of NumPy arrays.
 
@@ -334,8 +429,14 @@ def playrec(data, samplerate=None, channels=None, dtype=None,
 
     Other Parameters
     ----------------
-    out : numpy.ndarray or subclass, optional
+    out : numpy.ndarray or subclass or str or path-like, optional
         See `rec()`.
+    prefault, flush_interval : optional
+        See `rec()`.
+    prefetch : int, optional
+        See `play()`.
+    convert : bool, optional
+        See `play()` and `rec()`.
     samplerate, **kwargs
         All parameters of `Stream` -- except *channels*, *dtype*,
         *callback* and *finished_callback* -- can be used.
@@ -352,30 +453,12 @@ def playrec(data, samplerate=None, channels=None, dtype=None,
     play, rec
 
     """
-    ctx = _CallbackContext()
-    output_frames = ctx.check_data(data, output_mapping, kwargs.get('device'))
-    if dtype is None:
-        dtype = ctx.data.dtype  # ignore module defaults
-    out, input_frames = ctx.check_out(out, output_frames, channels, dtype,
-                                      input_mapping)
-    if input_frames != output_frames:
-        raise ValueError('len(data) != len(out)')
-    ctx.frames = input_frames
-
-    def callback(indata, outdata, frames, time, status):
-        assert len(indata) == len(outdata) == frames
-        ctx.callback_enter(status, indata)
-        ctx.read_indata(indata)
-        ctx.write_outdata(outdata)
-        ctx.callback_exit()
-
-    ctx.start_stream(Stream, samplerate,
-                     (ctx.input_channels, ctx.output_channels),
-                     (ctx.input_dtype, ctx.output_dtype),
-                     callback, blocking,
-                     prime_output_buffers_using_stream_callback=False,
-                     **kwargs)
-    return out
+    return _default_session.playrec(data, samplerate, channels, dtype, out,
+                                    input_mapping, output_mapping, blocking,
+                                    prefault=prefault,
+                                    flush_interval=flush_interval,
+                                    prefetch=prefetch, convert=convert,
+                                    **kwargs)
 
 
 def wait(ignore_errors=True):
@@ -394,8 +477,7 @@ def wait(ignore_errors=True):
     get_status
 
     """
-    if _last_callback:
-        return _last_callback.wait(ignore_errors)
+    return _default_session.wait(ignore_errors)
 
 
 def stop(ignore_errors=True):
@@ -403,14 +485,11 @@ def stop(ignore_errors=True):
 
     This only stops `play()`, `rec()` and `playrec()`, but has no
     influence on streams created with `Stream`, `InputStream`,
-    `OutputStream`, `RawStream`, `RawInputStream`, `RawOutputStream`.
+    `OutputStream`, `RawStream`, `RawInputStream`, `RawOutputStream`
+    and on other `Session` objects.
 
     """
-    if _last_callback:
-        # Calling stop() before close() is necessary for older PortAudio
-        # versions, see issue #87:
-        _last_callback.stream.stop(ignore_errors)
-        _last_callback.stream.close(ignore_errors)
+    _default_session.stop(ignore_errors)
 
 
 def get_status():
@@ -427,10 +506,7 @@ def get_status():
     wait
 
     """
-    if _last_callback:
-        return _last_callback.status
-    else:
-        raise RuntimeError('play()/rec()/playrec() was not called yet')
+    return _default_session.status
 
 
 def get_stream():
@@ -447,10 +523,25 @@ def get_stream():
         respectively.
 
     """
-    if _last_callback:
-        return _last_callback.stream
-    else:
-        raise RuntimeError('play()/rec()/playrec() was not called yet')
+    return _default_session.stream
+
+
+def get_conversion_time():
+    """Get the time spent for sample format conversion.
+
+    This applies only to `play()`, `rec()` and `playrec()` with
+    ``convert=True``.
+
+    Returns
+    -------
+    float
+        The time (in seconds) spent for converting the audio data of
+        the last invocation of `play()`, `rec()` or `playrec()`.
+        For recordings, this is only complete after the recording has
+        finished.
+
+    """
+    return _default_session.conversion_time
 
 
 def query_devices(device=None, kind=None):
@@ -563,43 +654,13 @@ def query_devices(device=None, kind=None):
     """
     if kind not in ('input', 'output', None):
         raise ValueError(f'Invalid kind: {kind!r}')
+    devices, _ = _get_device_info()
     if device is None and kind is None:
-        return DeviceList(query_devices(i)
-                          for i in range(_check(_lib.Pa_GetDeviceCount())))
+        return DeviceList(dict(info) for info in devices)
     device = _get_device_id(device, kind, raise_on_error=True)
-    info = _lib.Pa_GetDeviceInfo(device)
-    if not info:
+    if not 0 <= device < len(devices):
         raise PortAudioError(f'Error querying device {device}')
-    assert info.structVersion == 2
-    name_bytes = _ffi.string(info.name)
-    try:
-        # We don't know beforehand if DirectSound and MME device names use
-        # 'utf-8' or 'mbcs' encoding.  Let's try 'utf-8' first, because it more
-        # likely raises an exception on 'mbcs' data than vice versa, see also
-        # https://github.com/spatialaudio/python-sounddevice/issues/72.
-        name = name_bytes.decode('utf-8')
-    except UnicodeDecodeError:
-        api_idx = _lib.Pa_HostApiTypeIdToHostApiIndex
-        if info.hostApi in (api_idx(_lib.paDirectSound), api_idx(_lib.paMME)):
-            name = name_bytes.decode('mbcs')
-        elif info.hostApi == api_idx(_lib.paASIO):
-            # See https://github.com/spatialaudio/python-sounddevice/issues/490
-            import locale
-            name = name_bytes.decode(locale.getpreferredencoding())
-        else:
-            raise
-    device_dict = {
-        'name': name,
-        'index': device,
-        'hostapi': info.hostApi,
-        'max_input_channels': info.maxInputChannels,
-        'max_output_channels': info.maxOutputChannels,
-        'default_low_input_latency': info.defaultLowInputLatency,
-        'default_low_output_latency': info.defaultLowOutputLatency,
-        'default_high_input_latency': info.defaultHighInputLatency,
-        'default_high_output_latency': info.defaultHighOutputLatency,
-        'default_samplerate': info.defaultSampleRate,
-    }
+    device_dict = dict(devices[device])
     if kind and device_dict['max_' + kind + '_channels'] < 1:
         raise ValueError(
             'Not an {} device: {!r}'.format(kind, device_dict['name']))
@@ -643,20 +704,33 @@ def query_hostapis(index=None):
     query_devices
 
     """
+    _, hostapis = _get_device_info()
     if index is None:
-        return tuple(query_hostapis(i)
-                     for i in range(_check(_lib.Pa_GetHostApiCount())))
-    info = _lib.Pa_GetHostApiInfo(index)
-    if not info:
+        return tuple(query_hostapis(i) for i in range(len(hostapis)))
+    if not 0 <= index < len(hostapis):
         raise PortAudioError(f'Error querying host API {index}')
-    assert info.structVersion == 1
-    return {
-        'name': _ffi.string(info.name).decode(),
-        'devices': [_lib.Pa_HostApiDeviceIndexToDeviceIndex(index, i)
-                    for i in range(info.deviceCount)],
-        'default_input_device': info.defaultInputDevice,
-        'default_output_device': info.defaultOutputDevice,
-    }
+    info = dict(hostapis[index])
+    info['devices'] = list(info['devices'])
+    return info
+
+
+def refresh_devices():
+    """Discard the cached information about devices and host APIs.
+
+    The information returned by `query_devices()` and
+    `query_hostapis()` (which is also used for selecting devices by
+    name, e.g. with the *device* argument of `Stream`) is obtained from
+    PortAudio only once and then cached.
+    After calling this function, the information is obtained again
+    on the next use.
+
+    .. note:: PortAudio itself only detects new or removed hardware
+       devices during initialization, see `_terminate()` and
+       `_initialize()` (which also discard the cached information).
+
+    """
+    global _device_info
+    _device_info = None
 
 
 def check_input_settings(device=None, channels=None, dtype=None,
@@ -702,6 +776,29 @@ def check_output_settings(device=None, channels=None, dtype=None,
     _check(_lib.Pa_IsFormatSupported(_ffi.NULL, parameters, samplerate))
 
 
+def initialize():
+    """Initialize PortAudio, unless this has already been done.
+
+    PortAudio is initialized automatically by the first function or
+    class that needs it (e.g. `query_devices()` or `Stream`), not when
+    the ``sounddevice`` module is imported.
+    Initialization can take some time (because all host APIs are
+    queried for devices), therefore this function can be used to do it
+    at a convenient time beforehand.
+
+    If the environment variable ``SD_INITIALIZE_ON_IMPORT`` is set
+    before importing the ``sounddevice`` module, PortAudio is
+    initialized immediately with the ``import`` statement.
+
+    Raises
+    ------
+    PortAudioError
+        If PortAudio cannot be initialized.
+
+    """
+    _ensure_initialized()
+
+
 def sleep(msec):
     """Put the caller to sleep for at least *msec* milliseconds.
 
@@ -724,6 +821,45 @@ def get_portaudio_version():
     return _lib.Pa_GetVersion(), _ffi.string(_lib.Pa_GetVersionText()).decode()
 
 
+def get_portaudio_library():
+    """Get the name of the loaded PortAudio library and how it was found.
+
+    Returns the file name (or path) of the library and a string telling
+    where it came from, one of:
+
+    ``'SD_PORTAUDIO_LIBRARY'``
+        Given by the environment variable of that name.
+    ``'soname'``
+        Found by its usual name (``libportaudio.so.2`` or
+        ``libportaudio.so``), only on Linux and other POSIX systems
+        except macOS.
+    ``'find_library'``
+        Found by `ctypes.util.find_library()`.
+    ``'bundled'``
+        The library included in the ``_sounddevice_data`` package
+        (only on macOS and Windows).
+    ``'API mode'``
+        The compiled module ``_sounddevice_api`` is used, the name is
+        the file name of that module.
+    ``'virtual'``
+        The virtual backend is used, see ``sounddevice_virtual.py``.
+
+    The library is searched only once, when the module is imported.
+    `ctypes.util.find_library()`, which can be slow, is only used if
+    the library isn't found by the environment variable or (on Linux)
+    by its usual name.  To skip the search, the environment variable
+    ``SD_PORTAUDIO_LIBRARY`` can be set.
+
+    Examples
+    --------
+    >>> import sounddevice as sd
+    >>> sd.get_portaudio_library()
+    ('libportaudio.so.2', 'soname')
+
+    """
+    return _libname, _libsource
+
+
 class _StreamBase:
     """Direct or indirect base class for all stream classes."""
 
@@ -732,7 +868,8 @@ class _StreamBase:
                  callback=None, finished_callback=None, clip_off=None,
                  dither_off=None, never_drop_input=None,
                  prime_output_buffers_using_stream_callback=None,
-                 userdata=None, wrap_callback=None):
+                 userdata=None, wrap_callback=None, reuse_arrays=None,
+                 planar=False, stats=None):
         """Base class for PortAudio streams.
 
         This class should only be used by library authors who want to
@@ -765,6 +902,17 @@ class _StreamBase:
             This is passed to the underlying C callback function
             on each call and can only be accessed from a *callback*
             provided as ``CData`` function pointer.
+        reuse_arrays : bool, optional
+            See `default.reuse_arrays`.
+            This only has an effect if ``wrap_callback='array'``.
+        planar : bool, optional
+            Use non-interleaved buffers, see `Stream`.
+            This cannot be used with ``wrap_callback='buffer'``.
+            If *callback* is a CData function pointer, it receives an
+            array of one buffer pointer per channel.
+        stats : bool, optional
+            See `default.stats`.
+            This only has an effect if *wrap_callback* is not ``None``.
 
         Examples
         --------
@@ -791,6 +939,10 @@ class _StreamBase:
         if prime_output_buffers_using_stream_callback is None:
             prime_output_buffers_using_stream_callback = \
                 default.prime_output_buffers_using_stream_callback
+        if reuse_arrays is None:
+            reuse_arrays = default.reuse_arrays
+        if stats is None:
+            stats = default.stats
 
         stream_flags = _lib.paNoFlag
         if clip_off:
@@ -836,16 +988,117 @@ class _StreamBase:
             elif kind == 'output':
                 oparameters = parameters
 
-        ffi_callback = _ffi.callback('PaStreamCallback', error=_lib.paAbort)
+        self._xruns = xruns = XrunLog()
+        if callback is not None and wrap_callback and stats:
+            self._stats = CallbackStats(kind, samplerate)
+
+        if planar:
+            if wrap_callback == 'buffer':
+                raise ValueError('planar is not supported for raw streams')
+            if wrap_callback == 'array' and 'int24' in _split(self._dtype):
+                raise ValueError("'int24' is not supported for planar streams")
+            for parameters in iparameters, oparameters:
+                if parameters:
+                    parameters.sampleFormat |= _lib.paNonInterleaved
+        self._planar = planar
+
+        if hasattr(_lib, 'sd_stream_callback'):
+            # In "API mode", the Python callback is passed as userdata to the
+            # compiled callback function, see _stream_callback() below.
+
+            def ffi_callback(func):
+                nonlocal userdata
+                if self._stats:
+                    func = self._stats._wrap(func)
+                # The handle must be kept alive during stream lifetime:
+                self._userdata = userdata = _ffi.new_handle(func)
+                return _lib.sd_stream_callback
+
+        else:
+
+            def ffi_callback(func):
+                if self._stats:
+                    func = self._stats._wrap(func)
+                return _ffi.callback('PaStreamCallback', func,
+                                     error=_lib.paAbort)
+
+        if wrap_callback == 'array' and reuse_arrays:
+            # The same CallbackFlags object is updated for each block:
+            flags = CallbackFlags()
 
         if callback is None:
             callback_ptr = _ffi.NULL
+        elif wrap_callback == 'array' and (
+                planar or 'int24' in _split(self._dtype)):
+            # Packed 24 bit samples are converted from/to int32 arrays,
+            # planar arrays are created from an array of channel pointers:
+            ichannels, ochannels = _split(self._channels)
+            isize, osize = _split(self._samplesize)
+            idtype, odtype = _split(self._dtype)
+            get_idata = get_odata = store_odata = None
+            if kind != 'output':
+                get_idata = _array_getter(ichannels, isize, idtype,
+                                          reuse_arrays, planar=planar)
+            if kind != 'input':
+                get_odata = _array_getter(ochannels, osize, odtype,
+                                          reuse_arrays, unpack=False,
+                                          planar=planar)
+                store_odata = getattr(get_odata, 'store', None)
+            status_flags = flags if reuse_arrays else None
+
+            @ffi_callback
+            def callback_ptr(iptr, optr, frames, time, status, _):
+                data = []
+                if get_idata:
+                    data.append(get_idata(iptr, frames))
+                if get_odata:
+                    data.append(get_odata(optr, frames))
+                result = _wrap_callback(callback, *data, frames, time, status,
+                                        flags=status_flags, xruns=xruns)
+                if store_odata:
+                    store_odata(data[-1], optr)
+                return result
+
+        elif kind == 'input' and wrap_callback == 'array' and reuse_arrays:
+            get_data = _ArrayCache(self._channels, self._samplesize,
+                                   self._dtype)
+
+            @ffi_callback
+            def callback_ptr(iptr, optr, frames, time, status, _):
+                return _wrap_callback(callback, get_data(iptr, frames),
+                                      frames, time, status, flags=flags,
+                                      xruns=xruns)
+
+        elif kind == 'output' and wrap_callback == 'array' and reuse_arrays:
+            get_data = _ArrayCache(self._channels, self._samplesize,
+                                   self._dtype)
+
+            @ffi_callback
+            def callback_ptr(iptr, optr, frames, time, status, _):
+                return _wrap_callback(callback, get_data(optr, frames),
+                                      frames, time, status, flags=flags,
+                                      xruns=xruns)
+
+        elif kind == 'duplex' and wrap_callback == 'array' and reuse_arrays:
+            get_idata = _ArrayCache(self._channels[0], self._samplesize[0],
+                                    self._dtype[0])
+            get_odata = _ArrayCache(self._channels[1], self._samplesize[1],
+                                    self._dtype[1])
+
+            @ffi_callback
+            def callback_ptr(iptr, optr, frames, time, status, _):
+                return _wrap_callback(
+                    callback, get_idata(iptr, frames),
+                    get_odata(optr, frames), frames, time, status,
+                    flags=flags, xruns=xruns)
+
         elif kind == 'input' and wrap_callback == 'buffer':
 
             @ffi_callback
             def callback_ptr(iptr, optr, frames, time, status, _):
                 data = _buffer(iptr, frames, self._channels, self._samplesize)
-                return _wrap_callback(callback, data, frames, time, status)
+                return _wrap_callback(callback, data, frames, time, status,
+                                      xruns=xruns)
 
         elif kind == 'input' and wrap_callback == 'array':
 
@@ -854,14 +1107,16 @@ class _StreamBase:
                 data = _array(
                     _buffer(iptr, frames, self._channels, self._samplesize),
                     self._channels, self._dtype)
-                return _wrap_callback(callback, data, frames, time, status)
+                return _wrap_callback(callback, data, frames, time, status,
+                                      xruns=xruns)
 
         elif kind == 'output' and wrap_callback == 'buffer':
 
             @ffi_callback
             def callback_ptr(iptr, optr, frames, time, status, _):
                 data = _buffer(optr, frames, self._channels, self._samplesize)
-                return _wrap_callback(callback, data, frames, time, status)
+                return _wrap_callback(callback, data, frames, time, status,
+                                      xruns=xruns)
 
         elif kind == 'output' and wrap_callback == 'array':
 
@@ -870,7 +1125,8 @@ class _StreamBase:
                 data = _array(
                     _buffer(optr, frames, self._channels, self._samplesize),
                     self._channels, self._dtype)
-                return _wrap_callback(callback, data, frames, time, status)
+                return _wrap_callback(callback, data, frames, time, status,
+                                      xruns=xruns)
 
         elif kind == 'duplex' and wrap_callback == 'buffer':
 
@@ -881,7 +1137,7 @@ class _StreamBase:
                 idata = _buffer(iptr, frames, ichannels, isize)
                 odata = _buffer(optr, frames, ochannels, osize)
                 return _wrap_callback(
-                    callback, idata, odata, frames, time, status)
+                    callback, idata, odata, frames, time, status, xruns=xruns)
 
         elif kind == 'duplex' and wrap_callback == 'array':
 
@@ -895,7 +1151,7 @@ class _StreamBase:
                 odata = _array(_buffer(optr, frames, ochannels, osize),
                                ochannels, odtype)
                 return _wrap_callback(
-                    callback, idata, odata, frames, time, status)
+                    callback, idata, odata, frames, time, status, xruns=xruns)
 
         else:
             # Use cast() to allow CData from different FFI instance:
@@ -943,6 +1199,9 @@ class _StreamBase:
 
     # Avoid confusion if something goes wrong before assigning self._ptr:
     _ptr = _ffi.NULL
+    _stats = None
+    _xruns = None
+    _planar = False
 
     @property
     def samplerate(self):
@@ -1101,6 +1360,37 @@ class _StreamBase:
         """
         return _lib.Pa_GetStreamCpuLoad(self._ptr)
 
+    @property
+    def stats(self):
+        """Timing statistics of the stream callback.
+
+        This is a `CallbackStats` object containing histograms of the
+        time spent in the *callback*, the interval between invocations
+        and the lag between the current stream time and the
+        input/output timestamps, as well as the number of invocations
+        which took longer than the duration of the processed block.
+
+        Unlike `cpu_load`, this only includes the time spent in the
+        *callback* itself (including the creation of its arguments).
+
+        This is ``None`` unless the stream was created with
+        ``stats=True`` (see `default.stats`), and for streams without a
+        Python *callback* (e.g. blocking read/write streams).
+
+        """
+        return self._stats
+
+    @property
+    def xruns(self):
+        """Counters and timestamps of input/output under-/overflows.
+
+        This is an `XrunLog` object, which records the *status* flags
+        of each *callback* invocation as well as the
+        overflows/underflows reported by `read()` and `write()`.
+
+        """
+        return self._xruns
+
     def __enter__(self):
         """Start  the stream in the beginning of a "with" statement."""
         self.start()
@@ -1119,6 +1409,9 @@ class _StreamBase:
         stop, abort
 
         """
+        if self._stats is not None:
+            # Don't count the time between stop() and start() as interval:
+            self._stats._state[1] = None
         err = _lib.Pa_StartStream(self._ptr)
         if err != _lib.paStreamIsNotStopped:
             _check(err, 'Error starting stream')
@@ -1205,13 +1498,66 @@ class _InputStreamBase(_StreamBase):
         channels, _ = _split(self._channels)
         samplesize, _ = _split(self._samplesize)
         data = _ffi.new('signed char[]', channels * samplesize * frames)
+        overflowed = self._read_frames(data, frames)
+        return _ffi.buffer(data), overflowed
+
+    def _read_frames(self, data, frames):
+        """Read *frames* frames into a pointer or buffer *data*."""
         err = _lib.Pa_ReadStream(self._ptr, data, frames)
         if err == _lib.paInputOverflowed:
+            self._xruns._record(_lib.Pa_GetStreamTime(self._ptr),
+                                _lib.paInputOverflow)
             overflowed = True
         else:
             _check(err)
             overflowed = False
-        return _ffi.buffer(data), overflowed
+        return overflowed
+
+    # The most recently used target of _raw_readinto(), see below:
+    _readinto_cache = None
+
+    def _raw_readinto(self, buffer):
+        """Read samples from the stream into an existing buffer.
+
+        This is the same as `RawStream.read()`, except that the samples
+        are written into a caller-owned buffer instead of a newly
+        allocated one.  The number of frames to be read is obtained from
+        the size of *buffer*.
+
+        The buffer is checked only when it differs from the one used in
+        the previous call, so re-using the same buffer for each block
+        doesn't cause any per-call memory allocations.
+
+        Parameters
+        ----------
+        buffer : writable buffer
+            A writable, contiguous buffer object (e.g. a `bytearray`)
+            whose size is a multiple of the frame size (i.e. *channels*
+            times `~Stream.samplesize`).  The samples are interleaved
+            and in the format specified by the *dtype* parameter used to
+            open the stream.
+
+        Returns
+        -------
+        frames : int
+            The number of frames that have been read.
+        overflowed : bool
+            See `Stream.read()`.
+
+        """
+        cached = self._readinto_cache
+        if cached is not None and cached[0] is buffer:
+            _, data, frames = cached
+        else:
+            channels, _ = _split(self._channels)
+            samplesize, _ = _split(self._samplesize)
+            data = _ffi.from_buffer(buffer, require_writable=True)
+            frames, remainder = divmod(len(data), channels * samplesize)
+            if remainder:
+                raise ValueError(
+                    'buffer size not divisible by channels * samplesize')
+            self._readinto_cache = buffer, data, frames
+        return frames, self._read_frames(data, frames)
 
 
 class RawInputStream(_InputStreamBase):
@@ -1221,7 +1567,8 @@ class RawInputStream(_InputStreamBase):
                  device=None, channels=None, dtype=None, latency=None,
                  extra_settings=None, callback=None, finished_callback=None,
                  clip_off=None, dither_off=None, never_drop_input=None,
-                 prime_output_buffers_using_stream_callback=None):
+                 prime_output_buffers_using_stream_callback=None,
+                 stats=None):
         """PortAudio input stream (using buffer objects).
 
         This is the same as `InputStream`, except that the *callback*
@@ -1255,6 +1602,7 @@ class RawInputStream(_InputStreamBase):
                              **_remove_self(locals()))
 
     read = _InputStreamBase._raw_read
+    readinto = _InputStreamBase._raw_readinto
 
 
 class _OutputStreamBase(_StreamBase):
@@ -1308,8 +1656,14 @@ class _OutputStreamBase(_StreamBase):
         frames, remainder = divmod(samples, channels)
         if remainder:
             raise ValueError('Number of samples not divisible by channels')
+        return self._write_frames(data, frames)
+
+    def _write_frames(self, data, frames):
+        """Write *frames* frames from a pointer or buffer *data*."""
         err = _lib.Pa_WriteStream(self._ptr, data, frames)
         if err == _lib.paOutputUnderflowed:
+            self._xruns._record(_lib.Pa_GetStreamTime(self._ptr),
+                                _lib.paOutputUnderflow)
             underflowed = True
         else:
             _check(err)
@@ -1324,7 +1678,8 @@ class RawOutputStream(_OutputStreamBase):
                  device=None, channels=None, dtype=None, latency=None,
                  extra_settings=None, callback=None, finished_callback=None,
                  clip_off=None, dither_off=None, never_drop_input=None,
-                 prime_output_buffers_using_stream_callback=None):
+                 prime_output_buffers_using_stream_callback=None,
+                 stats=None):
         """PortAudio output stream (using buffer objects).
 
         This is the same as `OutputStream`, except that the *callback*
@@ -1367,7 +1722,8 @@ class RawStream(RawInputStream, RawOutputStream):
                  device=None, channels=None, dtype=None, latency=None,
                  extra_settings=None, callback=None, finished_callback=None,
                  clip_off=None, dither_off=None, never_drop_input=None,
-                 prime_output_buffers_using_stream_callback=None):
+                 prime_output_buffers_using_stream_callback=None,
+                 stats=None):
         """PortAudio input/output stream (using buffer objects).
 
         This is the same as `Stream`, except that the *callback*
@@ -1421,7 +1777,8 @@ class InputStream(_InputStreamBase):
                  device=None, channels=None, dtype=None, latency=None,
                  extra_settings=None, callback=None, finished_callback=None,
                  clip_off=None, dither_off=None, never_drop_input=None,
-                 prime_output_buffers_using_stream_callback=None):
+                 prime_output_buffers_using_stream_callback=None,
+                 reuse_arrays=None, planar=False, stats=None):
         """PortAudio input stream (using NumPy).
 
         This has the same methods and attributes as `Stream`, except
@@ -1477,6 +1834,8 @@ class InputStream(_InputStreamBase):
             A two-dimensional `numpy.ndarray` with one column per
             channel (i.e.  with a shape of ``(frames, channels)``) and
             with a data type specified by `dtype`.
+            For streams opened with ``planar=True``, it has one row per
+            channel instead (see `Stream`).
         overflowed : bool
             ``True`` if input data was discarded by PortAudio after the
             previous call and before this call.
@@ -1484,10 +1843,95 @@ class InputStream(_InputStreamBase):
         """
         dtype, _ = _split(self._dtype)
         channels, _ = _split(self._channels)
+        if self._planar:
+            import numpy as np
+            data = np.empty((channels, frames), dtype)
+            if self._planar_read_pointers is None:
+                self._planar_read_pointers = _ffi.new('uintptr_t[]', channels)
+            return data, self._read_frames(
+                _planar_pointers(data, self._planar_read_pointers), frames)
         data, overflowed = _InputStreamBase._raw_read(self, frames)
-        data = _array(data, channels, dtype)
+        if dtype == 'int24':
+            import numpy as np
+            data = _int24_unpack(data, np.empty((frames, channels), 'int32'))
+        else:
+            data = _array(data, channels, dtype)
         return data, overflowed
 
+    # Target array and buffer of packed samples, see read_into():
+    _int24_readinto = None
+    # Target array and its row pointers, see read_into():
+    _planar_readinto = None
+    # Re-usable row pointers, see read():
+    _planar_read_pointers = None
+
+    def read_into(self, out):
+        """Read samples from the stream into an existing NumPy array.
+
+        This is the same as `read()`, except that the samples are
+        written into *out* instead of into a newly allocated array.
+        The number of frames to be read is given by ``len(out)``.
+
+        Shape, data type and memory layout of *out* are only checked
+        when a different array than in the previous call is given,
+        so re-using the same array for each block doesn't cause any
+        per-call memory allocations.
+
+        Parameters
+        ----------
+        out : numpy.ndarray
+            A writable, C-contiguous two-dimensional array with one
+            column per channel (i.e. with a shape of
+            ``(frames, channels)``, or ``(channels, frames)`` for
+            streams opened with ``planar=True``) and with a data type
+            specified by `dtype`.  For mono streams, a one-dimensional
+            array can be used as well.
+
+        Returns
+        -------
+        frames : int
+            The number of frames that have been read.
+        overflowed : bool
+            See `read()`.
+
+        """
+        planar = self._planar_readinto
+        if planar is not None and planar[0] is out:
+            frames = out.shape[-1]
+            return frames, self._read_frames(planar[1], frames)
+        int24 = self._int24_readinto
+        if int24 is not None and int24[0] is out:
+            frames, overflowed = _InputStreamBase._raw_readinto(self,
+                                                                int24[1])
+            _int24_unpack(int24[1], out)
+            return frames, overflowed
+        cached = self._readinto_cache
+        if cached is None or cached[0] is not out:
+            dtype, _ = _split(self._dtype)
+            channels, _ = _split(self._channels)
+            if out.ndim == 1 and channels == 1:
+                pass
+            elif out.ndim != 2:
+                raise ValueError('out must be one- or two-dimensional')
+            elif out.shape[1 - self._planar] != channels:
+                raise ValueError('number of channels must match')
+            if out.dtype != _array_dtype(dtype):
+                raise TypeError('dtype mismatch: {!r} vs {!r}'.format(
+                    out.dtype.name, _array_dtype(dtype)))
+            if not out.flags.c_contiguous:
+                raise TypeError('out must be C-contiguous')
+            if not out.flags.writeable:
+                raise TypeError('out must be writable')
+            if self._planar:
+                self._planar_readinto = out, _planar_pointers(
+                    out.reshape(channels, -1))
+                return self.read_into(out)
+            if dtype == 'int24':
+                # Packed samples are read into a separate buffer:
+                self._int24_readinto = out, bytearray(out.size * 3)
+                return self.read_into(out)
+        return _InputStreamBase._raw_readinto(self, out)
+
 
 class OutputStream(_OutputStreamBase):
     """Stream for output only.  See __init__() and Stream."""
@@ -1496,11 +1940,13 @@ class OutputStream(_OutputStreamBase):
                  device=None, channels=None, dtype=None, latency=None,
                  extra_settings=None, callback=None, finished_callback=None,
                  clip_off=None, dither_off=None, never_drop_input=None,
-                 prime_output_buffers_using_stream_callback=None):
+                 prime_output_buffers_using_stream_callback=None,
+                 reuse_arrays=None, planar=False, stats=None):
         """PortAudio output stream (using NumPy).
 
         This has the same methods and attributes as `Stream`, except
-        `~Stream.read()` and `~Stream.read_available`.
+        `~Stream.read()`, `~Stream.read_into()` and
+        `~Stream.read_available`.
         Furthermore, the stream callback is expected to have a different
         signature (see below).
 
@@ -1544,8 +1990,17 @@ class OutputStream(_OutputStreamBase):
             A two-dimensional array-like object with one column per
             channel (i.e.  with a shape of ``(frames, channels)``) and
             with a data type specified by `dtype`.  A one-dimensional
-            array can be used for mono data.  The array layout must be
-            C-contiguous (see :func:`numpy.ascontiguousarray`).
+            array can be used for mono data.
+            For streams opened with ``planar=True``, the array must
+            have one row per channel instead (see `Stream`).
+
+            C-contiguous arrays (or for planar streams, arrays with
+            contiguous rows) are passed to PortAudio directly.
+            Other arrays (e.g. a subset of the columns of a larger
+            array or the transpose of an array with one row per channel)
+            are copied in chunks of *blocksize* frames (1024 frames if
+            *blocksize* is 0) into a staging buffer, which is allocated
+            on first use and re-used for all further calls.
 
             The length of the buffer is not constrained to a specific
             range, however high performance applications will want to
@@ -1564,18 +2019,75 @@ class OutputStream(_OutputStreamBase):
         _, dtype = _split(self._dtype)
         _, channels = _split(self._channels)
         if data.ndim < 2:
-            data = data.reshape(-1, 1)
+            data = data.reshape((1, -1) if self._planar else (-1, 1))
         elif data.ndim > 2:
             raise ValueError('data must be one- or two-dimensional')
-        if data.shape[1] != channels:
+        if data.shape[1 - self._planar] != channels:
             raise ValueError('number of channels must match')
-        if data.dtype != dtype:
+        if data.dtype != _array_dtype(dtype):
             raise TypeError('dtype mismatch: {!r} vs {!r}'.format(
-                data.dtype.name, dtype))
-        if not data.flags.c_contiguous:
-            raise TypeError('data must be C-contiguous')
+                data.dtype.name, _array_dtype(dtype)))
+        if self._planar:
+            if data.strides[1] != data.itemsize:
+                return self._staged_write(data)
+            if self._planar_write_pointers is None:
+                self._planar_write_pointers = _ffi.new('uintptr_t[]',
+                                                       channels)
+            return self._write_frames(
+                _planar_pointers(data, self._planar_write_pointers),
+                data.shape[1])
+        if not data.flags.c_contiguous or dtype == 'int24':
+            return self._staged_write(data)
         return _OutputStreamBase._raw_write(self, data)
 
+    # Re-usable row pointers, see write():
+    _planar_write_pointers = None
+    # Staging array, its CFFI pointer and packed 24 bit buffer (if needed):
+    _staging = None
+
+    def _staged_write(self, data):
+        """Write non-contiguous or 'int24' data via re-usable buffers.
+
+        For planar streams, the staging array has one row per channel
+        (and the frames are counted along the second axis).
+
+        """
+        if self._staging is None:
+            import numpy as np
+            _, dtype = _split(self._dtype)
+            _, channels = _split(self._channels)
+            chunksize = self._blocksize or 1024
+            packed = None
+            if self._planar:
+                buffer = np.empty((channels, chunksize), _array_dtype(dtype))
+                # The row addresses are the same for each chunk:
+                ptr = _planar_pointers(buffer)
+            elif dtype == 'int24':
+                buffer = np.empty((chunksize, channels), _array_dtype(dtype))
+                packed = bytearray(buffer.size * 3)
+                ptr = _ffi.from_buffer(packed)
+            else:
+                buffer = np.empty((chunksize, channels), _array_dtype(dtype))
+                ptr = _ffi.from_buffer(buffer)
+            self._staging = buffer, ptr, packed
+        buffer, ptr, packed = self._staging
+        if self._planar:
+            # Swap axes to use the same code as for interleaved data:
+            buffer, data = buffer.T, data.T
+        chunksize = len(buffer)
+        underflowed = False
+        for start in range(0, len(data), chunksize):
+            chunk = data[start:start + chunksize]
+            frames = len(chunk)
+            if packed is None or not chunk.flags.c_contiguous:
+                buffer[:frames] = chunk
+                chunk = buffer[:frames]
+            if packed is not None:
+                _int24_pack(chunk, memoryview(packed)[:chunk.size * 3])
+            if self._write_frames(ptr, frames):
+                underflowed = True
+        return underflowed
+
 
 class Stream(InputStream, OutputStream):
     """Stream for input and output.  See __init__()."""
@@ -1584,7 +2096,8 @@ class Stream(InputStream, OutputStream):
                  device=None, channels=None, dtype=None, latency=None,
                  extra_settings=None, callback=None, finished_callback=None,
                  clip_off=None, dither_off=None, never_drop_input=None,
-                 prime_output_buffers_using_stream_callback=None):
+                 prime_output_buffers_using_stream_callback=None,
+                 reuse_arrays=None, planar=False, stats=None):
         """PortAudio stream for simultaneous input and output (using NumPy).
 
         To open an input-only or output-only stream use `InputStream` or
@@ -1668,8 +2181,11 @@ class Stream(InputStream, OutputStream):
             *uint8*. See `numpy.dtype`.
             The *float64* data type is not supported, this is only
             supported for convenience in `play()`/`rec()`/`playrec()`.
-            The packed 24 bit format ``'int24'`` is only supported in
-            the "raw" stream classes, see `RawStream`.  The default
+            The packed 24 bit format ``'int24'`` is also supported,
+            in this case the NumPy arrays have the data type *int32*
+            (with values between ``-2**23`` and ``2**23 - 1``), the
+            conversion from/to the packed format is done with vectorized
+            NumPy operations.  The default
             value(s) can be changed with `default.dtype`.
             If NumPy is available, the corresponding `numpy.dtype`
             objects can be used as well.  The floating point
@@ -1832,92 +2348,1481 @@ class Stream(InputStream, OutputStream):
             See `default.never_drop_input`.
         prime_output_buffers_using_stream_callback : bool, optional
             See `default.prime_output_buffers_using_stream_callback`.
+        reuse_arrays : bool, optional
+            See `default.reuse_arrays`.
+        stats : bool, optional
+            See `default.stats`.
+        planar : bool, optional
+            If ``True``, the stream is opened with non-interleaved
+            buffers, i.e. PortAudio uses a separate buffer for each
+            channel.
+            The arrays passed to the *callback*, returned from `read()`
+            and expected by `read_into()` and `write()` then have one
+            row per channel (i.e. a shape of ``(channels, frames)``),
+            for example ``indata[0]`` is the first channel.
+            No interleaving or de-interleaving copies are made, the
+            *callback* arrays are views on the PortAudio buffers
+            (provided the host API places the channel buffers at equal
+            distances in memory, which is usually the case, otherwise
+            the data is copied).
+            For `write()`, arrays whose rows are contiguous in memory
+            are used directly, even if the rows are not adjacent
+            (e.g. a subset of the rows of a larger array), other arrays
+            are copied into a staging buffer.
+            The packed 24 bit format ``'int24'`` is not supported in
+            this case.
 
         """
         _StreamBase.__init__(self, kind='duplex', wrap_callback='array',
                              **_remove_self(locals()))
 
 
-class DeviceList(tuple):
-    """A list with information about all available audio devices.
+class _RingBufferStreamBase(_StreamBase):
+    """Base class for ring buffer stream classes."""
 
-    This class is not meant to be instantiated by the user.
-    Instead, it is returned by `query_devices()`.
-    It contains a dictionary for each available device, holding the keys
-    described in `query_devices()`.
+    def __init__(self, kind, buffersize=None, **kwargs):
+        try:
+            from _sounddevice_ringbuffer import ffi, lib
+        except ImportError as e:
+            raise ImportError(
+                'The compiled "_sounddevice_ringbuffer" module must be '
+                'installed for ring buffer streams') from e
+        self._rbffi = ffi
+        self._rblib = lib
+        # This struct must be kept alive during stream lifetime:
+        self._state = ffi.new('sd_ringbuffer_state*')
+        _StreamBase.__init__(
+            self, kind=kind, wrap_callback=None,
+            callback=ffi.addressof(lib, 'sd_ringbuffer_callback'),
+            userdata=self._state, **kwargs)
+        if buffersize is None:
+            buffersize = int(self._samplerate)
+        # The number of frames must be a power of 2:
+        self._buffersize = 1 << max(int(buffersize) - 1, 1).bit_length()
+        ichannels, ochannels = _split(self._channels)
+        isize, osize = _split(self._samplesize)
+        # The memory of the ring buffers must be kept alive as well:
+        if kind in ('input', 'duplex'):
+            self._input_ring, self._input_data = self._create_ring(
+                ichannels * isize)
+            self._state.input = self._input_ring
+        if kind in ('output', 'duplex'):
+            self._output_ring, self._output_data = self._create_ring(
+                ochannels * osize)
+            self._state.output = self._output_ring
+
+    def _create_ring(self, framesize):
+        """Create a ring buffer holding `buffersize` frames."""
+        data = self._rbffi.new('char[]', framesize * self._buffersize)
+        ring = self._rbffi.new('sd_ringbuffer*')
+        self._rblib.sd_ringbuffer_init(ring, framesize, self._buffersize, data)
+        return ring, data
 
-    This class has a special string representation that is shown as
-    return value of `query_devices()` if used in an interactive
-    Python session.  It will also be shown when using the :func:`print`
-    function.  Furthermore, it can be obtained with :func:`repr` and
-    :class:`str() <str>`.
+    @property
+    def buffersize(self):
+        """Size of the ring buffer(s) in frames.
 
-    """
+        This is always a power of 2.
 
-    __slots__ = ()
+        """
+        return self._buffersize
 
-    def __repr__(self):
-        idev = _get_device_id(default.device['input'], 'input')
-        odev = _get_device_id(default.device['output'], 'output')
-        digits = len(str(_lib.Pa_GetDeviceCount() - 1))
-        hostapi_names = [hostapi['name'] for hostapi in query_hostapis()]
+    @property
+    def input_overflows(self):
+        """Number of input frames dropped because of a full ring buffer."""
+        return self._load('input_overflows')
 
-        def get_mark(idx):
-            return (' ', '>', '<', '*')[(idx == idev) + 2 * (idx == odev)]
+    @property
+    def output_underflows(self):
+        """Number of output frames zeroed because of an empty ring buffer."""
+        return self._load('output_underflows')
 
-        text = '\n'.join(
-            '{mark} {idx:{dig}} {name}, {ha} ({ins} in, {outs} out)'.format(
-                mark=get_mark(info['index']),
-                idx=info['index'],
-                dig=digits,
-                name=info['name'],
-                ha=hostapi_names[info['hostapi']],
-                ins=info['max_input_channels'],
-                outs=info['max_output_channels'])
-            for info in self)
-        return text
+    @property
+    def status(self):
+        """All status flags that were passed to the C callback so far.
 
+        Returns
+        -------
+        CallbackFlags
 
-class CallbackFlags:
-    """Flag bits for the *status* argument to a stream *callback*.
+        """
+        return CallbackFlags(self._load('status'))
 
-    If you experience under-/overflows, you can try to increase the
-    ``latency`` and/or ``blocksize`` settings.
-    You should also avoid anything that could block the callback
-    function for a long time, e.g. extensive computations, waiting for
-    another thread, reading/writing files, network connections, etc.
+    @property
+    def xruns(self):
+        """Counters and timestamps of input/output under-/overflows.
+
+        This is an `XrunLog` object.  The C callback can't record
+        timestamps, therefore the status flags passed to it are only
+        recorded when they are noticed (by `read()`, `readinto()`,
+        `write()` or when accessing this property), together with the
+        stream time at that moment.  Flags of several callback
+        invocations in between are combined into one event.
+        Dropped frames because of a full (or empty) ring buffer are not
+        recorded here, see `input_overflows` and `output_underflows`.
 
-    See Also
-    --------
-    Stream
+        """
+        self._poll_xruns()
+        return self._xruns
 
-    Examples
-    --------
-    This can be used to collect the errors of multiple *status* objects:
+    def _load(self, name):
+        """Atomically read a counter which is updated by the C callback."""
+        return self._rblib.sd_ringbuffer_load(
+            self._rbffi.addressof(self._state, name))
 
-    >>> import sounddevice as sd
-    >>> errors = sd.CallbackFlags()
-    >>> errors |= status1
-    >>> errors |= status2
-    >>> errors |= status3
-    >>> # and so on ...
-    >>> errors.input_overflow
-    True
+    def _poll_xruns(self):
+        """Record status flags that were passed to the C callback."""
+        flags = self._rblib.sd_ringbuffer_take(
+            self._rbffi.addressof(self._state, 'pending'))
+        if flags:
+            self._xruns._record(_lib.Pa_GetStreamTime(self._ptr), flags)
 
-    The values may also be set and cleared by the user:
 
-    >>> import sounddevice as sd
-    >>> cf = sd.CallbackFlags()
-    >>> cf
-    <sounddevice.CallbackFlags: no flags set>
-    >>> cf.input_underflow = True
-    >>> cf
-    <sounddevice.CallbackFlags: input underflow>
-    >>> cf.input_underflow = False
-    >>> cf
-    <sounddevice.CallbackFlags: no flags set>
+class RingBufferInputStream(_RingBufferStreamBase):
+    """Ring buffer stream for recording only.  See RingBufferStream."""
 
-    """
+    def __init__(self, samplerate=None, blocksize=None,
+                 device=None, channels=None, dtype=None, latency=None,
+                 extra_settings=None, finished_callback=None,
+                 clip_off=None, dither_off=None, never_drop_input=None,
+                 prime_output_buffers_using_stream_callback=None,
+                 buffersize=None):
+        """PortAudio input stream (using a ring buffer).
+
+        This is the same as `RingBufferStream`, except that
+        `~RingBufferStream.write()` and
+        `~RingBufferStream.write_available` are missing.
+
+        See Also
+        --------
+        RingBufferStream, RawInputStream
+
+        """
+        _RingBufferStreamBase.__init__(self, kind='input',
+                                       **_remove_self(locals()))
+
+    @property
+    def read_available(self):
+        """The number of frames that can be read from the ring buffer."""
+        return self._rblib.sd_ringbuffer_read_available(self._input_ring)
+
+    def read(self, frames):
+        """Read samples from the ring buffer.
+
+        This doesn't wait for data, if less than *frames* frames are
+        available, a shorter buffer is returned.
+
+        Parameters
+        ----------
+        frames : int
+            The maximum number of frames to be read.
+
+        Returns
+        -------
+        buffer
+            A buffer of interleaved samples, see `RawStream.read()`.
+            Its length may be zero.
+
+        """
+        self._poll_xruns()
+        framesize = self._input_ring.element_size
+        data = self._rbffi.new('signed char[]', frames * framesize)
+        frames = self._rblib.sd_ringbuffer_read(self._input_ring, data, frames)
+        return self._rbffi.buffer(data, frames * framesize)
+
+    def readinto(self, buffer):
+        """Read samples from the ring buffer into an existing buffer.
+
+        This doesn't wait for data and doesn't allocate any memory.
+
+        Parameters
+        ----------
+        buffer : writable buffer
+            See `RawStream.readinto()`.
+
+        Returns
+        -------
+        int
+            The number of frames that have been read.  This may be less
+            than fits into *buffer* (including zero).
+
+        """
+        self._poll_xruns()
+        data = self._rbffi.from_buffer(buffer, require_writable=True)
+        frames, remainder = divmod(len(data), self._input_ring.element_size)
+        if remainder:
+            raise ValueError(
+                'buffer size not divisible by channels * samplesize')
+        return self._rblib.sd_ringbuffer_read(self._input_ring, data, frames)
+
+
+class RingBufferOutputStream(_RingBufferStreamBase):
+    """Ring buffer stream for playback only.  See RingBufferStream."""
+
+    def __init__(self, samplerate=None, blocksize=None,
+                 device=None, channels=None, dtype=None, latency=None,
+                 extra_settings=None, finished_callback=None,
+                 clip_off=None, dither_off=None, never_drop_input=None,
+                 prime_output_buffers_using_stream_callback=None,
+                 buffersize=None):
+        """PortAudio output stream (using a ring buffer).
+
+        This is the same as `RingBufferStream`, except that
+        `~RingBufferStream.read()`, `~RingBufferStream.readinto()` and
+        `~RingBufferStream.read_available` are missing.
+
+        See Also
+        --------
+        RingBufferStream, RawOutputStream
+
+        """
+        _RingBufferStreamBase.__init__(self, kind='output',
+                                       **_remove_self(locals()))
+
+    @property
+    def write_available(self):
+        """The number of frames that can be written to the ring buffer."""
+        return self._rblib.sd_ringbuffer_write_available(self._output_ring)
+
+    def write(self, data):
+        """Write samples to the ring buffer.
+
+        This doesn't wait for free space in the ring buffer, if only
+        part of *data* fits, the rest is ignored.
+        To avoid output underflows, data can be written before the
+        stream is started.
+
+        Parameters
+        ----------
+        data : buffer or bytes
+            A buffer of interleaved samples, see `RawStream.write()`.
+
+        Returns
+        -------
+        int
+            The number of frames that have been written.  This may be
+            less than the number of frames in *data* (including zero).
+
+        """
+        self._poll_xruns()
+        data = self._rbffi.from_buffer(data)
+        frames, remainder = divmod(len(data), self._output_ring.element_size)
+        if remainder:
+            raise ValueError(
+                'len(data) not divisible by channels * samplesize')
+        return self._rblib.sd_ringbuffer_write(self._output_ring, data, frames)
+
+
+class RingBufferStream(RingBufferInputStream, RingBufferOutputStream):
+    """Ring buffer stream for playback and recording.  See __init__()."""
+
+    def __init__(self, samplerate=None, blocksize=None,
+                 device=None, channels=None, dtype=None, latency=None,
+                 extra_settings=None, finished_callback=None,
+                 clip_off=None, dither_off=None, never_drop_input=None,
+                 prime_output_buffers_using_stream_callback=None,
+                 buffersize=None):
+        """PortAudio input/output stream (using ring buffers).
+
+        This is similar to `RawStream`, but instead of calling a Python
+        *callback* function, the audio data is transferred between
+        PortAudio and lock-free single-producer/single-consumer ring
+        buffers by a compiled C callback function.
+        The Python interpreter is never used (and the GIL is never
+        taken) in the audio thread, which avoids drop-outs caused by
+        other Python threads.
+
+        The application (using a single thread for reading and a single
+        thread for writing) can transfer audio data from and to the ring
+        buffers with `read()`, `readinto()` and `write()`.
+        Those functions never wait, the amount of data that can be
+        transferred is available via `read_available` and
+        `write_available`.
+        If the ring buffer for input is full, incoming frames are
+        dropped (see `input_overflows`).  If the ring buffer for output
+        is empty, silence is played (see `output_underflows`).
+
+        This needs the compiled module ``_sounddevice_ringbuffer``,
+        see :ref:`ring-buffer-streams`.
+
+        Parameters
+        ----------
+        dtype : str or pair of str
+            The sample format, see `RawStream`.
+        buffersize : int, optional
+            Size of the ring buffer(s) in frames.  This is rounded up to
+            the next power of 2.  By default, the ring buffers can hold
+            (at least) one second of audio data.
+
+        Other Parameters
+        ----------------
+        samplerate, blocksize, device, channels, latency, extra_settings,
+        finished_callback, clip_off, dither_off, never_drop_input,
+        prime_output_buffers_using_stream_callback
+            See `Stream`.
+
+        See Also
+        --------
+        RingBufferInputStream, RingBufferOutputStream, RawStream
+
+        """
+        _RingBufferStreamBase.__init__(self, kind='duplex',
+                                       **_remove_self(locals()))
+
+
+class _AsyncStreamBase(_StreamBase):
+    """Base class for asyncio stream classes."""
+
+    def __init__(self, kind, buffersize=None, chunksize=None, **kwargs):
+        import numpy as np
+        process = {
+            'input': self._process_input,
+            'output': self._process_output,
+            'duplex': self._process_duplex,
+        }[kind]
+        # Counter name -> (loop, future, threshold), set by waiting tasks:
+        self._waiters = {}
+        finished_callback = kwargs.pop('finished_callback')
+
+        def finished():
+            self._wake_waiters()
+            if finished_callback:
+                finished_callback()
+
+        _StreamBase.__init__(self, kind=kind, wrap_callback='array',
+                             callback=process, reuse_arrays=True,
+                             finished_callback=finished, **kwargs)
+        try:
+            if buffersize is None:
+                buffersize = int(self._samplerate)
+            if chunksize is None:
+                chunksize = self._blocksize or 1024
+            if not 0 < chunksize <= buffersize:
+                raise ValueError('chunksize must be between 1 and buffersize')
+            self._buffersize = int(buffersize)
+            self._chunksize = int(chunksize)
+            ichannels, ochannels = _split(self._channels)
+            idtype, odtype = _split(self._dtype)
+            if kind in ('input', 'duplex'):
+                self._input_ring = np.empty((self._buffersize, ichannels),
+                                            _array_dtype(idtype))
+            if kind in ('output', 'duplex'):
+                self._output_ring = np.zeros((self._buffersize, ochannels),
+                                             _array_dtype(odtype))
+        except BaseException:
+            self.close(ignore_errors=True)
+            raise
+        # Total number of frames written to/read from the ring buffers.
+        # Each counter is only incremented by one thread:
+        self._input_written = self._input_read = 0
+        self._output_written = self._output_read = 0
+        self._input_overflows = self._output_underflows = 0
+        self._overflowed = self._underflowed = False
+
+    def stop(self, ignore_errors=True):
+        """Terminate audio processing, see `Stream.stop()`.
+
+        Pending `read()`, `write()` and `drain()` calls which cannot
+        complete anymore raise `RuntimeError`.
+
+        """
+        _StreamBase.stop(self, ignore_errors)
+        self._wake_waiters()
+
+    def abort(self, ignore_errors=True):
+        """Terminate audio processing immediately, see `stop()`."""
+        _StreamBase.abort(self, ignore_errors)
+        self._wake_waiters()
+
+    def close(self, ignore_errors=True):
+        """Close the stream, see `stop()`."""
+        _StreamBase.close(self, ignore_errors)
+        self._wake_waiters()
+
+    async def __aenter__(self):
+        """Start the stream in the beginning of an "async with" statement."""
+        self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        """Stop and close the stream when exiting "async with"."""
+        self.stop()
+        self.close()
+
+    @property
+    def buffersize(self):
+        """Size of the internal buffer(s) in frames."""
+        return self._buffersize
+
+    @property
+    def chunksize(self):
+        """Default number of frames per `read()`, see `AsyncStream`."""
+        return self._chunksize
+
+    def _check_frames(self, frames):
+        if frames is None:
+            return self._chunksize
+        if not 0 <= frames <= self._buffersize:
+            raise ValueError('frames must be between 0 and buffersize')
+        return frames
+
+    async def _readinto(self, out):
+        """Wait for len(out) frames and copy them from the input buffer.
+
+        Returns whether input was discarded since the previous call, or
+        ``None`` if the stream is (or becomes) inactive before enough
+        frames are available.
+
+        """
+        frames = len(out)
+        if not await self._wait_until('_input_written',
+                                      self._input_read + frames):
+            return None
+        ring = self._input_ring
+        size = len(ring)
+        start = self._input_read % size
+        first = min(frames, size - start)
+        out[:first] = ring[start:start + first]
+        out[first:] = ring[:frames - first]
+        self._input_read += frames
+        overflowed, self._overflowed = self._overflowed, False
+        return overflowed
+
+    async def _wait_until(self, counter, threshold):
+        """Wait until the given counter has reached threshold.
+
+        The audio callback wakes the event loop only once, when the
+        threshold is reached.
+        Returns ``False`` if the stream is inactive (or becomes inactive)
+        before that, because the counter wouldn't change anymore.
+
+        """
+        if getattr(self, counter) >= threshold:
+            return True
+        import asyncio
+        if counter in self._waiters:
+            raise RuntimeError('concurrent read()/write() is not supported')
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                future = loop.create_future()
+                self._waiters[counter] = loop, future, threshold
+                # The callback might have been called in the meantime:
+                if getattr(self, counter) >= threshold:
+                    return True
+                if not self.active:
+                    return False
+                # This is also woken up by _wake_waiters():
+                await future
+        finally:
+            del self._waiters[counter]
+
+    def _wake_waiter(self, counter):
+        """Called from the audio callback after updating a counter."""
+        waiter = self._waiters.get(counter)
+        if waiter is not None:
+            loop, future, threshold = waiter
+            if getattr(self, counter) >= threshold and not future.done():
+                loop.call_soon_threadsafe(_set_future_result, future)
+
+    def _wake_waiters(self):
+        """Wake all waiting tasks, e.g. when the stream was stopped."""
+        for loop, future, _ in list(self._waiters.values()):
+            loop.call_soon_threadsafe(_set_future_result, future)
+
+    def _process_input(self, indata, frames, time, status):
+        if status._flags & _lib.paInputOverflow:
+            self._overflowed = True
+        ring = self._input_ring
+        size = len(ring)
+        written = self._input_written
+        free = size - (written - self._input_read)
+        if free < frames:
+            self._input_overflows += frames - free
+            self._overflowed = True
+            frames = free
+        start = written % size
+        first = min(frames, size - start)
+        ring[start:start + first] = indata[:first]
+        ring[:frames - first] = indata[first:frames]
+        self._input_written = written + frames
+        self._wake_waiter('_input_written')
+
+    def _process_output(self, outdata, frames, time, status):
+        if status._flags & _lib.paOutputUnderflow:
+            self._underflowed = True
+        ring = self._output_ring
+        size = len(ring)
+        read = self._output_read
+        available = self._output_written - read
+        if available < frames:
+            if self._output_written:
+                self._output_underflows += frames - available
+                self._underflowed = True
+            outdata[available:] = 0
+            frames = available
+        start = read % size
+        first = min(frames, size - start)
+        outdata[:first] = ring[start:start + first]
+        outdata[first:frames] = ring[:frames - first]
+        self._output_read = read + frames
+        self._wake_waiter('_output_read')
+
+    def _process_duplex(self, indata, outdata, frames, time, status):
+        self._process_input(indata, frames, time, status)
+        self._process_output(outdata, frames, time, status)
+
+
+class AsyncInputStream(_AsyncStreamBase):
+    """Asyncio stream for recording only.  See AsyncStream."""
+
+    def __init__(self, samplerate=None, blocksize=None,
+                 device=None, channels=None, dtype=None, latency=None,
+                 extra_settings=None, finished_callback=None,
+                 clip_off=None, dither_off=None, never_drop_input=None,
+                 prime_output_buffers_using_stream_callback=None,
+                 buffersize=None, chunksize=None):
+        """PortAudio input stream (using asyncio and NumPy).
+
+        This is the same as `AsyncStream`, except that
+        `~AsyncStream.write()`, `~AsyncStream.drain()`,
+        `~AsyncStream.write_available` and
+        `~AsyncStream.output_underflows` are missing.
+
+        See Also
+        --------
+        AsyncStream, InputStream
+
+        """
+        _AsyncStreamBase.__init__(self, kind='input',
+                                  **_remove_self(locals()))
+
+    @property
+    def read_available(self):
+        """The number of frames that can be read without waiting."""
+        return self._input_written - self._input_read
+
+    @property
+    def input_overflows(self):
+        """Number of input frames dropped because of a full buffer."""
+        return self._input_overflows
+
+    async def read(self, frames=None):
+        """Read samples from the stream (asynchronously).
+
+        This waits (without blocking the event loop) until the requested
+        number of frames is available.
+        The event loop is woken up by the audio callback only once per
+        call, regardless of the stream's *blocksize*.
+
+        Parameters
+        ----------
+        frames : int, optional
+            The number of frames to be read, at most `buffersize`.
+            By default, `chunksize` frames are read.
+
+        Returns
+        -------
+        data : numpy.ndarray
+            A two-dimensional `numpy.ndarray` with one column per
+            channel (i.e. with a shape of ``(frames, channels)``) and
+            with a data type specified by `dtype`.
+        overflowed : bool
+            ``True`` if input data was discarded since the previous
+            call to `read()`, either by PortAudio or because the
+            internal buffer was full (see `input_overflows`).
+
+        Raises
+        ------
+        RuntimeError
+            If the stream is (or becomes) inactive before enough frames
+            are available, e.g. because of `stop()`.
+
+        """
+        import numpy as np
+        frames = self._check_frames(frames)
+        ring = self._input_ring
+        data = np.empty((frames, ring.shape[1]), ring.dtype)
+        overflowed = await self._readinto(data)
+        if overflowed is None:
+            raise RuntimeError('the stream is not active')
+        return data, overflowed
+
+    async def blocks(self, frames=None, poolsize=2):
+        """Iterate over blocks of input data (asynchronously).
+
+        This is an asynchronous generator, to be used with
+        ``async for``::
+
+            async with sd.AsyncInputStream(channels=2) as stream:
+                async for indata, status in stream.blocks():
+                    if status:
+                        print(status)
+                    ...
+
+        The blocks are taken from a pool of *poolsize* pre-allocated
+        arrays, which are re-used cyclically.  Therefore, a block is
+        only valid until *poolsize* - 1 further blocks have been
+        received.  Use ``indata.copy()`` to keep a block for longer.
+
+        If the consumer falls behind, the internal buffer (see
+        `buffersize`) fills up and incoming data is dropped, which is
+        reported with ``status.input_overflow``.  The amount of memory
+        used doesn't grow.
+
+        The iteration ends when the stream is (or becomes) inactive,
+        e.g. because of `stop()`, and the remaining input data doesn't
+        fill a whole block.
+
+        Parameters
+        ----------
+        frames : int, optional
+            The number of frames per block, see `read()`.
+        poolsize : int, optional
+            The number of pre-allocated blocks.
+
+        Yields
+        ------
+        indata : numpy.ndarray
+            Input data, see `read()`.
+        status : CallbackFlags
+            ``status.input_overflow`` is set if input data was discarded
+            since the previous block (see `read()`).  The same object
+            is re-used for all blocks.
+
+        """
+        import numpy as np
+        frames = self._check_frames(frames)
+        ring = self._input_ring
+        pool = list(np.zeros((poolsize, frames, ring.shape[1]), ring.dtype))
+        status = CallbackFlags()
+        while True:
+            for indata in pool:
+                overflowed = await self._readinto(indata)
+                if overflowed is None:
+                    return
+                status.input_overflow = overflowed
+                yield indata, status
+
+
+class AsyncOutputStream(_AsyncStreamBase):
+    """Asyncio stream for playback only.  See AsyncStream."""
+
+    def __init__(self, samplerate=None, blocksize=None,
+                 device=None, channels=None, dtype=None, latency=None,
+                 extra_settings=None, finished_callback=None,
+                 clip_off=None, dither_off=None, never_drop_input=None,
+                 prime_output_buffers_using_stream_callback=None,
+                 buffersize=None, chunksize=None):
+        """PortAudio output stream (using asyncio and NumPy).
+
+        This is the same as `AsyncStream`, except that
+        `~AsyncStream.read()`, `~AsyncStream.read_available` and
+        `~AsyncStream.input_overflows` are missing.
+
+        See Also
+        --------
+        AsyncStream, OutputStream
+
+        """
+        _AsyncStreamBase.__init__(self, kind='output',
+                                  **_remove_self(locals()))
+
+    @property
+    def write_available(self):
+        """The number of frames that can be written without waiting."""
+        return self._buffersize - (self._output_written - self._output_read)
+
+    @property
+    def output_underflows(self):
+        """Number of output frames zeroed because of an empty buffer.
+
+        Silence before the first `write()` is not counted.
+
+        """
+        return self._output_underflows
+
+    async def write(self, data):
+        """Write samples to the stream (asynchronously).
+
+        The data is copied into the internal buffer, waiting (without
+        blocking the event loop) for free space if necessary.
+        While waiting, the event loop is woken up by the audio callback
+        once per `chunksize` frames (or less at the end of *data*).
+        To avoid output underflows, data can be written before the
+        stream is started, but only as much as fits into the internal
+        buffer (see `buffersize`).
+
+        Parameters
+        ----------
+        data : array_like
+            A two-dimensional array-like object with one column per
+            channel (i.e. with a shape of ``(frames, channels)``) and
+            with a data type specified by `dtype`.
+            A one-dimensional array can be used for mono data.
+
+        Returns
+        -------
+        underflowed : bool
+            ``True`` if silence had to be played since the previous
+            call to `write()`, either because PortAudio reported an
+            underflow or because the internal buffer was empty (see
+            `output_underflows`).
+
+        Raises
+        ------
+        RuntimeError
+            If the stream is stopped and *data* doesn't fit into the
+            free space of the internal buffer (because waiting would
+            never end).  Nothing is written in this case.
+            This is also raised if the stream becomes inactive (e.g.
+            because of `stop()`) while waiting, after writing only a
+            part of *data*.
+
+        """
+        import numpy as np
+        ring = self._output_ring
+        data = np.asarray(data)
+        if data.ndim > 1 and data.shape[1] != ring.shape[1]:
+            raise ValueError('number of channels must match')
+        if data.ndim < 2:
+            data = data.reshape(-1, 1)
+        frames = len(data)
+        if (frames > len(ring) - (self._output_written - self._output_read)
+                and self.stopped):
+            raise RuntimeError(
+                'not enough space in the internal buffer and the stream is '
+                'stopped')
+        done = await self._write(data)
+        if done < frames:
+            raise RuntimeError(
+                'the stream is not active, only {} of {} frames were '
+                'written'.format(done, frames))
+        underflowed, self._underflowed = self._underflowed, False
+        return underflowed
+
+    async def _write(self, data):
+        """Copy a 2D array into the output buffer, waiting for space.
+
+        Returns the number of frames written, which is less than
+        ``len(data)`` if the stream is (or becomes) inactive.
+
+        """
+        ring = self._output_ring
+        size = len(ring)
+        frames = len(data)
+        done = 0
+        while done < frames:
+            chunk = min(frames - done, self._chunksize)
+            # Wait until there is enough free space for the next chunk:
+            if not await self._wait_until(
+                    '_output_read', self._output_written + chunk - size):
+                break
+            written = self._output_written
+            chunk = min(frames - done, size - (written - self._output_read))
+            start = written % size
+            first = min(chunk, size - start)
+            ring[start:start + first] = data[done:done + first]
+            ring[:chunk - first] = data[done + first:done + chunk]
+            self._output_written = written + chunk
+            done += chunk
+        return done
+
+    async def drain(self):
+        """Wait until all written frames have been passed to PortAudio.
+
+        Note that this doesn't include the latency of the audio device.
+        If the stream is (or becomes) inactive before that,
+        `RuntimeError` is raised.
+
+        """
+        if not await self._wait_until('_output_read', self._output_written):
+            raise RuntimeError('the stream is not active')
+
+
+class AsyncStream(AsyncInputStream, AsyncOutputStream):
+    """Asyncio stream for playback and recording.  See __init__()."""
+
+    def __init__(self, samplerate=None, blocksize=None,
+                 device=None, channels=None, dtype=None, latency=None,
+                 extra_settings=None, finished_callback=None,
+                 clip_off=None, dither_off=None, never_drop_input=None,
+                 prime_output_buffers_using_stream_callback=None,
+                 buffersize=None, chunksize=None):
+        """PortAudio input/output stream (using asyncio and NumPy).
+
+        This is similar to `Stream`, but instead of providing a
+        *callback* function or calling blocking methods, audio data is
+        transferred with the coroutines `read()` and `write()`, which
+        can be awaited in an :mod:`asyncio` event loop::
+
+            async with sd.AsyncInputStream(channels=2) as stream:
+                while True:
+                    data, overflowed = await stream.read()
+                    ...
+
+        An internal callback function copies the audio data between
+        PortAudio and pre-allocated internal buffers.
+        The event loop is not woken up for each audio block, but only
+        once the requested amount of data (or free space) is available.
+
+        If the internal buffer for input is full, incoming frames are
+        dropped (see `input_overflows`).  If the internal buffer for
+        output is empty, silence is played (see `output_underflows`).
+
+        The stream can be used as an asynchronous context manager
+        (``async with``), which starts the stream on entry and stops and
+        closes it on exit.  Streams can also be used with the usual
+        methods `~Stream.start()`, `~Stream.stop()` and
+        `~Stream.close()`.
+
+        Parameters
+        ----------
+        buffersize : int, optional
+            Size of the internal buffer(s) in frames.  By default,
+            the buffers can hold one second of audio data.
+        chunksize : int, optional
+            Default number of frames for `read()` and number of frames
+            per wakeup in `write()`.  By default, this is the
+            *blocksize* or (if that is 0) 1024 frames.
+
+        Other Parameters
+        ----------------
+        samplerate, blocksize, device, channels, dtype, latency,
+        extra_settings, finished_callback, clip_off, dither_off,
+        never_drop_input, prime_output_buffers_using_stream_callback
+            See `Stream`.
+
+        See Also
+        --------
+        AsyncInputStream, AsyncOutputStream, Stream
+
+        """
+        _AsyncStreamBase.__init__(self, kind='duplex',
+                                  **_remove_self(locals()))
+
+    async def exchange(self, frames=None, poolsize=2, prefill=1):
+        """Iterate over pairs of input and output blocks (asynchronously).
+
+        This is an asynchronous generator, to be used with
+        ``async for``.  For each block of input data, a block of output
+        data has to be provided by writing to *outdata*::
+
+            async with sd.AsyncStream(channels=2) as stream:
+                async for indata, outdata, status in stream.exchange():
+                    outdata[:] = indata
+
+        The output block is written to the stream when the next block is
+        requested (i.e. in the next iteration of the loop), which waits
+        for free space in the internal buffer if necessary.
+
+        The blocks are taken from pools of *poolsize* pre-allocated
+        arrays, see `blocks()`.  The contents of *outdata* are not
+        cleared between iterations, all frames have to be overwritten.
+
+        The iteration ends when the stream is (or becomes) inactive,
+        e.g. because of `stop()`.
+
+        Parameters
+        ----------
+        frames : int, optional
+            The number of frames per block, see `read()`.
+        poolsize : int, optional
+            The number of pre-allocated blocks for input and output.
+        prefill : int, optional
+            The number of blocks of silence to be written before the
+            first output block, to avoid output underflows.
+
+        Yields
+        ------
+        indata : numpy.ndarray
+            Input data, see `read()`.
+        outdata : numpy.ndarray
+            Output data, to be filled by the consumer.
+        status : CallbackFlags
+            ``status.input_overflow`` is set if input data was
+            discarded, ``status.output_underflow`` is set if silence had
+            to be played since the previous block (see `write()`).
+            The same object is re-used for all blocks.
+
+        """
+        import numpy as np
+        frames = self._check_frames(frames)
+        iring, oring = self._input_ring, self._output_ring
+        ipool = list(np.zeros((poolsize, frames, iring.shape[1]),
+                              iring.dtype))
+        opool = list(np.zeros((poolsize, frames, oring.shape[1]),
+                              oring.dtype))
+        for _ in range(prefill):
+            await self._write(opool[0])
+        status = CallbackFlags()
+        while True:
+            for indata, outdata in zip(ipool, opool):
+                overflowed = await self._readinto(indata)
+                if overflowed is None:
+                    return
+                status.input_overflow = overflowed
+                status.output_underflow, self._underflowed = (
+                    self._underflowed, False)
+                yield indata, outdata, status
+                if await self._write(outdata) < frames:
+                    return
+
+
+class Player:
+    """Play audio data from a file or generator.  See __init__()."""
+
+    def __init__(self, source, samplerate=None, channels=None, dtype=None,
+                 blocksize=2048, buffersize=20, prefill=None, device=None,
+                 latency=None, extra_settings=None):
+        """Play a WAV file, raw PCM data or a generator in the background.
+
+        Audio data is read from *source* by a background thread, which
+        keeps a pre-allocated ring of *buffersize* blocks filled.  The
+        stream callback only copies one block per invocation from this
+        ring into the output buffer.
+        If the ring is empty (because reading is too slow), silence is
+        played and the block is counted in `underruns`, but playback
+        continues.  This doesn't need NumPy nor any audio file library.
+
+        The object can be used as a context manager::
+
+            with sd.Player('my-file.wav') as player:
+                player.wait()
+
+        Parameters
+        ----------
+        source : str or path-like or file-like or iterable
+            If *dtype* is not specified, this is the name of a WAV (or
+            RF64) file or a binary file object positioned at the
+            beginning of a WAV file.  *samplerate*, *channels* and
+            *dtype* are taken from the file header.  If *samplerate* or
+            *channels* are given as well, they must match the header.
+
+            If *dtype* is specified, this is either the name of a file
+            or a binary file object containing raw (headerless)
+            interleaved PCM data or an iterable (e.g. a generator) of
+            buffers (e.g. `bytes` or C-contiguous NumPy arrays) with
+            interleaved samples.  Those buffers can have arbitrary
+            sizes.  *channels* must be specified as well.
+        samplerate : float, optional
+            The sampling frequency, see `default.samplerate`.
+        channels : int, optional
+            The number of channels, needed for raw data.
+        dtype : str, optional
+            The sample format of raw data, see `RawStream`.
+        blocksize : int, optional
+            The number of frames per block.  This is used for reading
+            from *source* and as *blocksize* of the stream.
+        buffersize : int, optional
+            The number of blocks in the ring.
+        prefill : int, optional
+            The number of blocks to read before starting the stream.
+            By default, the whole ring is filled.
+
+        Other Parameters
+        ----------------
+        device, latency, extra_settings
+            See `default` and `RawOutputStream`.
+
+        See Also
+        --------
+        Recorder, play
+
+        """
+        import threading
+        if blocksize < 1:
+            raise ValueError('blocksize must be at least 1')
+        if buffersize < 1:
+            raise ValueError('buffersize must be at least 1')
+        if prefill is None:
+            prefill = buffersize
+        if not 0 <= prefill <= buffersize:
+            raise ValueError('prefill must be between 0 and buffersize')
+        self._file = None
+        if isinstance(source, (str, _os.PathLike)):
+            source = self._file = open(source, 'rb')
+        try:
+            if dtype is None:
+                header = _read_wav_header(source)
+                for name, value, file_value in zip(
+                        ('samplerate', 'channels'), (samplerate, channels),
+                        header):
+                    if value is not None and value != file_value:
+                        raise ValueError(
+                            f'{name}={value!r} does not match the WAV file '
+                            f'({file_value})')
+                samplerate, channels, dtype, size = header
+                self._source = _RawSource(source, size)
+            elif channels is None:
+                raise TypeError('channels must be specified for raw data')
+            elif hasattr(source, 'readinto'):
+                self._source = _RawSource(source)
+            else:
+                self._source = _IterSource(source)
+            self._stream = RawOutputStream(
+                samplerate=samplerate, blocksize=blocksize, device=device,
+                channels=channels, dtype=dtype, latency=latency,
+                extra_settings=extra_settings, callback=self._callback,
+                finished_callback=self._finished_callback)
+        except BaseException:
+            self._close_file()
+            raise
+        blockbytes = blocksize * channels * self._stream.samplesize
+        self._ring = bytearray(buffersize * blockbytes)
+        ring = memoryview(self._ring)
+        self._slots = [ring[i * blockbytes:(i + 1) * blockbytes]
+                       for i in range(buffersize)]
+        self._lengths = [0] * buffersize
+        self._silence = memoryview(bytes(blockbytes))
+        self._prefill = prefill
+        # Number of blocks written to/played from the ring:
+        self._written = self._played = 0
+        self._eof = False
+        self._stopping = False
+        self._error = None
+        self._underruns = 0
+        self._status = CallbackFlags()
+        self._space = threading.Event()
+        self._prefilled = threading.Event()
+        self._finished = threading.Event()
+        self._thread = threading.Thread(target=self._read, daemon=True)
+
+    def __enter__(self):
+        """Start playback in the beginning of a "with" statement."""
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        """Stop playback when exiting a "with" statement."""
+        self.stop()
+
+    @property
+    def stream(self):
+        """The underlying `RawOutputStream`."""
+        return self._stream
+
+    @property
+    def active(self):
+        """``True`` while audio data is played back."""
+        return self._stream.active
+
+    @property
+    def buffered(self):
+        """The number of blocks currently waiting in the ring."""
+        return self._written - self._played
+
+    @property
+    def underruns(self):
+        """The number of blocks of silence played because of an empty ring.
+
+        This happens if *source* can't be read fast enough.  Increasing
+        *buffersize* (and *prefill*) may help.
+
+        """
+        return self._underruns
+
+    @property
+    def status(self):
+        """All status flags reported to the stream callback so far.
+
+        Returns
+        -------
+        CallbackFlags
+
+        """
+        return self._status
+
+    def start(self):
+        """Start reading and, after pre-filling the ring, start playback."""
+        self._thread.start()
+        self._prefilled.wait()
+        if self._error is not None:
+            raise self._error
+        self._stream.start()
+
+    def wait(self):
+        """Wait until playback is finished.
+
+        If an error occurred while reading *source*, it is raised here.
+        Can be interrupted with a KeyboardInterrupt.
+
+        """
+        self._finished.wait()
+        self.stop()
+
+    def stop(self):
+        """Stop playback (and reading) immediately and close the stream."""
+        self._stopping = True
+        self._space.set()
+        self._stream.stop()
+        self._stream.close()
+        if self._thread.is_alive():
+            self._thread.join()
+        else:
+            self._close_file()  # In case start() wasn't called
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read(self):
+        """Fill the ring, this runs in a background thread."""
+        try:
+            size = len(self._slots)
+            while not self._stopping:
+                if self._written >= self._prefill:
+                    self._prefilled.set()
+                if self._written - self._played >= size:
+                    self._space.wait()
+                    self._space.clear()
+                    continue
+                slot = self._slots[self._written % size]
+                length = self._source.readinto(slot)
+                self._lengths[self._written % size] = length
+                if length:
+                    self._written += 1
+                if length < len(slot):
+                    break
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._eof = True
+            self._prefilled.set()
+            self._close_file()
+
+    def _callback(self, outdata, frames, time, status):
+        self._status |= status
+        if self._played < self._written:
+            index = self._played % len(self._slots)
+            length = self._lengths[index]
+            if length == len(outdata):
+                outdata[:] = self._slots[index]
+            else:
+                outdata[:length] = self._slots[index][:length]
+                outdata[length:] = self._silence[length:]
+            self._played += 1
+            self._space.set()
+        elif self._eof:
+            outdata[:] = self._silence
+            raise CallbackStop
+        else:
+            self._underruns += 1
+            outdata[:] = self._silence
+
+    def _finished_callback(self):
+        self._finished.set()
+
+
+class Recorder:
+    """Record audio data into a WAV file.  See __init__()."""
+
+    def __init__(self, file, samplerate=None, channels=None, dtype=None,
+                 blocksize=2048, buffersize=64, writesize=None, device=None,
+                 latency=None, extra_settings=None):
+        """Record into a WAV (or RF64) file using a background thread.
+
+        The stream callback copies each block of input data into a
+        pre-allocated ring of *buffersize* blocks.  A background thread
+        writes the data from the ring to the file, using large
+        sequential writes of (at least) *writesize* blocks.
+        If the writer thread can't keep up and the ring is full, the
+        incoming block is dropped (see `dropped`).
+        The amount of memory used is constant, regardless of the
+        duration of the recording.  This doesn't need NumPy nor any
+        audio file library.
+
+        The header of the WAV file is updated when the recording is
+        stopped.  Files larger than 4 GiB are automatically turned into
+        RF64 files.  If *file* is not seekable (e.g. a pipe), the
+        header is not updated and the sizes are left undefined
+        (``0xFFFFFFFF``), which is understood by many programs.
+
+        The object can be used as a context manager::
+
+            with sd.Recorder('my-recording.wav', channels=2) as recorder:
+                sd.sleep(10 * 1000)
+
+        Parameters
+        ----------
+        file : str or path-like or file-like
+            File name or binary file object to be written.
+        samplerate : float, optional
+            The sampling frequency, see `default.samplerate`.
+        channels : int, optional
+            The number of channels, see `default.channels`.
+        dtype : {'float32', 'int32', 'int24', 'int16', 'uint8'}, optional
+            The sample format, see `default.dtype`.
+        blocksize : int, optional
+            The number of frames per block, used as *blocksize* of the
+            stream.
+        buffersize : int, optional
+            The number of blocks in the ring.
+        writesize : int, optional
+            The minimum number of blocks per write operation.  By
+            default, a quarter of the ring is written at once.
+
+        Other Parameters
+        ----------------
+        device, latency, extra_settings
+            See `default` and `RawInputStream`.
+
+        See Also
+        --------
+        Player, rec
+
+        """
+        import threading
+        if blocksize < 1:
+            raise ValueError('blocksize must be at least 1')
+        if buffersize < 1:
+            raise ValueError('buffersize must be at least 1')
+        if writesize is None:
+            writesize = max(buffersize // 4, 1)
+        if not 0 < writesize <= buffersize:
+            raise ValueError('writesize must be between 1 and buffersize')
+        self._stream = RawInputStream(
+            samplerate=samplerate, blocksize=blocksize, device=device,
+            channels=channels, dtype=dtype, latency=latency,
+            extra_settings=extra_settings, callback=self._callback)
+        self._file = None
+        try:
+            if isinstance(file, (str, _os.PathLike)):
+                file = self._file = open(file, 'wb')
+            self._wav = _WavWriter(file, self._stream.samplerate,
+                                   self._stream.channels, self._stream.dtype)
+        except BaseException:
+            self._stream.close()
+            self._close_file()
+            raise
+        self._blockbytes = (blocksize * self._stream.channels *
+                            self._stream.samplesize)
+        self._ring = memoryview(bytearray(buffersize * self._blockbytes))
+        self._slots = [
+            self._ring[i * self._blockbytes:(i + 1) * self._blockbytes]
+            for i in range(buffersize)]
+        self._writesize = writesize
+        # Number of blocks recorded into/written from the ring:
+        self._recorded = self._written = 0
+        self._dropped = 0
+        self._max_lag = 0
+        self._stopping = False
+        self._error = None
+        self._status = CallbackFlags()
+        self._available = threading.Event()
+        self._thread = threading.Thread(target=self._write, daemon=True)
+
+    def __enter__(self):
+        """Start recording in the beginning of a "with" statement."""
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        """Stop recording when exiting a "with" statement."""
+        self.stop()
+
+    @property
+    def stream(self):
+        """The underlying `RawInputStream`."""
+        return self._stream
+
+    @property
+    def frames(self):
+        """The number of frames written to the file so far."""
+        return self._written * self._stream.blocksize
+
+    @property
+    def lag(self):
+        """The number of recorded blocks not yet written to the file."""
+        return self._recorded - self._written
+
+    @property
+    def max_lag(self):
+        """The maximum value of `lag` so far.
+
+        If this gets close to *buffersize*, blocks are in danger of
+        being dropped.
+
+        """
+        return self._max_lag
+
+    @property
+    def dropped(self):
+        """The number of blocks dropped because of a full ring."""
+        return self._dropped
+
+    @property
+    def status(self):
+        """All status flags reported to the stream callback so far.
+
+        Returns
+        -------
+        CallbackFlags
+
+        """
+        return self._status
+
+    def start(self):
+        """Start the writer thread and the stream."""
+        self._thread.start()
+        self._stream.start()
+
+    def stop(self):
+        """Stop recording, write remaining data and close the file.
+
+        If an error occurred while writing the file, it is raised here.
+
+        """
+        self._stream.stop()
+        self._stream.close()
+        self._stopping = True
+        self._available.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        else:
+            self._finish()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _finish(self):
+        try:
+            if self._wav is not None:
+                wav, self._wav = self._wav, None
+                wav.close()
+        finally:
+            self._close_file()
+
+    def _write(self):
+        """Write data from the ring to the file, runs in a separate thread."""
+        try:
+            size = len(self._slots)
+            while True:
+                self._available.wait()
+                self._available.clear()
+                while self._written < self._recorded:
+                    start = self._written % size
+                    count = min(self._recorded - self._written, size - start)
+                    self._wav.write(self._ring[
+                        start * self._blockbytes:
+                        (start + count) * self._blockbytes])
+                    self._written += count
+                if self._stopping:
+                    break
+        except BaseException as e:
+            self._error = e
+        finally:
+            try:
+                self._finish()
+            except BaseException as e:
+                if self._error is None:
+                    self._error = e
+
+    def _callback(self, indata, frames, time, status):
+        self._status |= status
+        lag = self._recorded - self._written
+        if lag < len(self._slots):
+            self._slots[self._recorded % len(self._slots)][:] = indata
+            self._recorded += 1
+            lag += 1
+        else:
+            self._dropped += 1
+        if lag > self._max_lag:
+            self._max_lag = lag
+        if lag >= self._writesize:
+            self._available.set()
+
+
+class DeviceList(tuple):
+    """A list with information about all available audio devices.
+
+    This class is not meant to be instantiated by the user.
+    Instead, it is returned by `query_devices()`.
+    It contains a dictionary for each available device, holding the keys
+    described in `query_devices()`.
+
+    This class has a special string representation that is shown as
+    return value of `query_devices()` if used in an interactive
+    Python session.  It will also be shown when using the :func:`print`
+    function.  Furthermore, it can be obtained with :func:`repr` and
+    :class:`str() <str>`.
+
+    """
+
+    __slots__ = ()
+
+    def __repr__(self):
+        idev = _get_device_id(default.device['input'], 'input')
+        odev = _get_device_id(default.device['output'], 'output')
+        devices, hostapis = _get_device_info()
+        digits = len(str(len(devices) - 1))
+        hostapi_names = [hostapi['name'] for hostapi in hostapis]
+
+        def get_mark(idx):
+            return (' ', '>', '<', '*')[(idx == idev) + 2 * (idx == odev)]
+
+        text = '\n'.join(
+            '{mark} {idx:{dig}} {name}, {ha} ({ins} in, {outs} out)'.format(
+                mark=get_mark(info['index']),
+                idx=info['index'],
+                dig=digits,
+                name=info['name'],
+                ha=hostapi_names[info['hostapi']],
+                ins=info['max_input_channels'],
+                outs=info['max_output_channels'])
+            for info in self)
+        return text
+
+
+class CallbackFlags:
+    """Flag bits for the *status* argument to a stream *callback*.
+
+    If you experience under-/overflows, you can try to increase the
+    ``latency`` and/or ``blocksize`` settings.
+    You should also avoid anything that could block the callback
+    function for a long time, e.g. extensive computations, waiting for
+    another thread, reading/writing files, network connections, etc.
+
+    See Also
+    --------
+    Stream
+
+    Examples
+    --------
+    This can be used to collect the errors of multiple *status* objects:
+
+    >>> import sounddevice as sd
+    >>> errors = sd.CallbackFlags()
+    >>> errors |= status1
+    >>> errors |= status2
+    >>> errors |= status3
+    >>> # and so on ...
+    >>> errors.input_overflow
+    True
+
+    The values may also be set and cleared by the user:
+
+    >>> import sounddevice as sd
+    >>> cf = sd.CallbackFlags()
+    >>> cf
+    <sounddevice.CallbackFlags: no flags set>
+    >>> cf.input_underflow = True
+    >>> cf
+    <sounddevice.CallbackFlags: input underflow>
+    >>> cf.input_underflow = False
+    >>> cf
+    <sounddevice.CallbackFlags: no flags set>
+
+    """
 
     __slots__ = '_flags'
 
@@ -2046,6 +3951,300 @@ class CallbackFlags:
             self._flags &= ~flag
 
 
+class CallbackStats:
+    """Timing statistics of the *callback* of a stream.
+
+    An object of this class is available as `Stream.stats` for streams
+    with a Python *callback*, if enabled with the *stats* argument (or
+    `default.stats`).  The following values are collected for each
+    invocation of the *callback*:
+
+    ``'duration'``
+        The wall-clock time spent in the *callback* (including the
+        creation of its arguments).
+    ``'interval'``
+        The time between the start of the current and the previous
+        invocation.
+    ``'lag'``
+        For output and duplex streams, the time between
+        ``time.currentTime`` and ``time.outputBufferDacTime``
+        (i.e. how long before its playback the output block is
+        requested), for input streams the time between
+        ``time.inputBufferAdcTime`` and ``time.currentTime``.
+        This is only meaningful if the host API provides these
+        timestamps.
+
+    The values are stored in fixed-size histograms with logarithmic
+    buckets (8 buckets per octave, i.e. a resolution of about 12.5%,
+    starting at 0.1 microseconds).  Recording a value doesn't allocate
+    memory and doesn't acquire any locks, so the statistics can be left
+    enabled in production.
+
+    See Also
+    --------
+    Stream.stats, Stream.cpu_load
+
+    Examples
+    --------
+    >>> stream.stats.count, stream.stats.overruns
+    (4321, 0)
+    >>> stream.stats.percentile(99) * 1000  # milliseconds
+    0.0838
+    >>> stream.stats.max('interval') * 1000
+    23.125
+
+    """
+
+    _buckets = 256
+    _kinds = 'duration', 'interval', 'lag'
+
+    def __init__(self, kind, samplerate):
+        self._output = kind != 'input'
+        self._samplerate = samplerate
+        self._histograms = {kind: [0] * self._buckets for kind in self._kinds}
+        self._maxima = [0.0] * len(self._kinds)
+        # Number of overruns and start time of the previous invocation:
+        self._state = [0, None]
+
+    def __repr__(self):
+        if not self.count:
+            return '<sounddevice.CallbackStats: no callbacks>'
+        return ('<sounddevice.CallbackStats: {} callbacks, {} overruns, '
+                'duration: median {:.3f} ms, 99% {:.3f} ms, max {:.3f} ms>'
+                ).format(self.count, self.overruns,
+                         self.percentile(50) * 1000,
+                         self.percentile(99) * 1000,
+                         self.max() * 1000)
+
+    @property
+    def count(self):
+        """Number of recorded *callback* invocations."""
+        return sum(self._histograms['duration'])
+
+    @property
+    def overruns(self):
+        """Number of invocations exceeding their time budget.
+
+        This is the number of *callback* invocations which took longer
+        than the duration of the processed block (i.e. *frames* divided
+        by `Stream.samplerate`).
+
+        """
+        return self._state[0]
+
+    def max(self, kind='duration'):
+        """Return the largest value (in seconds) of the given *kind*.
+
+        *kind* can be ``'duration'``, ``'interval'`` or ``'lag'``.
+
+        """
+        return self._maxima[self._kinds.index(kind)]
+
+    def percentile(self, q, kind='duration'):
+        """Return the *q*-th percentile (in seconds) of the given *kind*.
+
+        *q* must be between 0 and 100, *kind* can be ``'duration'``,
+        ``'interval'`` or ``'lag'``.
+        The result is the upper limit of the histogram bucket containing
+        the requested percentile (but never more than `max()`).
+        If no values are available, 0.0 is returned.
+
+        """
+        if not 0 <= q <= 100:
+            raise ValueError('q must be between 0 and 100')
+        histogram = list(self._histograms[kind])
+        total = sum(histogram)
+        if not total:
+            return 0.0
+        threshold = max(q * total / 100, 1)
+        accumulated = 0
+        for index, count in enumerate(histogram):
+            accumulated += count
+            if accumulated >= threshold:
+                break
+        return min(_stats_bucket_limit(index), self.max(kind))
+
+    def reset(self):
+        """Clear all collected statistics."""
+        for histogram in self._histograms.values():
+            histogram[:] = [0] * self._buckets
+        self._maxima[:] = [0.0] * len(self._kinds)
+        self._state[:] = 0, None
+
+    def _wrap(self, callback):
+        """Return a version of the C callback *callback* with timing."""
+        from time import perf_counter
+        # Everything used in wrapper() is bound to local variables, because
+        # this is called for every block on the audio thread:
+        bucket = _stats_bucket
+        durations, intervals, lags = map(self._histograms.get, self._kinds)
+        maxima = self._maxima
+        state = self._state
+        output = self._output
+        samplerate = self._samplerate
+
+        def wrapper(iptr, optr, frames, time, status, userdata):
+            start = perf_counter()
+            try:
+                return callback(iptr, optr, frames, time, status, userdata)
+            finally:
+                duration = perf_counter() - start
+                durations[bucket(duration)] += 1
+                if duration > maxima[0]:
+                    maxima[0] = duration
+                if duration * samplerate > frames:
+                    state[0] += 1
+                previous = state[1]
+                state[1] = start
+                if previous is not None:
+                    interval = start - previous
+                    intervals[bucket(interval)] += 1
+                    if interval > maxima[1]:
+                        maxima[1] = interval
+                if output:
+                    lag = time.outputBufferDacTime - time.currentTime
+                else:
+                    lag = time.currentTime - time.inputBufferAdcTime
+                lags[bucket(lag)] += 1
+                if lag > maxima[2]:
+                    maxima[2] = lag
+
+        return wrapper
+
+
+class XrunLog:
+    """Counters and timestamps of input/output under-/overflows.
+
+    An object of this class is available as `Stream.xruns`.
+    For streams with a Python *callback*, each *status* passed to the
+    *callback* which has any flags set is recorded (see
+    `CallbackFlags`).  For blocking streams, an input overflow is
+    recorded each time `Stream.read()` returns ``overflowed=True``,
+    and an output underflow each time `Stream.write()` returns
+    ``underflowed=True``.  For ring buffer streams, see
+    `RingBufferStream.xruns`.
+    Only the flags reported by PortAudio are recorded, not
+    overflows/underflows of the internal buffers of `RingBufferStream`
+    and `AsyncStream` (those have their own counters).
+
+    The number of occurrences of each flag is counted for the whole
+    lifetime of the stream (or until `reset()` is called).
+    Additionally, the most recent events (up to *size*) are stored
+    together with the stream time (see `Stream.time`) when they were
+    detected, which can be used to correlate dropouts with other
+    events, e.g. load spikes.  No memory is allocated when recording an
+    event.
+
+    See Also
+    --------
+    Stream.xruns, CallbackFlags, CallbackStats
+
+    Examples
+    --------
+    >>> stream.xruns
+    <sounddevice.XrunLog: 2 output underflows>
+    >>> stream.xruns.events()
+    [(3.402, <sounddevice.CallbackFlags: output underflow>),
+     (17.861, <sounddevice.CallbackFlags: output underflow>)]
+
+    """
+
+    _names = ('input_underflow', 'input_overflow', 'output_underflow',
+              'output_overflow', 'priming_output')
+
+    def __init__(self, size=256):
+        self._counts = [0] * len(self._names)  # One per CallbackFlags bit
+        self._times = [0.0] * size
+        self._flags = [0] * size
+        self._total = 0  # Number of recorded events
+
+    def __repr__(self):
+        counts = ', '.join(
+            '{} {}{}'.format(count, name.replace('_', ' '),
+                             's' if count > 1 else '')
+            for name, count in zip(self._names, self._counts) if count)
+        return '<sounddevice.XrunLog: {}>'.format(counts or 'no xruns')
+
+    @property
+    def input_underflows(self):
+        """Number of input underflows.
+
+        See `CallbackFlags.input_underflow`.
+
+        """
+        return self._counts[0]
+
+    @property
+    def input_overflows(self):
+        """Number of input overflows.
+
+        See `CallbackFlags.input_overflow` and `Stream.read()`.
+
+        """
+        return self._counts[1]
+
+    @property
+    def output_underflows(self):
+        """Number of output underflows.
+
+        See `CallbackFlags.output_underflow` and `Stream.write()`.
+
+        """
+        return self._counts[2]
+
+    @property
+    def output_overflows(self):
+        """Number of output overflows.
+
+        See `CallbackFlags.output_overflow`.
+
+        """
+        return self._counts[3]
+
+    @property
+    def priming_outputs(self):
+        """Number of callbacks with `CallbackFlags.priming_output`."""
+        return self._counts[4]
+
+    @property
+    def count(self):
+        """Total number of recorded events (including discarded ones)."""
+        return self._total
+
+    def events(self):
+        """Return the most recent events.
+
+        Returns
+        -------
+        list of tuple
+            A list of ``(time, status)`` pairs, oldest first, where
+            *time* is the stream time (in seconds) of the event and
+            *status* is a `CallbackFlags` object.
+            At most *size* events are returned (see `XrunLog`).
+
+        """
+        size = len(self._times)
+        total = self._total
+        return [(self._times[i % size], CallbackFlags(self._flags[i % size]))
+                for i in range(max(total - size, 0), total)]
+
+    def reset(self):
+        """Clear all counters and events."""
+        self._counts[:] = [0] * len(self._counts)
+        self._total = 0
+
+    def _record(self, time, flags):
+        """Record an event, this is called on the audio thread."""
+        index = self._total % len(self._times)
+        self._times[index] = time
+        self._flags[index] = flags
+        self._total += 1
+        counts = self._counts
+        for bit in range(len(counts)):
+            if flags >> bit & 1:
+                counts[bit] += 1
+
+
 class _InputOutputPair:
     """Parameter pairs for device, channels, dtype and latency."""
 
@@ -2134,13 +4333,14 @@ class default:
     dtype = _default_dtype = 'float32', 'float32'
     """Default data type used for input/output samples.
 
-    The types ``'float32'``, ``'int32'``, ``'int16'``, ``'int8'`` and
-    ``'uint8'`` can be used for all streams and functions.
+    The types ``'float32'``, ``'int32'``, ``'int24'``, ``'int16'``,
+    ``'int8'`` and ``'uint8'`` can be used for all streams and
+    functions (``'int24'`` is the packed 24 bit format, which is *not*
+    supported in NumPy, therefore it is converted from/to ``'int32'``
+    arrays, see `Stream`).
     Additionally, `play()`, `rec()` and `playrec()` support
     ``'float64'`` (for convenience, data is merely converted from/to
-    ``'float32'``) and `RawInputStream`, `RawOutputStream` and
-    `RawStream` support ``'int24'`` (packed 24 bit format, which is
-    *not* supported in NumPy!).
+    ``'float32'``).
 
     See Also
     --------
@@ -2202,6 +4402,32 @@ class default:
     (i.e. if *callback* wasn't specified).  See also
     http://www.portaudio.com/docs/proposals/020-AllowCallbackToPrimeStream.html.
 
+    """
+    reuse_arrays = False
+    """Re-use NumPy arrays and status objects in stream callbacks.
+
+    By default, new `numpy.ndarray` objects (viewing the memory provided
+    by PortAudio) and a new `CallbackFlags` object are created for each
+    invocation of the *callback* of `Stream`, `InputStream` and
+    `OutputStream`.
+    Set to ``True`` to cache the arrays for each buffer pointer and
+    block size provided by PortAudio and to update a single
+    `CallbackFlags` object instead.  This reduces the per-block overhead
+    of the callback, especially for small block sizes.
+
+    .. note:: With this setting, the *callback* arguments must not be
+       used after the *callback* has returned, because they may be
+       re-used in a later invocation.  Use ``indata.copy()`` if needed.
+
+    """
+    stats = False
+    """Collect timing statistics of stream callbacks.
+
+    Set to ``True`` to measure the duration of each invocation of the
+    *callback* (and the interval and lag, see `CallbackStats`), which
+    is then available as `Stream.stats`.
+    This adds a small overhead to each invocation of the *callback*.
+
     """
 
     def __init__(self):
@@ -2221,12 +4447,14 @@ class default:
 
     @property
     def _default_device(self):
+        _ensure_initialized()
         return (_lib.Pa_GetDefaultInputDevice(),
                 _lib.Pa_GetDefaultOutputDevice())
 
     @property
     def hostapi(self):
         """Index of the default host API (read-only)."""
+        _ensure_initialized()
         return _check(_lib.Pa_GetDefaultHostApi())
 
     def reset(self):
@@ -2504,6 +4732,195 @@ class WasapiSettings:
         ))
 
 
+class Session:
+    """Playback and/or recording with `play()`, `rec()` and `playrec()`.
+
+    The module-level functions `play()`, `rec()` and `playrec()` use a
+    single global session, therefore only one of them can be running at
+    any given time.  Each `Session` object can run one invocation of its
+    methods `play()`, `rec()` or `playrec()` (which take the same
+    arguments as the corresponding module-level functions) at a time,
+    but multiple `Session` objects can be used at the same time, for
+    example to drive multiple devices from the same process.
+
+    Examples
+    --------
+    >>> import sounddevice as sd
+    >>> s1 = sd.Session()
+    >>> s2 = sd.Session()
+    >>> s1.play(data1, samplerate=48000, device=3)
+    >>> recording = s2.rec(frames, samplerate=48000, channels=2, device=4)
+    >>> s1.wait()
+    >>> s2.wait()
+
+    """
+
+    def __init__(self):
+        self._ctx = None
+
+    def play(self, data, samplerate=None, mapping=None, blocking=False,
+             loop=False, prefetch=None, convert=False, dtype=None, **kwargs):
+        """Play back a NumPy array containing audio data.
+
+        This is the same as the module-level function `play()`, except
+        that it only stops playback/recording of this session.
+
+        """
+        ctx = _CallbackContext(loop=loop)
+        ctx.frames = ctx.check_data(data, mapping, kwargs.get('device'))
+        if dtype is not None:
+            if dtype != 'int24' or ctx.output_dtype != 'int32':
+                raise TypeError(
+                    "dtype can only be 'int24' (and only for 'int32' data)")
+            ctx.output_dtype = dtype
+        if convert:
+            ctx.convert_data()
+        if prefetch:
+            ctx.page_touchers.append(_PageToucher(ctx, ctx.data, prefetch))
+
+        def callback(outdata, frames, time, status):
+            assert len(outdata) == frames
+            ctx.callback_enter(status, outdata)
+            ctx.write_outdata(outdata)
+            ctx.callback_exit()
+
+        self._start(ctx, blocking, OutputStream, samplerate,
+                    ctx.output_channels, ctx.output_dtype, callback,
+                    prime_output_buffers_using_stream_callback=False, **kwargs)
+
+    def rec(self, frames=None, samplerate=None, channels=None, dtype=None,
+            out=None, mapping=None, blocking=False, prefault=None,
+            flush_interval=None, convert=False, **kwargs):
+        """Record audio data into a NumPy array.
+
+        This is the same as the module-level function `rec()`, except
+        that it only stops playback/recording of this session.
+
+        """
+        ctx = _CallbackContext()
+        out, ctx.frames = ctx.check_out(out, frames, channels, dtype, mapping,
+                                        convert)
+        if convert:
+            ctx.convert_out()
+        if prefault or flush_interval:
+            ctx.page_touchers.append(
+                _PageToucher(ctx, ctx.out, prefault, flush_interval,
+                             write=True))
+
+        def callback(indata, frames, time, status):
+            assert len(indata) == frames
+            ctx.callback_enter(status, indata)
+            ctx.read_indata(indata)
+            ctx.callback_exit()
+
+        self._start(ctx, blocking, InputStream, samplerate, ctx.input_channels,
+                    ctx.input_dtype, callback, **kwargs)
+        return out
+
+    def playrec(self, data, samplerate=None, channels=None, dtype=None,
+                out=None, input_mapping=None, output_mapping=None,
+                blocking=False, prefault=None, flush_interval=None,
+                prefetch=None, convert=False, **kwargs):
+        """Simultaneous playback and recording of NumPy arrays.
+
+        This is the same as the module-level function `playrec()`,
+        except that it only stops playback/recording of this session.
+
+        """
+        ctx = _CallbackContext()
+        output_frames = ctx.check_data(data, output_mapping,
+                                       kwargs.get('device'))
+        if dtype is None:
+            dtype = ctx.data.dtype  # ignore module defaults
+        out, input_frames = ctx.check_out(out, output_frames, channels, dtype,
+                                          input_mapping, convert)
+        if input_frames != output_frames:
+            raise ValueError('len(data) != len(out)')
+        ctx.frames = input_frames
+        if convert:
+            ctx.convert_data()
+            ctx.convert_out()
+        if prefault or flush_interval:
+            ctx.page_touchers.append(
+                _PageToucher(ctx, ctx.out, prefault, flush_interval,
+                             write=True))
+        if prefetch:
+            ctx.page_touchers.append(_PageToucher(ctx, ctx.data, prefetch))
+
+        def callback(indata, outdata, frames, time, status):
+            assert len(indata) == len(outdata) == frames
+            ctx.callback_enter(status, indata)
+            ctx.read_indata(indata)
+            ctx.write_outdata(outdata)
+            ctx.callback_exit()
+
+        self._start(ctx, blocking, Stream, samplerate,
+                    (ctx.input_channels, ctx.output_channels),
+                    (ctx.input_dtype, ctx.output_dtype), callback,
+                    prime_output_buffers_using_stream_callback=False, **kwargs)
+        return out
+
+    def wait(self, ignore_errors=True):
+        """Wait for playback/recording of this session to be finished.
+
+        See `wait()`.
+
+        """
+        if self._ctx:
+            return self._ctx.wait(ignore_errors)
+
+    def stop(self, ignore_errors=True):
+        """Stop playback/recording of this session.
+
+        See `stop()`.
+
+        """
+        if self._ctx:
+            # Calling stop() before close() is necessary for older PortAudio
+            # versions, see issue #87:
+            self._ctx.stream.stop(ignore_errors)
+            self._ctx.stream.close(ignore_errors)
+
+    @property
+    def active(self):
+        """``True`` while playback/recording is running."""
+        return bool(self._ctx) and not self._ctx.event.is_set()
+
+    @property
+    def status(self):
+        """Info about over-/underflows, see `get_status()`."""
+        if self._ctx:
+            return self._ctx.status
+        else:
+            raise RuntimeError('play()/rec()/playrec() was not called yet')
+
+    @property
+    def conversion_time(self):
+        """Time spent for conversion, see `get_conversion_time()`."""
+        if self._ctx:
+            return self._ctx.conversion_time
+        else:
+            raise RuntimeError('play()/rec()/playrec() was not called yet')
+
+    @property
+    def stream(self):
+        """The stream used for playback/recording, see `get_stream()`."""
+        if self._ctx:
+            return self._ctx.stream
+        else:
+            raise RuntimeError('play()/rec()/playrec() was not called yet')
+
+    def _start(self, ctx, blocking, *args, **kwargs):
+        self.stop()  # Stop previous playback/recording
+        ctx.start_stream(*args, **kwargs)
+        self._ctx = ctx
+        if blocking:
+            self.wait()
+
+
+_default_session = Session()
+
+
 class _CallbackContext:
     """Helper class for reuse in play()/rec()/playrec() callbacks."""
 
@@ -2514,19 +4931,26 @@ class _CallbackContext:
     input_channels = output_channels = None
     input_dtype = output_dtype = None
     input_mapping = output_mapping = None
+    input_slice = None
+    input_gather = False
     silent_channels = None
+    output_plan = silent_plan = ()
+    converted_out = None  # Final destination of the recording, see below
+    converter = None  # Thread for the conversion, see convert_out()
+    conversion_time = 0.0
 
     def __init__(self, loop=False):
         import threading
         try:
             import numpy
-            assert numpy  # avoid "imported but unused" message (W0611)
         except ImportError as e:
             raise ImportError(
                 'NumPy must be installed for play()/rec()/playrec()') from e
+        self.take = numpy.take
         self.loop = loop
         self.event = threading.Event()
         self.status = CallbackFlags()
+        self.page_touchers = []
 
     def check_data(self, data, mapping, device):
         """Check data and output mapping."""
@@ -2538,6 +4962,8 @@ class _CallbackContext:
             raise ValueError(
                 'audio data to be played back must be one- or two-dimensional')
         frames, channels = data.shape
+        if self.loop and not frames:
+            raise ValueError('data must not be empty if loop=True')
         dtype = _check_dtype(data.dtype)
         mapping_is_explicit = mapping is not None
         mapping, channels = _check_mapping(mapping, channels)
@@ -2562,12 +4988,23 @@ class _CallbackContext:
         self.output_dtype = dtype
         self.output_mapping = mapping
         self.silent_channels = silent_channels
+        # Prepare write_outdata() to copy contiguous runs of channels:
+        self.output_plan = [
+            (target, slice(0, 1) if data.shape[1] == 1 else source)
+            for target, source in _mapping_to_runs(mapping)]
+        self.silent_plan = [target for target, _ in _mapping_to_runs(
+            silent_channels)]
         return frames
 
-    def check_out(self, out, frames, channels, dtype, mapping):
+    def check_out(self, out, frames, channels, dtype, mapping,
+                  convert=False):
         """Check out, frames, channels, dtype and input mapping."""
         import numpy as np
-        if out is None:
+        if convert and isinstance(out, (str, _os.PathLike, np.memmap)):
+            # This would need a temporary array of the same size in memory
+            raise ValueError(
+                'convert=True cannot be used with file-backed out')
+        if out is None or isinstance(out, (str, _os.PathLike)):
             if frames is None:
                 raise TypeError('frames must be specified')
             if channels is None:
@@ -2581,7 +5018,13 @@ class _CallbackContext:
             if dtype is None:
                 dtype = default.dtype['input']
             try:
-                out = np.empty((frames, channels), dtype, order='C')
+                if out is None:
+                    out = np.empty((frames, channels), _array_dtype(dtype),
+                                   order='C')
+                else:
+                    out = np.lib.format.open_memmap(
+                        out, mode='w+', dtype=_array_dtype(dtype),
+                        shape=(frames, channels))
             except TypeError as e:
                 from numbers import Integral
                 if not isinstance(frames, Integral):
@@ -2602,36 +5045,88 @@ class _CallbackContext:
         self.input_channels = channels
         self.input_dtype = dtype
         self.input_mapping = mapping
+        # Prepare read_indata() to use as few copy operations as possible:
+        self.input_slice = _mapping_to_slice(mapping)
+        self.input_gather = (self.input_slice is None and
+                             out.dtype == _array_dtype(dtype) and
+                             out.flags.c_contiguous)
         return out, frames
 
+    def convert_data(self):
+        """Convert data to the output dtype before starting the stream."""
+        from time import perf_counter
+        dtype = _array_dtype(self.output_dtype)
+        if self.data.dtype != dtype:
+            start = perf_counter()
+            self.data = self.data.astype(dtype)
+            self.conversion_time += perf_counter() - start
+
+    def convert_out(self):
+        """Record in the input dtype and convert after the recording."""
+        import threading
+        import numpy as np
+        dtype = _array_dtype(self.input_dtype)
+        if self.out.dtype != dtype:
+            self.converted_out = self.out
+            self.out = np.empty(self.out.shape, dtype)
+            self.input_gather = self.input_slice is None
+            # Not on PortAudio's thread, see finished_callback():
+            self.finished = threading.Event()
+            self.converter = threading.Thread(target=self.convert_recording,
+                                              daemon=True)
+
+    def convert_recording(self):
+        """Wait until the recording has finished, then convert it."""
+        from time import perf_counter
+        self.finished.wait()
+        try:
+            start = perf_counter()
+            self.converted_out[:self.frame] = self.out[:self.frame]
+            self.conversion_time += perf_counter() - start
+        finally:
+            self.converted_out = None
+            self.finish()
+
     def callback_enter(self, status, data):
         """Check status and blocksize."""
         self.status |= status
         self.blocksize = min(self.frames - self.frame, len(data))
 
     def read_indata(self, indata):
-        # We manually iterate over each channel in mapping because
-        # numpy.take(..., out=...) has a bug:
-        # https://github.com/numpy/numpy/pull/4246.
-        # Note: using indata[:blocksize, mapping] (a.k.a. 'fancy' indexing)
-        # would create unwanted copies (and probably memory allocations).
-        for target, source in enumerate(self.input_mapping):
+        out = self.out[self.frame:self.frame + self.blocksize]
+        indata = indata[:self.blocksize]
+        if self.input_slice is not None:
+            # Identity mapping or contiguous range of channels: single copy.
             # If out.dtype is 'float64', 'float32' data is "upgraded" here:
-            self.out[self.frame:self.frame + self.blocksize, target] = \
-                indata[:self.blocksize, source]
+            out[:] = indata[:, self.input_slice]
+        elif self.input_gather:
+            # Note: using indata[:, mapping] (a.k.a. 'fancy' indexing)
+            # would create unwanted copies (and memory allocations).
+            # mode='clip' avoids buffering (the indices are valid anyway):
+            self.take(indata, self.input_mapping, axis=1, out=out,
+                      mode='clip')
+        else:
+            # Different dtype or non-contiguous out: copy channel-wise.
+            for target, source in enumerate(self.input_mapping):
+                out[:, target] = indata[:, source]
 
     def write_outdata(self, outdata):
-        # 'float64' data is cast to 'float32' here:
-        outdata[:self.blocksize, self.output_mapping] = \
-            self.data[self.frame:self.frame + self.blocksize]
-        outdata[:self.blocksize, self.silent_channels] = 0
-        if self.loop and self.blocksize < len(outdata):
+        start = 0
+        while True:
+            stop = start + self.blocksize
+            block = outdata[start:stop]
+            data = self.data[self.frame:self.frame + self.blocksize]
+            # 'float64' data is cast to 'float32' here:
+            for target, source in self.output_plan:
+                block[:, target] = data[:, source]
+            for target in self.silent_plan:
+                block[:, target] = 0
+            if not self.loop or stop >= len(outdata):
+                break
             self.frame = 0
-            outdata = outdata[self.blocksize:]
-            self.blocksize = min(self.frames, len(outdata))
-            self.write_outdata(outdata)
-        else:
-            outdata[self.blocksize:] = 0
+            start = stop
+            self.blocksize = min(self.frames, len(outdata) - start)
+        outdata[stop:] = 0
 
     def callback_exit(self):
         if not self.blocksize:
@@ -2639,28 +5134,45 @@ class _CallbackContext:
         self.frame += self.blocksize
 
     def finished_callback(self):
+        _active_contexts.discard(self)
+        # Drop CFFI objects to avoid reference cycles
+        self.stream._callback = None
+        self.stream._userdata = None
+        self.stream._finished_callback = None
+        if self.converter is not None:
+            self.finished.set()  # finish() is called by convert_recording()
+        else:
+            self.finish()
+
+    def finish(self):
         self.event.set()
         # Drop temporary audio buffers to free memory
         self.data = None
         self.out = None
-        # Drop CFFI objects to avoid reference cycles
-        self.stream._callback = None
-        self.stream._finished_callback = None
 
     def start_stream(self, StreamClass, samplerate, channels, dtype, callback,
-                     blocking, **kwargs):
-        stop()  # Stop previous playback/recording
+                     **kwargs):
         self.stream = StreamClass(samplerate=samplerate,
                                   channels=channels,
                                   dtype=dtype,
                                   callback=callback,
                                   finished_callback=self.finished_callback,
                                   **kwargs)
-        self.stream.start()
-        global _last_callback
-        _last_callback = self
-        if blocking:
-            self.wait()
+        for toucher in self.page_touchers:
+            toucher.start()
+        if self.converter is not None:
+            self.converter.start()
+        # Keep a reference as long as the stream is running:
+        _active_contexts.add(self)
+        try:
+            self.stream.start()
+        except BaseException:
+            _active_contexts.discard(self)
+            self.stream.close(ignore_errors=True)
+            if self.converter is not None:
+                self.finished.set()
+            self.event.set()  # Stops the page touchers
+            raise
 
     def wait(self, ignore_errors=True):
         """Wait for finished_callback.
@@ -2675,6 +5187,100 @@ class _CallbackContext:
         return self.status if self.status else None
 
 
+def _set_future_result(future):
+    """Used by _AsyncStreamBase to wake up the event loop."""
+    if not future.done():
+        future.set_result(None)
+
+
+class _PageToucher:
+    """Touch memory pages ahead of the current position of play()/rec().
+
+    A helper thread touches one byte per page of *array* up to
+    *distance* frames ahead of the current position of *ctx* (to avoid
+    page faults in the audio callback) and calls ``array.flush()`` every
+    *flush_interval* seconds (if given).
+    If ``ctx.loop`` is true, touching continues at the beginning of
+    *array* when its end is reached.
+
+    The helper thread only reads, because the audio callback may write
+    to the pages concurrently.  With *write=True* (for recording
+    targets), the pages touched by `start()` (before the stream is
+    started) are also written to, by writing back the byte that was
+    read.  Otherwise, the first write after reading could still fault
+    (because of copy-on-write or dirty page tracking).
+
+    """
+
+    interval = 0.05  # Time between checks of the current position
+
+    def __init__(self, ctx, array, distance=None, flush_interval=None,
+                 write=False):
+        import threading
+        import numpy as np
+        if distance and not array.flags.c_contiguous:
+            raise ValueError('array must be C-contiguous for touching pages')
+        self.ctx = ctx
+        self.array = array
+        self.distance = distance or 0
+        if self.distance:
+            self.bytes = np.ndarray(array.nbytes, np.uint8, array)
+            self.framesize = array.strides[0] if array.ndim else 0
+        self.flush_interval = flush_interval
+        self.write = write
+        self.frame = 0  # Last seen value of ctx.frame
+        self.laps = 0  # Number of times ctx.frame has wrapped around
+        self.touched = 0  # Offset of the next byte (counting all laps)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        """Touch the first pages and start the helper thread."""
+        self.touch(self.write)
+        self.thread.start()
+
+    def touch(self, write=False):
+        """Touch pages up to *distance* frames ahead."""
+        import mmap
+        if not self.distance or not self.bytes.size:
+            return
+        size = len(self.bytes)
+        frame = self.ctx.frame
+        if frame < self.frame:
+            self.laps += 1
+        self.frame = frame
+        position = self.laps * size + frame * self.framesize
+        end = position + min(self.distance * self.framesize, size)
+        if not self.ctx.loop:
+            end = min(end, size)
+        self.touched = max(self.touched, position)
+        while self.touched < end:
+            offset = self.touched % size
+            stop = min(size, offset + end - self.touched)
+            pages = self.bytes[offset:stop:mmap.PAGESIZE]
+            if write:
+                pages[:] = pages.copy()
+            else:
+                pages.max()
+            self.touched += stop - offset
+
+    def run(self):
+        import time
+        flush = getattr(self.array, 'flush', None)
+        if not self.flush_interval:
+            flush = None
+        last_flush = time.monotonic()
+        while True:
+            finished = self.ctx.event.wait(self.interval)
+            if finished:
+                break
+            self.touch()
+            if flush and time.monotonic() - last_flush >= self.flush_interval:
+                flush()
+                last_flush = time.monotonic()
+        if flush:
+            flush()
+
+
 def _remove_self(d):
     """Return a copy of d without the 'self' entry."""
     d = d.copy()
@@ -2697,9 +5303,39 @@ def _check_mapping(mapping, channels):
     return mapping, channels
 
 
+def _mapping_to_slice(mapping):
+    """Return slice equivalent to a contiguous mapping, otherwise None."""
+    import numpy as np
+    start = int(mapping[0])
+    stop = start + len(mapping)
+    if np.array_equal(mapping, np.arange(start, stop)):
+        return slice(start, stop)
+    return None
+
+
+def _mapping_to_runs(mapping):
+    """Split mapping into runs of consecutive channels.
+
+    Returns a list of ``(target, source)`` pairs of slices, where
+    *target* selects channels given in *mapping* and *source* selects
+    the corresponding positions within *mapping*.
+
+    """
+    runs = []
+    begin = 0
+    for i in range(1, len(mapping) + 1):
+        if i == len(mapping) or mapping[i] != mapping[i - 1] + 1:
+            start = int(mapping[begin])
+            runs.append((slice(start, start + i - begin), slice(begin, i)))
+            begin = i
+    return runs
+
+
 def _check_dtype(dtype):
     """Check dtype."""
     import numpy as np
+    if isinstance(dtype, str) and dtype == 'int24':
+        return dtype  # Converted from/to 'int32', see _Int24Arrays
     dtype = np.dtype(dtype).name
     if dtype in _sampleformats:
         pass
@@ -2714,6 +5350,7 @@ def _get_stream_parameters(kind, device, channels, dtype, latency,
                            extra_settings, samplerate):
     """Get parameters for one direction (input or output) of a stream."""
     assert kind in ('input', 'output')
+    _ensure_initialized()
     if device is None:
         device = default.device
     device = _get_device_id(device, kind, raise_on_error=True)
@@ -2755,9 +5392,24 @@ def _get_stream_parameters(kind, device, channels, dtype, latency,
     return parameters, dtype, samplesize, samplerate
 
 
-def _wrap_callback(callback, *args):
-    """Invoke callback function and check for custom exceptions."""
-    args = args[:-1] + (CallbackFlags(args[-1]),)
+def _wrap_callback(callback, *args, flags=None, xruns=None):
+    """Invoke callback function and check for custom exceptions.
+
+    If a `CallbackFlags` object is given as *flags*, it is updated with
+    the status flags (i.e. the last item of *args*) and passed on to
+    *callback* instead of creating a new one.
+
+    If an `XrunLog` is given as *xruns*, non-zero status flags are
+    recorded there (with the *time* argument's ``currentTime``).
+
+    """
+    if args[-1] and xruns is not None:
+        xruns._record(args[-2].currentTime, args[-1])
+    if flags is None:
+        flags = CallbackFlags(args[-1])
+    else:
+        flags._flags = args[-1]
+    args = args[:-1] + (flags,)
     try:
         callback(*args)
     except CallbackStop:
@@ -2767,6 +5419,38 @@ def _wrap_callback(callback, *args):
     return _lib.paContinue
 
 
+if hasattr(_lib, 'sd_stream_callback'):
+
+    @_ffi.def_extern('sd_stream_callback', error=_lib.paAbort)
+    def _stream_callback(iptr, optr, frames, time, status, userdata):
+        """Invoke the callback that was passed to _StreamBase as handle."""
+        return _ffi.from_handle(userdata)(
+            iptr, optr, frames, time, status, userdata)
+
+
+def _stats_bucket(seconds):
+    """Return histogram bucket index for CallbackStats.
+
+    Values are counted in units of 0.1 microseconds, the first 16
+    buckets are linear, after that there are 8 buckets per octave.
+
+    """
+    n = int(seconds * 1e7)
+    if n < 16:
+        return n if n > 0 else 0
+    shift = n.bit_length() - 4
+    index = (shift << 3) + (n >> shift)
+    return index if index < 256 else 255  # See CallbackStats._buckets
+
+
+def _stats_bucket_limit(index):
+    """Return the upper limit (in seconds) of a CallbackStats bucket."""
+    if index < 16:
+        return (index + 1) / 1e7
+    shift = (index >> 3) - 1
+    return (((index & 7) | 8) + 1 << shift) / 1e7
+
+
 def _buffer(ptr, frames, channels, samplesize):
     """Create a buffer object from a pointer to some memory."""
     return _ffi.buffer(ptr, frames * channels * samplesize)
@@ -2780,6 +5464,403 @@ def _array(buffer, channels, dtype):
     return data
 
 
+class _ArrayCache:
+    """Re-use NumPy arrays created from PortAudio buffer pointers.
+
+    PortAudio often passes the same few buffers (with the same number of
+    frames) to the stream callback, therefore the NumPy arrays created
+    for them are cached, using the pointer and the number of frames as
+    key.
+
+    """
+
+    __slots__ = '_arrays', '_channels', '_samplesize', '_dtype'
+
+    # Arbitrary limit, in case the host API uses many different buffers:
+    maxsize = 16
+
+    def __init__(self, channels, samplesize, dtype):
+        self._arrays = {}
+        self._channels = channels
+        self._samplesize = samplesize
+        self._dtype = dtype
+
+    def __call__(self, ptr, frames):
+        key = ptr, frames
+        try:
+            return self._arrays[key]
+        except KeyError:
+            pass
+        if len(self._arrays) >= self.maxsize:
+            self._arrays.clear()
+        data = _array(_buffer(ptr, frames, self._channels, self._samplesize),
+                      self._channels, self._dtype)
+        self._arrays[key] = data
+        return data
+
+
+def _array_dtype(dtype):
+    """Return the NumPy dtype used for a given sample format."""
+    return 'int32' if dtype == 'int24' else dtype
+
+
+def _int24_unpack(buffer, out):
+    """Convert packed 24 bit samples from *buffer* into int32 array *out*.
+
+    *out* must be C-contiguous, the result is in the range from
+    -2**23 to 2**23 - 1.
+
+    """
+    import numpy as np
+    packed = np.frombuffer(buffer, dtype=np.uint8).reshape(-1, 3)
+    unpacked = out.reshape(-1).view(np.uint8).reshape(-1, 4)
+    # The 3 bytes are stored in the most significant bytes of each int32,
+    # the arithmetic right shift afterwards takes care of the sign:
+    if _sys.byteorder == 'little':
+        unpacked[:, 0] = 0
+        unpacked[:, 1:] = packed
+    else:
+        unpacked[:, :3] = packed
+        unpacked[:, 3] = 0
+    out >>= 8
+    return out
+
+
+def _int24_pack(data, buffer):
+    """Convert C-contiguous int32 array *data* into packed 24 bit samples.
+
+    Only the 24 least significant bits of each value are used.
+
+    """
+    import numpy as np
+    packed = np.frombuffer(buffer, dtype=np.uint8).reshape(-1, 3)
+    unpacked = data.reshape(-1).view(np.uint8).reshape(-1, 4)
+    if _sys.byteorder == 'little':
+        packed[:] = unpacked[:, :3]
+    else:
+        packed[:] = unpacked[:, 1:]
+
+
+class _Int24Arrays:
+    """Provide int32 arrays for packed 24 bit PortAudio buffers.
+
+    If *reuse* is true, the same array is returned as long as the number
+    of frames doesn't change.  If *unpack* is true, the contents of the
+    PortAudio buffer are converted into the array, otherwise the array
+    has to be converted back with `store()` (e.g. for output buffers).
+
+    """
+
+    __slots__ = '_channels', '_reuse', '_unpack', '_array'
+
+    def __init__(self, channels, reuse, unpack=True):
+        self._channels = channels
+        self._reuse = reuse
+        self._unpack = unpack
+        self._array = None
+
+    def __call__(self, ptr, frames):
+        array = self._array
+        if array is None or len(array) != frames or not self._reuse:
+            import numpy as np
+            self._array = array = np.empty((frames, self._channels),
+                                           dtype='int32')
+        if self._unpack:
+            _int24_unpack(_buffer(ptr, frames, self._channels, 3), array)
+        return array
+
+    def store(self, array, ptr):
+        _int24_pack(array, _buffer(ptr, len(array), self._channels, 3))
+
+
+class _PlanarArrays:
+    """Provide (channels, frames) arrays for non-interleaved buffers.
+
+    PortAudio provides an array of one buffer pointer per channel.
+    If the buffers are placed at equal distances in memory (which is
+    normally the case), an array viewing all of them is returned
+    (and cached by buffer addresses if *reuse* is true).
+    Otherwise, the data is copied into a separate array (if *unpack* is
+    true) and has to be copied back with `store()` (for output buffers).
+
+    """
+
+    __slots__ = ('_channels', '_samplesize', '_dtype', '_reuse', '_unpack',
+                 '_arrays')
+
+    # Arbitrary limit, in case the host API uses many different buffers:
+    maxsize = 16
+
+    def __init__(self, channels, samplesize, dtype, reuse, unpack=True):
+        self._channels = channels
+        self._samplesize = samplesize
+        self._dtype = dtype
+        self._reuse = reuse
+        self._unpack = unpack
+        self._arrays = {}
+
+    def _addresses(self, ptr):
+        return tuple(_ffi.unpack(_ffi.cast('uintptr_t*', ptr),
+                                 self._channels))
+
+    def __call__(self, ptr, frames):
+        addresses = self._addresses(ptr)
+        key = addresses, frames
+        array = self._arrays.get(key)
+        if array is None:
+            array = self._create(addresses, frames)
+            if self._reuse:
+                if len(self._arrays) >= self.maxsize:
+                    self._arrays.clear()
+                self._arrays[key] = array
+        if array.flags.owndata and self._unpack:
+            for row, address in zip(array, addresses):
+                row[:] = self._channel(address, frames)
+        return array
+
+    def _create(self, addresses, frames):
+        import numpy as np
+        size = frames * self._samplesize
+        stride = addresses[1] - addresses[0] if len(addresses) > 1 else size
+        if abs(stride) >= size and all(
+                b - a == stride for a, b in zip(addresses, addresses[1:])):
+            start = min(addresses[0], addresses[-1])
+            buffer = _ffi.buffer(_ffi.cast('char*', start),
+                                 abs(stride) * (len(addresses) - 1) + size)
+            return np.ndarray((len(addresses), frames), self._dtype, buffer,
+                              offset=addresses[0] - start,
+                              strides=(stride, self._samplesize))
+        return np.empty((len(addresses), frames), self._dtype)
+
+    def _channel(self, address, frames):
+        import numpy as np
+        return np.frombuffer(
+            _ffi.buffer(_ffi.cast('char*', address),
+                        frames * self._samplesize), dtype=self._dtype)
+
+    def store(self, array, ptr):
+        if not array.flags.owndata:
+            return  # The PortAudio buffers have been used directly
+        for row, address in zip(array, self._addresses(ptr)):
+            self._channel(address, array.shape[1])[:] = row
+
+
+def _planar_pointers(array, pointers=None):
+    """Return CFFI array of row pointers of a (channels, frames) array.
+
+    If given, the CFFI array *pointers* is filled and returned instead
+    of allocating a new one.  The addresses are stored as integers,
+    which avoids creating a CFFI pointer object per row.
+
+    """
+    if pointers is None:
+        pointers = _ffi.new('uintptr_t[]', len(array))
+    address = array.__array_interface__['data'][0]
+    stride = array.strides[0]
+    for i in range(len(array)):
+        pointers[i] = address + i * stride
+    return pointers
+
+
+def _array_getter(channels, samplesize, dtype, reuse, unpack=True,
+                  planar=False):
+    """Return function to get NumPy arrays for PortAudio buffer pointers."""
+    if planar:
+        return _PlanarArrays(channels, samplesize, dtype, reuse, unpack)
+    if dtype == 'int24':
+        return _Int24Arrays(channels, reuse, unpack)
+    if reuse:
+        return _ArrayCache(channels, samplesize, dtype)
+
+    def get_array(ptr, frames):
+        return _array(_buffer(ptr, frames, channels, samplesize),
+                      channels, dtype)
+
+    return get_array
+
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+_wav_dtypes = {
+    (_WAVE_FORMAT_PCM, 8): 'uint8',
+    (_WAVE_FORMAT_PCM, 16): 'int16',
+    (_WAVE_FORMAT_PCM, 24): 'int24',
+    (_WAVE_FORMAT_PCM, 32): 'int32',
+    (_WAVE_FORMAT_IEEE_FLOAT, 32): 'float32',
+}
+
+
+def _read_exactly(file, size):
+    data = file.read(size)
+    if len(data) != size:
+        raise ValueError('Unexpected end of WAV file')
+    return data
+
+
+def _read_wav_header(file):
+    """Read header of WAV/RF64 file, stop at the beginning of the data.
+
+    Returns samplerate, channels, dtype and the size of the data in
+    bytes (or None if unknown).
+
+    """
+    import struct
+    riff, _, wave = struct.unpack('<4sI4s', _read_exactly(file, 12))
+    if riff not in (b'RIFF', b'RF64') or wave != b'WAVE':
+        raise ValueError('Not a WAV file')
+    fmt = None
+    ds64_size = None
+    while True:
+        chunk_id, chunk_size = struct.unpack('<4sI', _read_exactly(file, 8))
+        if chunk_id == b'data':
+            break
+        chunk = _read_exactly(file, chunk_size + (chunk_size & 1))
+        if chunk_id == b'fmt ':
+            tag, channels, samplerate, _, _, bits = struct.unpack(
+                '<HHIIHH', chunk[:16])
+            if tag == _WAVE_FORMAT_EXTENSIBLE:
+                tag, = struct.unpack('<H', chunk[24:26])
+            fmt = tag, channels, samplerate, bits
+        elif chunk_id == b'ds64':
+            _, ds64_size = struct.unpack('<QQ', chunk[:16])
+    if fmt is None:
+        raise ValueError('No "fmt " chunk found in WAV file')
+    tag, channels, samplerate, bits = fmt
+    try:
+        dtype = _wav_dtypes[tag, bits]
+    except KeyError as e:
+        raise ValueError(
+            f'Unsupported WAV format ({bits} bits, format tag {tag})') from e
+    if riff == b'RF64' and chunk_size == 0xFFFFFFFF:
+        size = ds64_size
+    elif chunk_size in (0, 0xFFFFFFFF):
+        size = None  # e.g. the header of an unfinished file
+    else:
+        size = chunk_size
+    return samplerate, channels, dtype, size
+
+
+class _WavWriter:
+    """Write a WAV file, which is turned into RF64 if it gets too large."""
+
+    max_riff_size = 0xFFFFFFFF
+
+    def __init__(self, file, samplerate, channels, dtype):
+        import struct
+        for (tag, bits), name in _wav_dtypes.items():
+            if name == dtype:
+                break
+        else:
+            raise ValueError(f'Unsupported sample format for WAV: {dtype!r}')
+        self._file = file
+        self._framesize = channels * (bits // 8)
+        samplerate = int(samplerate)
+        fmt = struct.pack('<HHIIHH', tag, channels, samplerate,
+                          samplerate * self._framesize, self._framesize, bits)
+        if channels > 2 or bits > 16:
+            fmt = struct.pack(
+                '<HHIIHHHHI', _WAVE_FORMAT_EXTENSIBLE, channels, samplerate,
+                samplerate * self._framesize, self._framesize, bits, 22, bits,
+                0) + struct.pack('<IHH', tag, 0x0000, 0x0010)
+            fmt += b'\x80\x00\x00\xaa\x00\x38\x9b\x71'
+        try:
+            self._start = file.tell()
+        except (AttributeError, OSError):
+            self._start = None
+        # The "JUNK" chunk reserves space for a "ds64" chunk (for RF64).
+        # The sizes are unknown yet, they are updated in close():
+        file.write(b''.join([
+            b'RIFF', struct.pack('<I', 0xFFFFFFFF), b'WAVE',
+            b'JUNK', struct.pack('<I', 28), bytes(28),
+            b'fmt ', struct.pack('<I', len(fmt)), fmt,
+            b'data', struct.pack('<I', 0xFFFFFFFF),
+        ]))
+        self._data_start = 64 + len(fmt)
+        self.size = 0
+
+    def write(self, data):
+        self._file.write(data)
+        self.size += len(data)
+
+    def close(self):
+        """Update the header (if possible)."""
+        import struct
+        file = self._file
+        if self.size & 1:
+            file.write(b'\x00')  # Pad byte
+        try:
+            seekable = self._start is not None and file.seekable()
+        except AttributeError:
+            seekable = False
+        if not seekable:
+            file.flush()
+            return
+        end = file.tell()
+        riff_size = end - self._start - 8
+        if riff_size <= self.max_riff_size:
+            file.seek(self._start + 4)
+            file.write(struct.pack('<I', riff_size))
+            file.seek(self._start + self._data_start - 4)
+            file.write(struct.pack('<I', self.size))
+        else:
+            file.seek(self._start)
+            file.write(b'RF64')
+            file.seek(self._start + 12)
+            file.write(b'ds64' + struct.pack(
+                '<IQQQI', 28, riff_size, self.size,
+                self.size // self._framesize, 0))
+        file.seek(end)
+        file.flush()
+
+
+class _RawSource:
+    """Audio data from a binary file object, see Player."""
+
+    def __init__(self, file, size=None):
+        self._file = file
+        self._remaining = size
+
+    def readinto(self, buffer):
+        """Fill buffer, return number of bytes (less only at the end)."""
+        view = memoryview(buffer)
+        if self._remaining is not None:
+            view = view[:self._remaining]
+        total = 0
+        while total < len(view):
+            n = self._file.readinto(view[total:])
+            if not n:
+                break
+            total += n
+        if self._remaining is not None:
+            self._remaining -= total
+        return total
+
+
+class _IterSource:
+    """Audio data from an iterable of buffers, see Player."""
+
+    def __init__(self, iterable):
+        self._iterator = iter(iterable)
+        self._pending = memoryview(b'')
+
+    def readinto(self, buffer):
+        """Fill buffer, return number of bytes (less only at the end)."""
+        view = memoryview(buffer)
+        total = 0
+        while total < len(view):
+            if not self._pending:
+                try:
+                    self._pending = memoryview(next(self._iterator)).cast('B')
+                except StopIteration:
+                    break
+            n = min(len(self._pending), len(view) - total)
+            view[total:total + n] = self._pending[:n]
+            self._pending = self._pending[n:]
+            total += n
+        return total
+
+
 def _split(value):
     """Split input/output value into two values.
 
@@ -2833,6 +5914,171 @@ def _select_input_or_output(value_or_pair, kind):
     assert False
 
 
+def _get_device_info():
+    """Return (cached) information about all devices and host APIs.
+
+    This returns a pair of tuples containing one dictionary per device
+    and host API, respectively, see `query_devices()` and
+    `query_hostapis()`.  The dictionaries must not be modified.
+
+    """
+    global _device_info
+    info = _device_info
+    if info is None:
+        _ensure_initialized()
+        devices = tuple(
+            _query_device(i)
+            for i in range(_check(_lib.Pa_GetDeviceCount())))
+        hostapis = tuple(
+            _query_hostapi(i)
+            for i in range(_check(_lib.Pa_GetHostApiCount())))
+        _device_info = info = devices, hostapis
+    return info
+
+
+def _query_device(device):
+    """Get information about a device from PortAudio."""
+    info = _lib.Pa_GetDeviceInfo(device)
+    if not info:
+        raise PortAudioError(f'Error querying device {device}')
+    assert info.structVersion == 2
+    name_bytes = _ffi.string(info.name)
+    try:
+        # We don't know beforehand if DirectSound and MME device names use
+        # 'utf-8' or 'mbcs' encoding.  Let's try 'utf-8' first, because it more
+        # likely raises an exception on 'mbcs' data than vice versa, see also
+        # https://github.com/spatialaudio/python-sounddevice/issues/72.
+        name = name_bytes.decode('utf-8')
+    except UnicodeDecodeError:
+        api_idx = _lib.Pa_HostApiTypeIdToHostApiIndex
+        if info.hostApi in (api_idx(_lib.paDirectSound), api_idx(_lib.paMME)):
+            name = name_bytes.decode('mbcs')
+        elif info.hostApi == api_idx(_lib.paASIO):
+            # See https://github.com/spatialaudio/python-sounddevice/issues/490
+            import locale
+            name = name_bytes.decode(locale.getpreferredencoding())
+        else:
+            raise
+    return {
+        'name': name,
+        'index': device,
+        'hostapi': info.hostApi,
+        'max_input_channels': info.maxInputChannels,
+        'max_output_channels': info.maxOutputChannels,
+        'default_low_input_latency': info.defaultLowInputLatency,
+        'default_low_output_latency': info.defaultLowOutputLatency,
+        'default_high_input_latency': info.defaultHighInputLatency,
+        'default_high_output_latency': info.defaultHighOutputLatency,
+        'default_samplerate': info.defaultSampleRate,
+    }
+
+
+def _query_hostapi(index):
+    """Get information about a host API from PortAudio."""
+    info = _lib.Pa_GetHostApiInfo(index)
+    if not info:
+        raise PortAudioError(f'Error querying host API {index}')
+    assert info.structVersion == 1
+    return {
+        'name': _ffi.string(info.name).decode(),
+        'devices': [_lib.Pa_HostApiDeviceIndexToDeviceIndex(index, i)
+                    for i in range(info.deviceCount)],
+        'default_input_device': info.defaultInputDevice,
+        'default_output_device': info.defaultOutputDevice,
+    }
+
+
+class _DeviceNameIndex:
+    """Lookup tables for device query strings, see _get_device_id().
+
+    For each *kind*, this stores the lowercase device strings
+    (device name plus host API name), a dictionary for exact matches
+    and a dictionary mapping each 3-character substring (trigram) to
+    the devices containing it.  The latter is used to quickly find
+    candidate devices for the parts of a query string.
+    Results are memoized for each query string.
+
+    """
+
+    maxqueries = 256  # Arbitrary limit for memoized query strings
+
+    def __init__(self, devices, hostapis):
+        self.devices = devices
+        self._tables = {}
+        for kind in 'input', 'output', None:
+            entries = []
+            exact = {}
+            trigrams = {}
+            for info in devices:
+                if kind and info['max_' + kind + '_channels'] < 1:
+                    continue
+                position = len(entries)
+                full_string = (info['name'] + ', ' +
+                               hostapis[info['hostapi']]['name'])
+                lower = full_string.lower()
+                entries.append((info['index'], full_string, lower))
+                for key in {info['name'].lower(), lower}:
+                    exact.setdefault(key, []).append(info['index'])
+                for i in range(len(lower) - 2):
+                    trigrams.setdefault(lower[i:i + 3], set()).add(position)
+            self._tables[kind] = entries, exact, trigrams
+        self._queries = {}
+
+    def lookup(self, query_string, kind):
+        """Return matching (id, full_string) pairs and exact matches.
+
+        A device matches if its lowercase device string contains all
+        space-separated parts of *query_string* in the right order.
+
+        """
+        key = query_string, kind
+        try:
+            return self._queries[key]
+        except KeyError:
+            pass
+        entries, exact, trigrams = self._tables[kind]
+        query_string = query_string.lower()
+        substrings = query_string.split()
+        candidates = None
+        for substring in substrings:
+            for i in range(len(substring) - 2):
+                positions = trigrams.get(substring[i:i + 3], set())
+                if candidates is None:
+                    candidates = positions
+                else:
+                    candidates = candidates & positions
+        if candidates is None:
+            candidates = range(len(entries))
+        else:
+            candidates = sorted(candidates)
+        matches = []
+        for position in candidates:
+            id, full_string, lower = entries[position]
+            pos = 0
+            for substring in substrings:
+                pos = lower.find(substring, pos)
+                if pos < 0:
+                    break
+                pos += len(substring)
+            else:
+                matches.append((id, full_string))
+        result = matches, exact.get(query_string, [])
+        if len(self._queries) >= self.maxqueries:
+            self._queries.clear()
+        self._queries[key] = result
+        return result
+
+
+def _get_device_name_index():
+    """Return a _DeviceNameIndex for the current device information."""
+    global _device_name_index
+    devices, hostapis = _get_device_info()
+    index = _device_name_index
+    if index is None or index.devices is not devices:
+        _device_name_index = index = _DeviceNameIndex(devices, hostapis)
+    return index
+
+
 def _get_device_id(id_or_query_string, kind, raise_on_error=False):
     """Return device ID given space-separated substrings."""
     assert kind in ('input', 'output', None)
@@ -2854,28 +6100,8 @@ def _get_device_id(id_or_query_string, kind, raise_on_error=False):
 
     if isinstance(id_or_query_string, int):
         return id_or_query_string
-    device_list = []
-    for id, info in enumerate(query_devices()):
-        if not kind or info['max_' + kind + '_channels'] > 0:
-            hostapi_info = query_hostapis(info['hostapi'])
-            device_list.append((id, info['name'], hostapi_info['name']))
-
-    query_string = id_or_query_string.lower()
-    substrings = query_string.split()
-    matches = []
-    exact_device_matches = []
-    for id, device_string, hostapi_string in device_list:
-        full_string = device_string + ', ' + hostapi_string
-        pos = 0
-        for substring in substrings:
-            pos = full_string.lower().find(substring, pos)
-            if pos < 0:
-                break
-            pos += len(substring)
-        else:
-            matches.append((id, full_string))
-            if query_string in [device_string.lower(), full_string.lower()]:
-                exact_device_matches.append(id)
+    matches, exact_device_matches = _get_device_name_index().lookup(
+        id_or_query_string, kind)
 
     if kind is None:
         kind = 'input/output'  # Just used for error messages
@@ -2906,7 +6132,8 @@ def _initialize():
     (where supported).
 
     In most cases, this doesn't have to be called explicitly, because it
-    is automatically called with the ``import sounddevice`` statement.
+    is automatically called when PortAudio is used for the first time.
+    See also `initialize()`.
 
     """
     old_stderr = None
@@ -2919,23 +6146,33 @@ def _initialize():
         pass
     try:
         _check(_lib.Pa_Initialize(), 'Error initializing PortAudio')
-        global _initialized
+        global _initialized, _device_info
         _initialized += 1
+        _device_info = None
     finally:
         if old_stderr is not None:
             _os.dup2(old_stderr, 2)
             _os.close(old_stderr)
 
 
+def _ensure_initialized():
+    """Call _initialize(), unless PortAudio is already initialized."""
+    if not _initialized:
+        with _initialize_lock:
+            if not _initialized:
+                _initialize()
+
+
 def _terminate():
     """Terminate PortAudio.
 
     In most cases, this doesn't have to be called explicitly.
 
     """
-    global _initialized
+    global _initialized, _device_info
     _check(_lib.Pa_Terminate(), 'Error terminating PortAudio')
     _initialized -= 1
+    _device_info = None
 
 
 def _exit_handler():
@@ -2943,18 +6180,19 @@ def _exit_handler():
 
     # We cleanup any open streams here since older versions of portaudio don't
     # manage this (see github issue #1)
-    if _last_callback:
+    for ctx in list(_active_contexts):
         # NB: calling stop() first is required; without it portaudio hangs when
         # calling close()
-        _last_callback.stream.stop()
-        _last_callback.stream.close()
+        ctx.stream.stop()
+        ctx.stream.close()
 
     while _initialized:
         _terminate()
 
 
 _atexit.register(_exit_handler)
-_initialize()
+if 'SD_INITIALIZE_ON_IMPORT' in _os.environ:
+    _initialize()
 
 if __name__ == '__main__':
     print(query_devices())
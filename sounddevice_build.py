@@ -1,8 +1,9 @@
+import os
+import platform
+
 from cffi import FFI
 
-ffibuilder = FFI()
-ffibuilder.set_source('_sounddevice', None)
-ffibuilder.cdef("""
+PORTAUDIO_CDEF = """
 int Pa_GetVersion( void );
 const char* Pa_GetVersionText( void );
 typedef int PaError;
@@ -201,7 +202,9 @@ signed long Pa_GetStreamWriteAvailable( PaStream* stream );
 PaHostApiTypeId Pa_GetStreamHostApiType( PaStream* stream );
 PaError Pa_GetSampleSize( PaSampleFormat format );
 void Pa_Sleep( long msec );
+"""
 
+MAC_CORE_CDEF = """
 /* pa_mac_core.h */
 
 typedef int32_t SInt32;
@@ -228,7 +231,9 @@ const char *PaMacCore_GetChannelName( int device, int channelIndex, bool input )
 #define paMacCorePro                         0x01
 #define paMacCoreMinimizeCPUButPlayNice      0x0100
 #define paMacCoreMinimizeCPU                 0x0101
+"""
 
+WINDOWS_CDEF = """
 /* pa_win_waveformat.h */
 
 typedef unsigned long PaWinWaveFormatChannelMask;
@@ -313,6 +318,36 @@ typedef struct PaWasapiStreamInfo
 PaError PaWasapi_UpdateDeviceList();
 
 int PaWasapi_IsLoopback( PaDeviceIndex device );
+"""
+
+ffibuilder = FFI()
+ffibuilder.set_source('_sounddevice', None)
+ffibuilder.cdef(PORTAUDIO_CDEF + MAC_CORE_CDEF + WINDOWS_CDEF)
+
+# Optional "API mode" module, which is linked to PortAudio at build time.
+# This avoids the libffi overhead of calling PortAudio functions and of the
+# stream callback, but it needs a C compiler and the PortAudio headers.
+# sounddevice.py falls back to the "ABI mode" module above if this module
+# is not available.
+ffibuilder_api = FFI()
+api_source = '#include <portaudio.h>\n'
+api_cdef = PORTAUDIO_CDEF
+system = os.environ.get('PYTHON_SOUNDDEVICE_PLATFORM', platform.system())
+if system == 'Darwin':
+    api_source += '#include <pa_mac_core.h>\n'
+    api_cdef += MAC_CORE_CDEF
+elif system == 'Windows':
+    api_source += '#include <pa_asio.h>\n#include <pa_win_wasapi.h>\n'
+    api_cdef += WINDOWS_CDEF
+ffibuilder_api.set_source('_sounddevice_api', api_source,
+                          libraries=['portaudio'])
+ffibuilder_api.cdef(api_cdef + """
+extern "Python" int sd_stream_callback(
+    const void *input, void *output,
+    unsigned long frameCount,
+    const PaStreamCallbackTimeInfo* timeInfo,
+    PaStreamCallbackFlags statusFlags,
+    void *userData );
 """)
 
 if __name__ == '__main__':
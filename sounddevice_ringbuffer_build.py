@@ -0,0 +1,235 @@
+from cffi import FFI
+
+ffibuilder = FFI()
+ffibuilder.set_source('_sounddevice_ringbuffer', r"""
+#include <string.h>
+
+#if defined(_MSC_VER)
+#include <windows.h>
+static size_t load_acquire(size_t *p)
+{
+    size_t value = *(volatile size_t *)p;
+    MemoryBarrier();
+    return value;
+}
+static void store_release(size_t *p, size_t value)
+{
+    MemoryBarrier();
+    *(volatile size_t *)p = value;
+}
+static void add_ulong(unsigned long *p, unsigned long value)
+{
+    InterlockedExchangeAdd((volatile LONG *)p, (LONG)value);
+}
+static void or_ulong(unsigned long *p, unsigned long value)
+{
+    InterlockedOr((volatile LONG *)p, (LONG)value);
+}
+static unsigned long load_ulong(unsigned long *p)
+{
+    return (unsigned long)InterlockedCompareExchange((volatile LONG *)p,
+                                                     0, 0);
+}
+static unsigned long take_ulong(unsigned long *p)
+{
+    return (unsigned long)InterlockedExchange((volatile LONG *)p, 0);
+}
+#else
+static size_t load_acquire(size_t *p)
+{
+    return __atomic_load_n(p, __ATOMIC_ACQUIRE);
+}
+static void store_release(size_t *p, size_t value)
+{
+    __atomic_store_n(p, value, __ATOMIC_RELEASE);
+}
+static void add_ulong(unsigned long *p, unsigned long value)
+{
+    __atomic_fetch_add(p, value, __ATOMIC_RELAXED);
+}
+static void or_ulong(unsigned long *p, unsigned long value)
+{
+    __atomic_fetch_or(p, value, __ATOMIC_RELAXED);
+}
+static unsigned long load_ulong(unsigned long *p)
+{
+    return __atomic_load_n(p, __ATOMIC_RELAXED);
+}
+static unsigned long take_ulong(unsigned long *p)
+{
+    return __atomic_exchange_n(p, 0, __ATOMIC_RELAXED);
+}
+#endif
+
+typedef struct
+{
+    size_t element_size;
+    size_t element_count;  /* must be a power of 2 */
+    size_t write_index;  /* only changed by the writer */
+    size_t read_index;  /* only changed by the reader */
+    char *data;
+} sd_ringbuffer;
+
+/* Returns 0 if element_count is not a power of 2 */
+size_t sd_ringbuffer_init(sd_ringbuffer *rb, size_t element_size,
+                          size_t element_count, void *data)
+{
+    if (element_count == 0 || (element_count & (element_count - 1)))
+    {
+        return 0;
+    }
+    rb->element_size = element_size;
+    rb->element_count = element_count;
+    rb->write_index = 0;
+    rb->read_index = 0;
+    rb->data = (char *)data;
+    return element_count;
+}
+
+size_t sd_ringbuffer_read_available(sd_ringbuffer *rb)
+{
+    return load_acquire(&rb->write_index) - load_acquire(&rb->read_index);
+}
+
+size_t sd_ringbuffer_write_available(sd_ringbuffer *rb)
+{
+    return rb->element_count - sd_ringbuffer_read_available(rb);
+}
+
+/* The indices are only wrapped when accessing the data, this way "full"
+   and "empty" can be distinguished without wasting an element. */
+static void copy_wrapped(sd_ringbuffer *rb, size_t index, char *dst,
+                         const char *src, size_t elements, int to_ring)
+{
+    size_t offset = index & (rb->element_count - 1);
+    size_t first = rb->element_count - offset;
+    size_t size = rb->element_size;
+    if (first > elements)
+    {
+        first = elements;
+    }
+    if (to_ring)
+    {
+        memcpy(rb->data + offset * size, src, first * size);
+        memcpy(rb->data, src + first * size, (elements - first) * size);
+    }
+    else
+    {
+        memcpy(dst, rb->data + offset * size, first * size);
+        memcpy(dst + first * size, rb->data, (elements - first) * size);
+    }
+}
+
+size_t sd_ringbuffer_write(sd_ringbuffer *rb, const void *data,
+                           size_t elements)
+{
+    size_t write_index = rb->write_index;
+    size_t available = rb->element_count
+        - (write_index - load_acquire(&rb->read_index));
+    if (elements > available)
+    {
+        elements = available;
+    }
+    copy_wrapped(rb, write_index, NULL, (const char *)data, elements, 1);
+    store_release(&rb->write_index, write_index + elements);
+    return elements;
+}
+
+size_t sd_ringbuffer_read(sd_ringbuffer *rb, void *data, size_t elements)
+{
+    size_t read_index = rb->read_index;
+    size_t available = load_acquire(&rb->write_index) - read_index;
+    if (elements > available)
+    {
+        elements = available;
+    }
+    copy_wrapped(rb, read_index, (char *)data, NULL, elements, 0);
+    store_release(&rb->read_index, read_index + elements);
+    return elements;
+}
+
+typedef struct
+{
+    sd_ringbuffer *input;
+    sd_ringbuffer *output;
+    unsigned long input_overflows;  /* number of dropped input frames */
+    unsigned long output_underflows;  /* number of missing output frames */
+    unsigned long status;  /* accumulated PaStreamCallbackFlags */
+    unsigned long pending;  /* flags not yet taken by sd_ringbuffer_take() */
+} sd_ringbuffer_state;
+
+/* The counters are updated atomically by the callback, this is for
+   reading them from another thread. */
+unsigned long sd_ringbuffer_load(unsigned long *counter)
+{
+    return load_ulong(counter);
+}
+
+/* Atomically read and reset a value */
+unsigned long sd_ringbuffer_take(unsigned long *value)
+{
+    return take_ulong(value);
+}
+
+/* Compatible with PaStreamCallback, doesn't need the Python interpreter */
+int sd_ringbuffer_callback(const void *input, void *output,
+                           unsigned long frames, const void *time_info,
+                           unsigned long status, void *userdata)
+{
+    sd_ringbuffer_state *state = (sd_ringbuffer_state *)userdata;
+    size_t done;
+    (void)time_info;
+    if (status)
+    {
+        or_ulong(&state->status, status);
+        or_ulong(&state->pending, status);
+    }
+    if (state->input)
+    {
+        done = sd_ringbuffer_write(state->input, input, frames);
+        add_ulong(&state->input_overflows, frames - done);
+    }
+    if (state->output)
+    {
+        size_t size = state->output->element_size;
+        done = sd_ringbuffer_read(state->output, output, frames);
+        memset((char *)output + done * size, 0, (frames - done) * size);
+        add_ulong(&state->output_underflows, frames - done);
+    }
+    return 0;  /* paContinue */
+}
+""")
+ffibuilder.cdef("""
+typedef struct
+{
+    size_t element_size;
+    size_t element_count;
+    size_t write_index;
+    size_t read_index;
+    char *data;
+} sd_ringbuffer;
+size_t sd_ringbuffer_init(sd_ringbuffer *rb, size_t element_size,
+                          size_t element_count, void *data);
+size_t sd_ringbuffer_read_available(sd_ringbuffer *rb);
+size_t sd_ringbuffer_write_available(sd_ringbuffer *rb);
+size_t sd_ringbuffer_write(sd_ringbuffer *rb, const void *data,
+                           size_t elements);
+size_t sd_ringbuffer_read(sd_ringbuffer *rb, void *data, size_t elements);
+typedef struct
+{
+    sd_ringbuffer *input;
+    sd_ringbuffer *output;
+    unsigned long input_overflows;
+    unsigned long output_underflows;
+    unsigned long status;
+    unsigned long pending;
+} sd_ringbuffer_state;
+unsigned long sd_ringbuffer_load(unsigned long *counter);
+unsigned long sd_ringbuffer_take(unsigned long *value);
+int sd_ringbuffer_callback(const void *input, void *output,
+                           unsigned long frames, const void *time_info,
+                           unsigned long status, void *userdata);
+""")
+
+if __name__ == '__main__':
+    ffibuilder.compile(verbose=True)
@@ -0,0 +1,727 @@
+"""Software-only replacement for the PortAudio library.
+
+This module provides a virtual backend for the `sounddevice` module,
+which doesn't need any audio hardware (nor the PortAudio library).
+It is meant for testing and benchmarking, e.g. on headless CI machines.
+
+The backend is used if the environment variable ``SD_VIRTUAL_BACKEND``
+is set *before* importing the `sounddevice` module::
+
+    import os
+
+    os.environ['SD_VIRTUAL_BACKEND'] = '1'
+
+    import sounddevice as sd
+    import sounddevice_virtual
+
+    sounddevice_virtual.library.speed = 0  # Run as fast as possible
+    myrecording = sd.playrec(myarray, 44100, channels=2, blocking=True)
+
+There are two virtual devices (belonging to the virtual host API),
+each with up to 256 input and output channels (this number can be
+changed with the environment variable ``SD_VIRTUAL_MAX_CHANNELS``):
+
+``'Virtual Loopback'``
+    Everything played back on this device can be recorded from it
+    (with the same number of channels and the same sample format,
+    otherwise silence is recorded).
+``'Virtual Null'``
+    Recording returns silence, played back data is discarded.
+
+Callback streams are driven by a separate thread.  The speed of the
+virtual clock can be changed with `VirtualLibrary.speed`, xruns can be
+injected with `VirtualLibrary.inject_xrun()`.  If a stream callback
+takes too long to keep up with the virtual clock, this is reported as
+an xrun, too (unless the speed is 0).
+
+"""
+import os as _os
+import threading as _threading
+import time as _time
+
+library = None
+
+
+def load(ffi):
+    """Return the `VirtualLibrary`, create it on first use.
+
+    This is called by the `sounddevice` module.  The returned object is
+    also available as ``sounddevice_virtual.library``.
+
+    """
+    global library
+    if library is None:
+        library = VirtualLibrary(ffi)
+    return library
+
+
+_ERROR_TEXTS = {
+    'paNoError': 'Success',
+    'paNotInitialized': 'PortAudio not initialized',
+    'paInvalidChannelCount': 'Invalid number of channels',
+    'paInvalidSampleRate': 'Invalid sample rate',
+    'paInvalidDevice': 'Invalid device',
+    'paSampleFormatNotSupported': 'Sample format not supported',
+    'paBadStreamPtr': 'Invalid stream pointer',
+    'paInputOverflowed': 'Input overflowed',
+    'paOutputUnderflowed': 'Output underflowed',
+    'paHostApiNotFound': 'Host API not found',
+    'paInvalidHostApi': 'Invalid host API',
+    'paStreamIsStopped': 'Stream is stopped',
+    'paStreamIsNotStopped': 'Stream is not stopped',
+    'paCanNotReadFromACallbackStream': "Can't read from a callback stream",
+    'paCanNotWriteToACallbackStream': "Can't write to a callback stream",
+    'paCanNotReadFromAnOutputOnlyStream':
+        "Can't read from an output only stream",
+    'paCanNotWriteToAnInputOnlyStream': "Can't write to an input only stream",
+}
+
+
+class VirtualLibrary:
+    """Drop-in replacement for the PortAudio library object.
+
+    All functions (and constants) of the PortAudio API that are used by
+    the `sounddevice` module are available as attributes.
+
+    """
+
+    speed = 1.0
+    """Speed of the virtual clock.
+
+    ``1.0`` means real time, larger values are faster than real time.
+    ``0`` means that callbacks are invoked as fast as possible and
+    blocking reads and writes never wait.  This also scales the time
+    waited by `sounddevice.sleep()`.
+
+    """
+
+    default_blocksize = 256
+    """Block size used if a stream's *blocksize* is 0."""
+
+    default_samplerate = 48000.0
+    default_low_latency = 0.005
+    default_high_latency = 0.04
+
+    max_channels = 256
+    """Maximum number of input and output channels of each device.
+
+    This can be set with the environment variable
+    ``SD_VIRTUAL_MAX_CHANNELS`` before importing `sounddevice`.
+
+    """
+
+    def __init__(self, ffi):
+        if 'SD_VIRTUAL_MAX_CHANNELS' in _os.environ:
+            self.max_channels = int(_os.environ['SD_VIRTUAL_MAX_CHANNELS'])
+        self._ffi = ffi
+        self._initialized = 0
+        self._lock = _threading.Lock()
+        self._streams = {}
+        self._next_stream_id = 1
+        self._devices = [
+            _Device('Virtual Loopback', self.max_channels, loopback=True),
+            _Device('Virtual Null', self.max_channels, loopback=False),
+        ]
+        self._device_infos = []
+        self._keepalive = []
+        for device in self._devices:
+            name = ffi.new('char[]', device.name.encode())
+            self._keepalive.append(name)
+            self._device_infos.append(ffi.new('PaDeviceInfo*', dict(
+                structVersion=2,
+                name=name,
+                hostApi=0,
+                maxInputChannels=device.channels,
+                maxOutputChannels=device.channels,
+                defaultLowInputLatency=self.default_low_latency,
+                defaultLowOutputLatency=self.default_low_latency,
+                defaultHighInputLatency=self.default_high_latency,
+                defaultHighOutputLatency=self.default_high_latency,
+                defaultSampleRate=self.default_samplerate,
+            )))
+        name = ffi.new('char[]', b'Virtual')
+        self._keepalive.append(name)
+        self._hostapi_info = ffi.new('PaHostApiInfo*', dict(
+            structVersion=1,
+            type=self.paInDevelopment,
+            name=name,
+            deviceCount=len(self._devices),
+            defaultInputDevice=0,
+            defaultOutputDevice=0,
+        ))
+        self._host_error_info = ffi.new('PaHostErrorInfo*', dict(
+            hostApiType=self.paInDevelopment, errorCode=0,
+            errorText=ffi.NULL))
+        self._error_texts = {}
+        self._version_text = ffi.new('char[]', b'sounddevice virtual backend')
+
+    def __getattr__(self, name):
+        # Constants (enums and #defines) are taken from the CFFI definitions
+        if name.startswith('pa'):
+            try:
+                return self._ffi.integer_const(name)
+            except self._ffi.error:
+                pass
+        raise AttributeError(
+            f'{name!r} is not supported by the virtual backend')
+
+    def inject_xrun(self, input_underflow=False, input_overflow=False,
+                    output_underflow=False, output_overflow=False):
+        """Report an xrun in all currently open streams.
+
+        The given flags are reported (once) to the next invocation of
+        each stream callback, see `sounddevice.CallbackFlags`.
+        For blocking streams, the next call to
+        `sounddevice.Stream.read()` reports an input overflow and the
+        next call to `sounddevice.Stream.write()` reports an output
+        underflow.
+
+        """
+        status = 0
+        if input_underflow:
+            status |= self.paInputUnderflow
+        if input_overflow:
+            status |= self.paInputOverflow
+        if output_underflow:
+            status |= self.paOutputUnderflow
+        if output_overflow:
+            status |= self.paOutputOverflow
+        with self._lock:
+            for stream in self._streams.values():
+                stream.pending_status |= status
+
+    # Initialization and version information
+
+    def Pa_Initialize(self):
+        self._initialized += 1
+        return self.paNoError
+
+    def Pa_Terminate(self):
+        if self._initialized:
+            self._initialized -= 1
+            if not self._initialized:
+                for stream in list(self._streams.values()):
+                    self._close(stream)
+        return self.paNoError
+
+    def Pa_GetVersion(self):
+        return 0
+
+    def Pa_GetVersionText(self):
+        return self._version_text
+
+    def Pa_GetErrorText(self, err):
+        text = self._error_texts.get(err)
+        if text is None:
+            for name, message in _ERROR_TEXTS.items():
+                if self._ffi.integer_const(name) == err:
+                    break
+            else:
+                message = 'Invalid error code'
+            text = self._error_texts[err] = self._ffi.new(
+                'char[]', message.encode())
+        return text
+
+    def Pa_GetLastHostErrorInfo(self):
+        return self._host_error_info
+
+    def Pa_Sleep(self, msec):
+        _time.sleep(msec / 1000 / self.speed if self.speed else 0)
+
+    # Host APIs and devices
+
+    def Pa_GetHostApiCount(self):
+        return 1
+
+    def Pa_GetDefaultHostApi(self):
+        return 0
+
+    def Pa_GetHostApiInfo(self, index):
+        if index != 0:
+            return self._ffi.NULL
+        return self._hostapi_info
+
+    def Pa_HostApiTypeIdToHostApiIndex(self, type_id):
+        if type_id == self.paInDevelopment:
+            return 0
+        return self.paHostApiNotFound
+
+    def Pa_HostApiDeviceIndexToDeviceIndex(self, hostapi, index):
+        if hostapi != 0:
+            return self.paInvalidHostApi
+        if not 0 <= index < len(self._devices):
+            return self.paInvalidDevice
+        return index
+
+    def Pa_GetDeviceCount(self):
+        if not self._initialized:
+            return self.paNotInitialized
+        return len(self._devices)
+
+    def Pa_GetDefaultInputDevice(self):
+        return 0
+
+    def Pa_GetDefaultOutputDevice(self):
+        return 0
+
+    def Pa_GetDeviceInfo(self, device):
+        if not 0 <= device < len(self._devices):
+            return self._ffi.NULL
+        return self._device_infos[device]
+
+    def Pa_GetSampleSize(self, sampleformat):
+        return {
+            self.paFloat32: 4,
+            self.paInt32: 4,
+            self.paInt24: 3,
+            self.paInt16: 2,
+            self.paInt8: 1,
+            self.paUInt8: 1,
+        }.get(sampleformat & ~self.paNonInterleaved,
+              self.paSampleFormatNotSupported)
+
+    def Pa_IsFormatSupported(self, iparameters, oparameters, samplerate):
+        for parameters in iparameters, oparameters:
+            if parameters:
+                err = self._check_parameters(parameters)
+                if err < 0:
+                    return err
+        if samplerate <= 0:
+            return self.paInvalidSampleRate
+        return self.paFormatIsSupported
+
+    # Streams
+
+    def Pa_OpenStream(self, stream_ptr, iparameters, oparameters, samplerate,
+                      blocksize, stream_flags, callback, userdata):
+        if not iparameters and not oparameters:
+            return self.paInvalidDevice
+        for parameters in iparameters, oparameters:
+            if parameters:
+                err = self._check_parameters(parameters)
+                if err < 0:
+                    return err
+        if samplerate <= 0:
+            return self.paInvalidSampleRate
+        if not blocksize:
+            blocksize = self.default_blocksize
+        stream = _Stream(self, iparameters, oparameters, samplerate,
+                         blocksize, callback, userdata)
+        with self._lock:
+            stream.id = self._next_stream_id
+            self._next_stream_id += 1
+            self._streams[stream.id] = stream
+        stream_ptr[0] = self._ffi.cast('PaStream*', stream.id)
+        return self.paNoError
+
+    def Pa_CloseStream(self, ptr):
+        stream = self._get_stream(ptr)
+        if stream is None:
+            return self.paBadStreamPtr
+        self._close(stream)
+        return self.paNoError
+
+    def Pa_SetStreamFinishedCallback(self, ptr, finished_callback):
+        stream = self._get_stream(ptr)
+        if stream is None:
+            return self.paBadStreamPtr
+        if not stream.stopped:
+            return self.paStreamIsNotStopped
+        stream.finished_callback = finished_callback
+        return self.paNoError
+
+    def Pa_StartStream(self, ptr):
+        stream = self._get_stream(ptr)
+        if stream is None:
+            return self.paBadStreamPtr
+        if not stream.stopped:
+            return self.paStreamIsNotStopped
+        stream.start()
+        return self.paNoError
+
+    def Pa_StopStream(self, ptr):
+        stream = self._get_stream(ptr)
+        if stream is None:
+            return self.paBadStreamPtr
+        if stream.stopped:
+            return self.paStreamIsStopped
+        stream.stop()
+        return self.paNoError
+
+    Pa_AbortStream = Pa_StopStream
+
+    def Pa_IsStreamStopped(self, ptr):
+        stream = self._get_stream(ptr)
+        if stream is None:
+            return self.paBadStreamPtr
+        return int(stream.stopped)
+
+    def Pa_IsStreamActive(self, ptr):
+        stream = self._get_stream(ptr)
+        if stream is None:
+            return self.paBadStreamPtr
+        return int(stream.active)
+
+    def Pa_GetStreamInfo(self, ptr):
+        stream = self._get_stream(ptr)
+        if stream is None:
+            return self._ffi.NULL
+        return stream.info
+
+    def Pa_GetStreamTime(self, ptr):
+        stream = self._get_stream(ptr)
+        if stream is None:
+            return 0
+        return stream.position / stream.samplerate
+
+    def Pa_GetStreamCpuLoad(self, ptr):
+        stream = self._get_stream(ptr)
+        if stream is None:
+            return 0
+        return stream.cpu_load
+
+    def Pa_ReadStream(self, ptr, buffer, frames):
+        stream = self._get_stream(ptr)
+        if stream is None:
+            return self.paBadStreamPtr
+        if stream.callback:
+            return self.paCanNotReadFromACallbackStream
+        if stream.input is None:
+            return self.paCanNotReadFromAnOutputOnlyStream
+        if stream.stopped:
+            return self.paStreamIsStopped
+        return stream.read(buffer, frames)
+
+    def Pa_WriteStream(self, ptr, buffer, frames):
+        stream = self._get_stream(ptr)
+        if stream is None:
+            return self.paBadStreamPtr
+        if stream.callback:
+            return self.paCanNotWriteToACallbackStream
+        if stream.output is None:
+            return self.paCanNotWriteToAnInputOnlyStream
+        if stream.stopped:
+            return self.paStreamIsStopped
+        return stream.write(buffer, frames)
+
+    def Pa_GetStreamReadAvailable(self, ptr):
+        stream = self._get_stream(ptr)
+        if stream is None:
+            return self.paBadStreamPtr
+        if stream.callback:
+            return self.paCanNotReadFromACallbackStream
+        if stream.input is None:
+            return self.paCanNotReadFromAnOutputOnlyStream
+        return stream.read_available()
+
+    def Pa_GetStreamWriteAvailable(self, ptr):
+        stream = self._get_stream(ptr)
+        if stream is None:
+            return self.paBadStreamPtr
+        if stream.callback:
+            return self.paCanNotWriteToACallbackStream
+        if stream.output is None:
+            return self.paCanNotWriteToAnInputOnlyStream
+        return stream.write_available()
+
+    # Helper methods
+
+    def _check_parameters(self, parameters):
+        if not 0 <= parameters.device < len(self._devices):
+            return self.paInvalidDevice
+        device = self._devices[parameters.device]
+        if not 0 < parameters.channelCount <= device.channels:
+            return self.paInvalidChannelCount
+        return self.Pa_GetSampleSize(parameters.sampleFormat)
+
+    def _get_stream(self, ptr):
+        return self._streams.get(int(self._ffi.cast('uintptr_t', ptr)))
+
+    def _close(self, stream):
+        if not stream.stopped:
+            stream.stop()
+        with self._lock:
+            del self._streams[stream.id]
+
+
+class _Device:
+    """Virtual device, optionally connecting outputs to inputs."""
+
+    maxduration = 1  # Limit for loopback data in seconds
+
+    def __init__(self, name, channels, loopback):
+        self.name = name
+        self.channels = channels
+        self.loopback = loopback
+        self.lock = _threading.Lock()
+        self.data = bytearray()
+        self.format = None
+
+    def push(self, data, fmt, samplerate):
+        """Store interleaved output data for recording."""
+        if not self.loopback:
+            return
+        with self.lock:
+            if fmt != self.format:
+                self.data.clear()
+                self.format = fmt
+            self.data += data
+            maxsize = int(self.maxduration * samplerate) * fmt[2]
+            if len(self.data) > maxsize:
+                del self.data[:len(self.data) - maxsize]
+
+    def pull(self, size, fmt):
+        """Get interleaved data for recording, padded with zeros."""
+        with self.lock:
+            if fmt == self.format:
+                data = self.data[:size]
+                del self.data[:size]
+            else:
+                data = bytearray()
+        data += bytes(size - len(data))
+        return data
+
+
+class _Direction:
+    """Parameters of the input or output part of a stream."""
+
+    def __init__(self, lib, parameters, frames):
+        ffi = lib._ffi
+        self.device = lib._devices[parameters.device]
+        self.channels = parameters.channelCount
+        self.interleaved = not parameters.sampleFormat & lib.paNonInterleaved
+        sampleformat = parameters.sampleFormat & ~lib.paNonInterleaved
+        self.samplesize = lib.Pa_GetSampleSize(sampleformat)
+        self.framesize = self.channels * self.samplesize
+        self.format = self.channels, sampleformat, self.framesize
+        self.latency = parameters.suggestedLatency
+        if self.interleaved:
+            self.buffer = ffi.new('char[]', frames * self.framesize)
+            self.ptr = self.buffer
+        else:
+            self.buffer = [ffi.new('char[]', frames * self.samplesize)
+                           for _ in range(self.channels)]
+            self.ptr = ffi.new('void*[]', self.buffer)
+
+    def _buffers(self, ffi, ptr):
+        """Return own buffer(s) or buffer(s) given to read()/write()."""
+        if ptr is None:
+            return self.buffer
+        if self.interleaved:
+            return ffi.cast('char*', ptr)
+        return [ffi.cast('char*', p)
+                for p in ffi.cast('void**', ptr)[0:self.channels]]
+
+    def load(self, ffi, data, frames, ptr=None):
+        """Copy interleaved data into the (possibly planar) buffer."""
+        buffers = self._buffers(ffi, ptr)
+        if self.interleaved:
+            ffi.memmove(buffers, data, len(data))
+            return
+        size = self.samplesize
+        data = memoryview(data).cast('B')
+        for channel, buffer in enumerate(buffers):
+            planar = bytearray(frames * size)
+            for i in range(size):
+                planar[i::size] = data[channel * size + i::self.framesize]
+            ffi.buffer(buffer, frames * size)[:] = planar
+
+    def store(self, ffi, frames, ptr=None):
+        """Return interleaved data from the (possibly planar) buffer."""
+        buffers = self._buffers(ffi, ptr)
+        if self.interleaved:
+            return ffi.buffer(buffers, frames * self.framesize)[:]
+        size = self.samplesize
+        data = bytearray(frames * self.framesize)
+        for channel, buffer in enumerate(buffers):
+            planar = ffi.buffer(buffer, frames * size)[:]
+            for i in range(size):
+                data[channel * size + i::self.framesize] = planar[i::size]
+        return data
+
+
+class _Stream:
+    """Virtual stream, callbacks are invoked from a separate thread."""
+
+    def __init__(self, lib, iparameters, oparameters, samplerate, blocksize,
+                 callback, userdata):
+        ffi = lib._ffi
+        self.lib = lib
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.callback = callback
+        self.userdata = userdata
+        self.finished_callback = ffi.NULL
+        self.input = self.output = None
+        if iparameters:
+            self.input = _Direction(lib, iparameters, blocksize)
+        if oparameters:
+            self.output = _Direction(lib, oparameters, blocksize)
+        self.info = ffi.new('PaStreamInfo*', dict(
+            structVersion=1,
+            inputLatency=max(self.input.latency, blocksize / samplerate)
+            if self.input else 0,
+            outputLatency=max(self.output.latency, blocksize / samplerate)
+            if self.output else 0,
+            sampleRate=samplerate,
+        ))
+        self.time_info = ffi.new('PaStreamCallbackTimeInfo*')
+        # Blocking streams can hold this many frames before an xrun occurs:
+        self.capacity = max(
+            blocksize, int(max(self.info.inputLatency,
+                               self.info.outputLatency) * samplerate))
+        self.stopped = True
+        self.active = False
+        self.pending_status = 0
+        self.position = 0  # Frames processed since opening the stream
+        self.cpu_load = 0.0
+        self.thread = None
+        self.stopping = _threading.Event()
+
+    def start(self):
+        self.stopped = False
+        self.active = True
+        self.stopping.clear()
+        self.started = _time.monotonic()
+        self.start_position = self.position
+        self.frames_read = self.frames_written = 0
+        if self.callback:
+            self.thread = _threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        if self.thread:
+            if self.thread is not _threading.current_thread():
+                self.thread.join()
+            self.thread = None
+        else:
+            self.finish()
+        self.stopped = True
+
+    def finish(self):
+        self.active = False
+        if self.finished_callback:
+            self.finished_callback(self.userdata)
+
+    def take_status(self, mask=~0):
+        with self.lib._lock:
+            status = self.pending_status & mask
+            self.pending_status &= ~mask
+        return status
+
+    def run(self):
+        lib = self.lib
+        ffi = lib._ffi
+        frames = self.blocksize
+        period = frames / self.samplerate
+        tolerance = self.capacity / self.samplerate
+        iptr = self.input.ptr if self.input else ffi.NULL
+        optr = self.output.ptr if self.output else ffi.NULL
+        if self.input:
+            isize = frames * self.input.framesize
+        xruns = 0
+        if self.input:
+            xruns |= lib.paInputOverflow
+        if self.output:
+            xruns |= lib.paOutputUnderflow
+        status = 0
+        deadline = _time.monotonic()
+        while not self.stopping.is_set():
+            speed = lib.speed
+            begin = _time.monotonic()
+            if speed and begin - deadline > tolerance / speed:
+                # The previous callback took too long
+                status |= xruns
+                deadline = begin
+            if self.input:
+                self.input.load(ffi, self.input.device.pull(
+                    isize, self.input.format), frames)
+            now = self.position / self.samplerate
+            self.time_info.currentTime = now
+            self.time_info.inputBufferAdcTime = now - self.info.inputLatency
+            self.time_info.outputBufferDacTime = now + self.info.outputLatency
+            status |= self.take_status()
+            result = self.callback(iptr, optr, frames, self.time_info,
+                                   status, self.userdata)
+            status = 0
+            if result == lib.paAbort:
+                break
+            if self.output:
+                self.output.device.push(self.output.store(ffi, frames),
+                                        self.output.format, self.samplerate)
+            self.position += frames
+            if speed:
+                self.cpu_load = (_time.monotonic() - begin) * speed / period
+            if result != lib.paContinue:
+                break
+            if speed:
+                deadline += period / speed
+                self.stopping.wait(max(0, deadline - _time.monotonic()))
+        self.finish()
+
+    def clock(self):
+        """Return number of frames processed by the virtual device."""
+        if not self.lib.speed:
+            return None
+        return int((_time.monotonic() - self.started) * self.lib.speed *
+                   self.samplerate)
+
+    def read_available(self):
+        clock = self.clock()
+        if clock is None:
+            return self.capacity
+        return min(max(clock - self.frames_read, 0), self.capacity)
+
+    def write_available(self):
+        clock = self.clock()
+        if clock is None:
+            return self.capacity
+        return min(max(self.capacity - (self.frames_written - clock), 0),
+                   self.capacity)
+
+    def wait_for(self, frames):
+        delay = frames / (self.lib.speed * self.samplerate)
+        if delay > 0:
+            _time.sleep(delay)
+
+    def read(self, buffer, frames):
+        lib = self.lib
+        result = lib.paNoError
+        if self.take_status(lib.paInputOverflow):
+            result = lib.paInputOverflowed
+        clock = self.clock()
+        if clock is not None:
+            if clock - self.frames_read > self.capacity:
+                # Data was lost, because read() wasn't called in time
+                result = lib.paInputOverflowed
+                self.frames_read = clock - self.capacity
+            self.wait_for(self.frames_read + frames - clock)
+        data = self.input.device.pull(frames * self.input.framesize,
+                                      self.input.format)
+        self.input.load(lib._ffi, data, frames, buffer)
+        self.frames_read += frames
+        if self.output is None:
+            self.position = self.start_position + self.frames_read
+        return result
+
+    def write(self, buffer, frames):
+        lib = self.lib
+        result = lib.paNoError
+        if self.take_status(lib.paOutputUnderflow):
+            result = lib.paOutputUnderflowed
+        clock = self.clock()
+        if clock is not None:
+            if clock > self.frames_written:
+                if clock > self.frames_written + self.blocksize:
+                    # The virtual device ran out of data
+                    result = lib.paOutputUnderflowed
+                self.started += ((clock - self.frames_written) /
+                                 (lib.speed * self.samplerate))
+                clock = self.frames_written
+            self.wait_for(self.frames_written + frames - self.capacity - clock)
+        data = self.output.store(lib._ffi, frames, buffer)
+        self.output.device.push(data, self.output.format, self.samplerate)
+        self.frames_written += frames
+        self.position = self.start_position + self.frames_written
+        return result
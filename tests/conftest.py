@@ -0,0 +1,29 @@
+"""Shared fixtures, all tests use the virtual backend.
+
+See sounddevice_virtual.py.  The virtual devices are run unthrottled
+(i.e. as fast as possible), unless a test changes the speed.
+
+"""
+import os
+
+os.environ['SD_VIRTUAL_BACKEND'] = '1'
+
+import pytest  # noqa: E402
+import sounddevice as sd  # noqa: E402
+import sounddevice_virtual  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def library():
+    """Provide the virtual library, reset settings after each test."""
+    library = sounddevice_virtual.library
+    library.speed = 0
+    for device in library._devices:
+        # Discard loopback data left over by previous tests:
+        with device.lock:
+            device.data.clear()
+    yield library
+    sd.stop()
+    library.speed = type(library).speed
+    sd.default.reset()
+    assert not library._streams, 'streams were left open'
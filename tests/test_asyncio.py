@@ -0,0 +1,223 @@
+"""Asynchronous streams, used with asyncio.run()."""
+import asyncio
+
+import numpy as np
+import pytest
+
+import sounddevice as sd
+
+
+def test_write_read(library):
+    library.speed = 20
+    data = np.random.default_rng(1).uniform(0.1, 1, (4800, 2)).astype(
+        'float32')
+
+    async def main():
+        async with sd.AsyncStream(channels=2, blocksize=128,
+                                  chunksize=1024) as stream:
+            writer = asyncio.ensure_future(stream.write(data))
+            chunks = []
+            for _ in range(8):
+                chunk, _ = await stream.read()
+                chunks.append(chunk)
+            await writer
+            await stream.drain()
+        return np.concatenate(chunks)
+
+    recorded = asyncio.run(main())
+    assert recorded.shape == (8 * 1024, 2)
+    start = np.flatnonzero(recorded[:, 0])[0]
+    np.testing.assert_array_equal(recorded[start:start + len(data)], data)
+
+
+def test_read_sizes(library):
+    library.speed = 20
+
+    async def main():
+        async with sd.AsyncInputStream(channels=1, buffersize=4096,
+                                       chunksize=300) as stream:
+            assert stream.buffersize == 4096
+            assert stream.chunksize == 300
+            first, _ = await stream.read()
+            second, _ = await stream.read(1000)
+            with pytest.raises(ValueError):
+                await stream.read(4097)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first.shape == (300, 1)
+    assert second.shape == (1000, 1)
+
+
+def test_write_before_start():
+    async def main():
+        stream = sd.AsyncOutputStream(channels=1, buffersize=2000,
+                                      chunksize=500)
+        try:
+            # Data can be written before starting, up to buffersize:
+            await stream.write(np.zeros(1500, 'float32'))
+            with pytest.raises(RuntimeError):
+                # This would wait forever:
+                await stream.write(np.zeros(1000, 'float32'))
+            async with stream:
+                await stream.write(np.zeros(5000, 'float32'))
+                await stream.drain()
+        finally:
+            stream.close()
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize('chunksize', [0, 2000])
+def test_invalid_chunksize_closes_stream(library, chunksize):
+    with pytest.raises(ValueError):
+        sd.AsyncInputStream(channels=1, buffersize=1000, chunksize=chunksize)
+    assert not library._streams
+
+
+def test_input_overflows(library):
+    library.speed = 20
+
+    async def main():
+        async with sd.AsyncInputStream(channels=1, buffersize=1000,
+                                       chunksize=500) as stream:
+            await asyncio.sleep(0.05)  # 2.5 times the buffersize
+            _, overflowed = await stream.read(100)
+            assert overflowed
+            assert stream.input_overflows > 0
+
+    asyncio.run(main())
+
+
+def test_blocks(library):
+    library.speed = 20
+
+    async def main():
+        blocks = []
+        async with sd.AsyncInputStream(channels=1, chunksize=256) as stream:
+            async for indata, status in stream.blocks(poolsize=2):
+                blocks.append(indata)
+                if len(blocks) == 3:
+                    break
+        return blocks
+
+    blocks = asyncio.run(main())
+    assert blocks[0].shape == (256, 1)
+    # The pre-allocated arrays are re-used:
+    assert blocks[0] is blocks[2]
+    assert blocks[0] is not blocks[1]
+
+
+def test_exchange(library):
+    library.speed = 20
+
+    async def main():
+        received = []
+        async with sd.AsyncStream(channels=1, blocksize=128,
+                                  chunksize=256) as stream:
+            async for indata, outdata, status in stream.exchange(poolsize=3):
+                received.append(indata.copy())
+                outdata.fill(len(received))
+                if len(received) == 20:
+                    break
+        return np.concatenate(received)[:, 0]
+
+    received = asyncio.run(main())
+    # Blocks of silence may be recorded in between (e.g. the prefill):
+    values = received[received != 0]
+    assert values[0] == 1
+    assert np.all(np.diff(values) >= 0)
+    assert set(values) >= {1, 2, 3, 4, 5}
+
+
+def test_blocks_end_when_stopped(library):
+    library.speed = 20
+
+    async def main():
+        count = 0
+        async with sd.AsyncInputStream(channels=1, chunksize=256) as stream:
+            async for indata, status in stream.blocks():
+                count += 1
+                if count == 3:
+                    stream.stop()
+            # Not started:
+            async for indata, status in stream.blocks():
+                assert False
+        return count
+
+    # Blocks which were recorded before stop() are still yielded:
+    assert asyncio.run(asyncio.wait_for(main(), 5)) >= 3
+
+
+def test_exchange_ends_when_stopped(library):
+    library.speed = 20
+
+    async def main():
+        count = 0
+        async with sd.AsyncStream(channels=1, blocksize=128,
+                                  chunksize=256) as stream:
+            async def stop():
+                await asyncio.sleep(0.05)
+                stream.stop()
+
+            stopper = asyncio.ensure_future(stop())
+            async for indata, outdata, status in stream.exchange():
+                outdata.fill(0)
+                count += 1
+            await stopper
+        return count
+
+    assert asyncio.run(asyncio.wait_for(main(), 5)) > 0
+
+def test_read_from_inactive_stream():
+    async def main():
+        stream = sd.AsyncInputStream(channels=1, chunksize=100)
+        try:
+            with pytest.raises(RuntimeError):
+                await asyncio.wait_for(stream.read(), 5)
+        finally:
+            stream.close()
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(stream.read(), 5)
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize('method', ['stop', 'abort', 'close'])
+def test_stop_while_waiting(library, method):
+    library.speed = 1
+
+    async def main():
+        async with sd.AsyncStream(channels=1, buffersize=48000,
+                                  chunksize=48000) as stream:
+            reader = asyncio.ensure_future(stream.read())
+            await asyncio.sleep(0.05)
+            assert not reader.done()
+            getattr(stream, method)()
+            with pytest.raises(RuntimeError):
+                await asyncio.wait_for(reader, 5)
+
+    asyncio.run(main())
+
+
+def test_write_and_drain_after_stop(library):
+    library.speed = 1
+
+    async def main():
+        stream = sd.AsyncOutputStream(channels=1, buffersize=1000,
+                                      chunksize=500)
+        try:
+            await stream.write(np.zeros(500, 'float32'))
+            with pytest.raises(RuntimeError):
+                await asyncio.wait_for(stream.drain(), 5)
+            stream.start()
+            writer = asyncio.ensure_future(
+                stream.write(np.zeros(48000, 'float32')))
+            await asyncio.sleep(0.05)
+            stream.stop()
+            with pytest.raises(RuntimeError):
+                await asyncio.wait_for(writer, 5)
+        finally:
+            stream.close()
+
+    asyncio.run(main())
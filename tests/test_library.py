@@ -0,0 +1,165 @@
+"""Loading and initializing PortAudio, device information."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+import sounddevice as sd
+
+
+def run_python(code, **environ):
+    """Run *code* in a fresh interpreter, return its output."""
+    env = dict(os.environ)
+    for name, value in environ.items():
+        if value is None:
+            env.pop(name, None)
+        else:
+            env[name] = value
+    result = subprocess.run(
+        [sys.executable, '-c', code], env=env, check=True,
+        capture_output=True, text=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return result.stdout.split()
+
+
+def test_get_portaudio_library():
+    import sounddevice_virtual
+    assert sd.get_portaudio_library() == (
+        sounddevice_virtual.__file__, 'virtual')
+
+def test_lazy_initialization():
+    code = '\n'.join([
+        'import sounddevice as sd',
+        'print(sd._initialized)',
+        'sd.query_devices()',
+        'print(sd._initialized)',
+        'sd.initialize()',
+        'print(sd._initialized)',
+    ])
+    assert run_python(code, SD_INITIALIZE_ON_IMPORT=None) == ['0', '1', '1']
+
+
+@pytest.mark.parametrize('code', [
+    'sd.initialize()',
+    'sd.query_hostapis()',
+    'sd.default.hostapi',
+    'sd.default.device["output"]',
+])
+def test_initialized_on_first_use(code):
+    code = f'import sounddevice as sd\n{code}\nprint(sd._initialized)'
+    assert run_python(code, SD_INITIALIZE_ON_IMPORT=None) == ['1']
+
+
+def test_initialize_on_import():
+    code = 'import sounddevice as sd\nprint(sd._initialized)'
+    assert run_python(code, SD_INITIALIZE_ON_IMPORT='1') == ['1']
+
+
+@pytest.fixture
+def count_queries(monkeypatch):
+    """Count how often device information is obtained from PortAudio."""
+    calls = []
+    query_device = sd._query_device
+
+    def counting_query_device(device):
+        calls.append(device)
+        return query_device(device)
+
+    monkeypatch.setattr(sd, '_query_device', counting_query_device)
+    sd.refresh_devices()
+    yield calls
+    sd.refresh_devices()
+
+
+def test_device_info_is_cached(count_queries):
+    devices = sd.query_devices()
+    assert len(count_queries) == len(devices)
+    assert sd.query_devices() == devices
+    for device in devices:
+        assert sd.query_devices(device['index']) == device
+    sd.query_hostapis()
+    assert len(count_queries) == len(devices)
+    sd.refresh_devices()
+    assert sd.query_devices() == devices
+    assert len(count_queries) == 2 * len(devices)
+
+
+def test_cached_info_is_copied():
+    if not sd.query_devices():
+        pytest.skip('no devices')
+    device = sd.query_devices(0)
+    name = device['name']
+    device['name'] = 'modified'
+    assert sd.query_devices(0)['name'] == name
+    sd.query_devices()[0]['name'] = 'modified'
+    assert sd.query_devices(0)['name'] == name
+    hostapi = sd.query_hostapis(0)
+    devices = list(hostapi['devices'])
+    hostapi['devices'].append(12345)
+    assert sd.query_hostapis(0)['devices'] == devices
+
+
+def test_invalid_index():
+    with pytest.raises(sd.PortAudioError):
+        sd.query_devices(len(sd.query_devices()))
+    with pytest.raises(sd.PortAudioError):
+        sd.query_hostapis(len(sd.query_hostapis()))
+
+
+def fake_device(index, name, hostapi, inputs, outputs):
+    return {'name': name, 'index': index, 'hostapi': hostapi,
+            'max_input_channels': inputs, 'max_output_channels': outputs}
+
+
+@pytest.fixture
+def fake_devices(monkeypatch):
+    """Replace the device information by a fixed list of devices."""
+    devices = (
+        fake_device(0, 'Built-in Microphone', 0, 2, 0),
+        fake_device(1, 'Built-in Output', 0, 0, 2),
+        fake_device(2, 'USB Audio Device', 1, 2, 2),
+        fake_device(3, 'USB Audio Device', 0, 2, 2),
+        fake_device(4, 'pulse', 1, 32, 32),
+    )
+    hostapis = ({'name': 'Core Audio'}, {'name': 'ALSA'})
+    monkeypatch.setattr(sd, '_get_device_info', lambda: (devices, hostapis))
+    monkeypatch.setattr(sd, '_device_name_index', None)
+
+
+@pytest.mark.parametrize('query, kind, expected', [
+    ('built-in', 'input', 0),
+    ('built-in', 'output', 1),
+    ('MICROPHONE', None, 0),
+    ('usb alsa', 'input', 2),
+    ('usb core', 'output', 3),
+    ('USB Audio Device, ALSA', None, 2),
+    ('pulse', 'input', 4),
+    ('mi', 'input', 0),  # Shorter than a trigram
+    (3, 'input', 3),
+])
+def test_get_device_id(fake_devices, query, kind, expected):
+    assert sd._get_device_id(query, kind, raise_on_error=True) == expected
+    # Once more, using the memoized result:
+    assert sd._get_device_id(query, kind, raise_on_error=True) == expected
+
+
+@pytest.mark.parametrize('query, kind', [
+    ('usb', 'input'),  # Multiple matches
+    ('usb audio device', 'output'),  # Multiple exact matches
+    ('alsa usb', 'input'),  # Wrong order
+    ('microphone', 'output'),
+    ('nothing', None),
+])
+def test_get_device_id_errors(fake_devices, query, kind):
+    with pytest.raises(ValueError):
+        sd._get_device_id(query, kind, raise_on_error=True)
+    assert sd._get_device_id(query, kind) == -1
+
+
+def test_device_name_index_is_rebuilt(fake_devices, monkeypatch):
+    assert sd._get_device_id('pulse', 'input') == 4
+    devices = (fake_device(0, 'pulse', 0, 2, 2),)
+    hostapis = ({'name': 'ALSA'},)
+    monkeypatch.setattr(sd, '_get_device_info', lambda: (devices, hostapis))
+    assert sd._get_device_id('pulse', 'input') == 0
@@ -0,0 +1,186 @@
+"""Player and Recorder (which don't use NumPy)."""
+import io
+import struct
+import time
+import wave
+
+import pytest
+
+import sounddevice as sd
+
+
+def write_wav(path, frames, channels=2, samplerate=48000):
+    # The data doesn't contain zero bytes, see test_player_to_recorder()
+    data = bytes(range(1, 256)) * (frames * channels * 2 // 255 + 1)
+    data = data[:frames * channels * 2]
+    with wave.open(str(path), 'wb') as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(samplerate)
+        w.writeframes(data)
+    return data
+
+
+def test_player_wav(tmp_path):
+    path = tmp_path / 'input.wav'
+    write_wav(path, 10000, samplerate=44100)
+    with sd.Player(path, blocksize=512) as player:
+        assert player.stream.channels == 2
+        assert player.stream.dtype == 'int16'
+        assert player.stream.samplerate == 44100
+        player.wait()
+    assert player.underruns == 0
+    assert not player.active
+    assert not player.status
+
+
+def test_player_wav_format_mismatch(library, tmp_path):
+    path = tmp_path / 'input.wav'
+    write_wav(path, 1000, samplerate=44100)
+    with pytest.raises(ValueError):
+        sd.Player(path, samplerate=48000)
+    with pytest.raises(ValueError):
+        sd.Player(path, channels=1)
+    assert not library._streams
+    # Matching values are fine:
+    sd.Player(path, samplerate=44100, channels=2).stop()
+
+
+def test_player_stop_without_start(tmp_path):
+    path = tmp_path / 'input.wav'
+    write_wav(path, 1000)
+    player = sd.Player(path)
+    assert not player._file.closed
+    file = player._file
+    player.stop()
+    assert file.closed
+
+def test_player_file_object(tmp_path):
+    path = tmp_path / 'input.wav'
+    write_wav(path, 1000)
+    with open(path, 'rb') as f:
+        with sd.Player(f, blocksize=256) as player:
+            player.wait()
+        assert not f.closed
+
+
+def test_player_raw_file(tmp_path):
+    path = tmp_path / 'input.raw'
+    path.write_bytes(bytes(3000 * 4))
+    with sd.Player(path, samplerate=48000, channels=1, dtype='float32',
+                   blocksize=256) as player:
+        player.wait()
+
+
+def test_player_generator():
+    blocks = [b'\x01\x00' * 300, b'\x02\x00' * 100, b'\x03\x00' * 1000]
+    with sd.Player(iter(blocks), channels=1, dtype='int16',
+                   blocksize=256) as player:
+        player.wait()
+    assert player.underruns == 0
+
+
+def test_player_stop(library):
+    library.speed = 1
+    blocks = (bytes(512) for _ in range(10000))
+    with sd.Player(blocks, channels=1, dtype='int16', blocksize=256,
+                   buffersize=4) as player:
+        assert player.active
+    assert not player.active
+    assert player.stream.closed
+
+
+def test_player_errors(tmp_path):
+    with pytest.raises(TypeError):
+        sd.Player(iter([]), dtype='int16')
+    with pytest.raises(ValueError):
+        sd.Player(iter([]), channels=1, dtype='int16', blocksize=0)
+    with pytest.raises(ValueError):
+        sd.Player(iter([]), channels=1, dtype='int16', buffersize=4,
+                  prefill=5)
+    path = tmp_path / 'input.wav'
+    path.write_bytes(b'not a WAV file')
+    with pytest.raises(ValueError):
+        sd.Player(path)
+
+
+def test_recorder(library, tmp_path):
+    path = tmp_path / 'output.wav'
+    library.speed = 20
+    with sd.Recorder(path, channels=2, dtype='int16',
+                     blocksize=256) as recorder:
+        time.sleep(0.05)
+    assert recorder.frames > 0
+    assert recorder.dropped == 0
+    assert recorder.lag == 0
+    with wave.open(str(path), 'rb') as w:
+        assert w.getnchannels() == 2
+        assert w.getsampwidth() == 2
+        assert w.getframerate() == 48000
+        assert w.getnframes() == recorder.frames
+
+
+def test_player_to_recorder(library, tmp_path):
+    # Both use the loopback device, but they are not synchronized:
+    source = tmp_path / 'input.wav'
+    data = write_wav(source, 256 * 40)
+    target = tmp_path / 'output.wav'
+    library.speed = 20
+    with sd.Recorder(target, channels=2, dtype='int16', blocksize=256):
+        with sd.Player(source, blocksize=256) as player:
+            player.wait()
+        time.sleep(0.01)
+    with wave.open(str(target), 'rb') as w:
+        recorded = w.readframes(w.getnframes())
+    # Silence is recorded when no new data is available yet
+    assert data in recorded.replace(b'\0', b'')
+
+
+def test_recorder_rf64(library, tmp_path, monkeypatch):
+    monkeypatch.setattr(sd._WavWriter, 'max_riff_size', 1000)
+    path = tmp_path / 'output.wav'
+    library.speed = 20
+    with sd.Recorder(path, channels=1, dtype='float32',
+                     blocksize=256) as recorder:
+        time.sleep(0.02)
+    header = path.read_bytes()[:48]
+    assert header[:4] == b'RF64'
+    assert header[12:16] == b'ds64'
+    riff_size, data_size, frames = struct.unpack('<QQQ', header[20:44])
+    assert riff_size == path.stat().st_size - 8
+    assert frames == recorder.frames
+    assert data_size == 4 * frames
+    # The file can be played back:
+    with sd.Player(path) as player:
+        assert player.stream.dtype == 'float32'
+        player.wait()
+
+
+class UnseekableFile(io.BytesIO):
+
+    def seekable(self):
+        return False
+
+
+def test_recorder_unseekable(library):
+    file = UnseekableFile()
+    library.speed = 20
+    with sd.Recorder(file, channels=1, dtype='int16', blocksize=256):
+        time.sleep(0.02)
+    header = file.getvalue()[:80]
+    # The sizes are left undefined:
+    assert header[4:8] == b'\xff\xff\xff\xff'
+    assert header[72:80] == b'data\xff\xff\xff\xff'
+
+
+def test_recorder_errors(tmp_path):
+    with pytest.raises(ValueError):
+        sd.Recorder(io.BytesIO(), channels=1, blocksize=0)
+    with pytest.raises(ValueError):
+        sd.Recorder(io.BytesIO(), channels=1, buffersize=4, writesize=5)
+
+
+def test_recorder_closes_stream_on_error(library, tmp_path):
+    with pytest.raises(OSError):
+        sd.Recorder(tmp_path / 'missing' / 'out.wav', channels=1)
+    assert not library._streams
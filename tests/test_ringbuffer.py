@@ -0,0 +1,102 @@
+"""Ring buffer streams, these need the compiled C callback."""
+import time
+
+import numpy as np
+import pytest
+
+import sounddevice as sd
+
+pytest.importorskip('_sounddevice_ringbuffer')
+
+
+def poll(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timeout'
+        time.sleep(0.001)
+
+
+def test_buffersize():
+    with sd.RingBufferOutputStream(channels=1, dtype='int16',
+                                   buffersize=1000) as stream:
+        assert stream.buffersize == 1024
+    with sd.RingBufferOutputStream(channels=1, dtype='int16',
+                                   samplerate=48000) as stream:
+        assert stream.buffersize == 65536
+
+
+def test_write_before_start():
+    stream = sd.RingBufferOutputStream(channels=2, dtype='int16',
+                                       buffersize=1024)
+    try:
+        assert stream.write_available == 1024
+        assert stream.write(bytes(4 * 1000)) == 1000
+        assert stream.write_available == 24
+        # Only part of the data fits:
+        assert stream.write(bytes(4 * 100)) == 24
+        assert stream.write_available == 0
+        with pytest.raises(ValueError):
+            stream.write(bytes(3))
+        stream.start()
+        poll(lambda: stream.write_available > 0)
+        poll(lambda: stream.output_underflows > 0)
+    finally:
+        stream.close()
+
+
+def test_read():
+    with sd.RingBufferInputStream(channels=2, dtype='int16',
+                                  buffersize=4096) as stream:
+        poll(lambda: stream.read_available >= 100)
+        data = stream.read(100)
+        assert len(data) == 100 * 4
+        buffer = bytearray(4 * 100)
+        poll(lambda: stream.read_available >= 100)
+        assert stream.readinto(buffer) == 100
+        with pytest.raises(ValueError):
+            stream.readinto(bytearray(3))
+        assert not stream.read(0)
+
+
+def test_loopback(library):
+    library.speed = 20
+    data = np.arange(1, 1025, dtype='int16')
+    received = np.zeros(48000, 'int16')
+    frames = 0
+    with sd.RingBufferStream(channels=1, dtype='int16', blocksize=256,
+                             buffersize=4096) as stream:
+        assert stream.write(data) == len(data)
+        deadline = time.monotonic() + 5
+        while np.count_nonzero(received) < len(data):
+            assert time.monotonic() < deadline
+            frames += stream.readinto(received[frames:frames + 1024])
+            time.sleep(0.001)
+    start = np.flatnonzero(received)[0]
+    np.testing.assert_array_equal(received[start:start + len(data)], data)
+
+
+def test_counters(library):
+    with sd.RingBufferInputStream(channels=1, dtype='int16', blocksize=256,
+                                  buffersize=1024) as stream:
+        # Nothing is read, the ring buffer is full after 4 blocks:
+        poll(lambda: stream.input_overflows >= 256)
+        assert stream.input_overflows % 256 == 0
+        assert stream.read_available == 1024
+        assert not stream.status
+        library.inject_xrun(input_overflow=True)
+        poll(lambda: stream.status.input_overflow)
+        assert not stream.status.output_underflow
+
+
+def test_xruns(library):
+    with sd.RingBufferStream(channels=1, dtype='int16',
+                             buffersize=1024) as stream:
+        library.inject_xrun(output_underflow=True)
+        poll(lambda: stream.status.output_underflow)
+        # The flags are recorded once, when they are noticed:
+        assert stream.xruns.output_underflows == 1
+        stream.read(stream.read_available)
+        assert stream.xruns.count == 1
+        # The ring buffer's own underflows are not recorded:
+        poll(lambda: stream.output_underflows > 0)
+        assert stream.xruns.count == 1
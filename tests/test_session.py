@@ -0,0 +1,328 @@
+"""play(), rec() and playrec(), module-level and with Session."""
+import time
+
+import numpy as np
+import pytest
+
+import sounddevice as sd
+
+
+def test_rec():
+    recorded = sd.rec(1000, samplerate=48000, channels=2, blocking=True)
+    assert recorded.shape == (1000, 2)
+    assert recorded.dtype == 'float32'
+    assert not sd.get_status()
+    assert not sd._active_contexts
+
+
+def test_playrec():
+    data = np.random.default_rng(0).uniform(-1, 1, (4800, 2)).astype(
+        'float32')
+    recorded = sd.playrec(data, 48000, channels=2, blocksize=256,
+                          blocking=True)
+    assert recorded.shape == data.shape
+    # The loopback device has a latency of one block:
+    np.testing.assert_array_equal(recorded[256:], data[:-256])
+    assert not sd.get_status()
+
+
+def test_play_then_rec():
+    data = np.random.default_rng(0).uniform(-1, 1, (4800, 2)).astype(
+        'float32')
+    sd.play(data, 48000, blocksize=256, blocking=True)
+    recorded = sd.rec(len(data), 48000, channels=2, blocksize=256,
+                      blocking=True)
+    np.testing.assert_array_equal(recorded, data)
+
+
+def test_rec_into_out():
+    out = np.full((1000, 1), np.nan, 'float32')
+    result = sd.rec(out=out, samplerate=48000, blocking=True)
+    assert result is out
+    assert not np.isnan(out).any()
+
+
+def test_rec_into_file(tmp_path):
+    data = np.random.default_rng(0).uniform(-1, 1, (4800, 2)).astype(
+        'float32')
+    sd.play(data, 48000, blocksize=256, blocking=True)
+    path = tmp_path / 'recording.npy'
+    recorded = sd.rec(len(data), 48000, channels=2, out=str(path),
+                      blocksize=256, blocking=True, prefault=1024)
+    assert isinstance(recorded, np.memmap)
+    del recorded
+    np.testing.assert_array_equal(np.load(path), data)
+
+
+def test_prefault_and_flush(tmp_path):
+    data = np.random.default_rng(0).uniform(-1, 1, (48000, 1)).astype(
+        'float32')
+    path = tmp_path / 'recording.npy'
+    out = np.lib.format.open_memmap(
+        path, mode='w+', dtype='float32', shape=data.shape)
+    recorded = sd.playrec(data, 48000, out=out, blocksize=256, blocking=True,
+                          prefault=4096, flush_interval=0.001)
+    assert recorded is out
+    np.testing.assert_array_equal(np.load(path)[256:], data[:-256])
+
+
+def test_prefault_start_failure(library, monkeypatch, tmp_path):
+    monkeypatch.setattr(library, 'Pa_StartStream',
+                        lambda stream: library.paInvalidDevice)
+    out = np.lib.format.open_memmap(
+        tmp_path / 'recording.npy', mode='w+', dtype='float32',
+        shape=(48000, 1))
+    with pytest.raises(sd.PortAudioError):
+        sd.rec(out=out, samplerate=48000, prefault=4096,
+               flush_interval=0.001)
+    ctx = sd._default_session._ctx
+    assert ctx.page_touchers
+    for toucher in ctx.page_touchers:
+        toucher.thread.join(timeout=5)
+        assert not toucher.thread.is_alive()
+
+
+def test_prefault_keeps_contents(library):
+    library.speed = 1
+    # The first byte of each page is not zero:
+    out = np.full((48000, 1), 0.1, 'float32')
+    session = sd.Session()
+    session.rec(out=out, samplerate=48000, blocksize=256, prefault=48000)
+    session.stop()
+    # Silence was recorded, the rest of out must be unchanged:
+    recorded = np.argmax(out[:, 0] != 0)
+    assert np.all(out[recorded:] == np.float32(0.1))
+
+
+def test_flush_non_contiguous_out(tmp_path):
+    out = np.lib.format.open_memmap(
+        tmp_path / 'recording.npy', mode='w+', dtype='float32',
+        shape=(4800, 4))[:, ::2]
+    sd.rec(out=out, samplerate=48000, blocking=True, flush_interval=0.001)
+
+def test_prefault_needs_contiguous_out():
+    out = np.zeros((1000, 4), 'float32')[:, ::2]
+    with pytest.raises(ValueError):
+        sd.rec(out=out, prefault=100)
+
+
+def test_play_memmap_with_prefetch(tmp_path):
+    data = np.random.default_rng(0).uniform(-1, 1, (48000, 2)).astype(
+        'float32')
+    path = tmp_path / 'data.npy'
+    np.save(path, data)
+    source = np.load(path, mmap_mode='r')
+    recorded = sd.playrec(source, 48000, channels=2, blocksize=256,
+                          blocking=True, prefetch=10000)
+    np.testing.assert_array_equal(recorded[256:], data[:-256])
+    session = sd.Session()
+    session.play(source[:1000], 48000, loop=True, prefetch=10000)
+    time.sleep(0.05)
+    assert session.active
+    session.stop()
+    assert not session.status
+
+
+def test_convert():
+    data = np.random.default_rng(0).uniform(-1, 1, (4800, 2))
+    recorded = sd.playrec(data, 48000, channels=2, dtype='float64',
+                          blocksize=256, convert=True, blocking=True)
+    assert recorded.dtype == 'float64'
+    np.testing.assert_array_equal(recorded[256:],
+                                  data[:-256].astype('float32'))
+    assert sd.get_conversion_time() > 0
+
+
+@pytest.mark.parametrize('kind', ['str', 'memmap'])
+def test_convert_rejects_file_backed_out(tmp_path, kind):
+    filename = tmp_path / 'out.npy'
+    out = str(filename)
+    if kind == 'memmap':
+        out = np.lib.format.open_memmap(
+            out, mode='w+', dtype='float64', shape=(1000, 1))
+    with pytest.raises(ValueError):
+        sd.rec(1000, 48000, channels=1, dtype='float64', out=out,
+               convert=True)
+    if kind == 'str':
+        assert not filename.exists()
+
+
+def test_int24():
+    data = np.random.default_rng(0).integers(-2**23, 2**23, (4800, 2),
+                                             'int32')
+    recorded = sd.playrec(data, 48000, channels=2, dtype='int24',
+                          blocksize=256, blocking=True)
+    # Only the recording uses 'int24', the loopback device records
+    # silence if the formats differ:
+    assert recorded.dtype == 'int32'
+    assert recorded.shape == data.shape
+    sd.play(data, 48000, dtype='int24', blocksize=256, blocking=True)
+    recorded = sd.rec(len(data), 48000, channels=2, dtype='int24',
+                      blocksize=256, blocking=True)
+    np.testing.assert_array_equal(recorded, data)
+
+
+def test_sessions_are_independent():
+    first = sd.Session()
+    second = sd.Session()
+    recorded = first.rec(4800, samplerate=48000, channels=1)
+    second.play(np.zeros((2400, 1), 'float32'), 48000)
+    assert first.stream is not second.stream
+    second.wait()
+    assert not second.active
+    first.wait()
+    assert not first.active
+    assert not first.status
+    assert recorded.shape == (4800, 1)
+    assert not sd._active_contexts
+
+
+def test_session_stop(library):
+    library.speed = 1  # Real time, to keep the streams running
+    session = sd.Session()
+    sd.rec(48000 * 60, samplerate=48000, channels=1, dtype='int16')
+    session.rec(48000 * 60, samplerate=48000, channels=1, dtype='int16')
+    session.stop()
+    assert not session.active
+    assert session.stream.closed
+    # The default session is still running:
+    assert sd.get_stream().active
+    sd.stop()
+    assert sd.get_stream().closed
+    assert not sd._active_contexts
+
+
+def test_new_call_stops_previous():
+    session = sd.Session()
+    session.rec(48000 * 60, samplerate=48000, channels=1)
+    stream = session.stream
+    session.rec(100, samplerate=48000, channels=1, blocking=True)
+    assert stream.closed
+    assert session.stream is not stream
+    assert not sd._active_contexts
+
+
+def test_start_failure(library, monkeypatch):
+    monkeypatch.setattr(library, 'Pa_StartStream',
+                        lambda stream: library.paInvalidDevice)
+    with pytest.raises(sd.PortAudioError):
+        sd.rec(1000, 48000, channels=1)
+    assert not sd._active_contexts
+    assert sd.get_stream().closed
+
+
+def record_blocks(ctx, indata, blocksize):
+    """Feed *indata* to a _CallbackContext block by block, like rec()."""
+    for start in range(0, len(indata), blocksize):
+        block = indata[start:start + blocksize]
+        ctx.callback_enter(sd.CallbackFlags(), block)
+        ctx.read_indata(block)
+        ctx.callback_exit()
+
+
+@pytest.mark.parametrize('mapping', [
+    [1, 2],  # Identity
+    [3, 4],  # Contiguous range of channels
+    [4, 1, 3],  # Arbitrary mapping
+    [2, 2],
+])
+@pytest.mark.parametrize('contiguous', [True, False])
+def test_input_mapping(mapping, contiguous):
+    frames = 1000
+    ctx = sd._CallbackContext()
+    if contiguous:
+        out = None
+    else:
+        out = np.zeros((frames, 2 * len(mapping)), 'float32')[:, ::2]
+    out, ctx.frames = ctx.check_out(out, frames, None, 'float32', mapping)
+    assert ctx.input_channels == max(mapping)
+    indata = np.random.default_rng(0).uniform(
+        -1, 1, (frames, ctx.input_channels)).astype('float32')
+    record_blocks(ctx, indata, 256)
+    np.testing.assert_array_equal(out, indata[:, np.array(mapping) - 1])
+
+
+def test_input_mapping_errors():
+    ctx = sd._CallbackContext()
+    with pytest.raises(ValueError):
+        ctx.check_out(np.zeros((10, 3)), None, None, None, [1, 2])
+    with pytest.raises(ValueError):
+        ctx.check_out(None, 10, None, 'float32', [0])
+
+
+def play_blocks(ctx, blocks, blocksize):
+    """Get *blocks* blocks of output from a _CallbackContext, like play().
+
+    The result is shorter if the playback ends before.
+
+    """
+    result = []
+    for _ in range(blocks):
+        outdata = np.full((blocksize, ctx.output_channels), np.nan, 'float32')
+        ctx.callback_enter(sd.CallbackFlags(), outdata)
+        ctx.write_outdata(outdata)
+        try:
+            ctx.callback_exit()
+        except sd.CallbackAbort:
+            break
+        result.append(outdata)
+    return np.concatenate(result)
+
+
+@pytest.mark.parametrize('mapping, channels', [
+    (None, 3),
+    ([1, 2, 3], 3),
+    ([3, 4, 5], 3),
+    ([4, 1, 3], 3),
+    ([2, 6], 1),  # Mono data is played on all given channels
+])
+def test_output_mapping(mapping, channels):
+    data = np.random.default_rng(0).uniform(
+        -1, 1, (600, channels)).astype('float32')
+    ctx = sd._CallbackContext()
+    ctx.frames = ctx.check_data(data, mapping, None)
+    if mapping is None:
+        mapping = range(1, channels + 1)
+    assert ctx.output_channels == max(mapping)
+    outdata = play_blocks(ctx, 10, 256)
+    assert outdata.shape == (768, ctx.output_channels)
+    expected = np.zeros_like(outdata)
+    expected[:600, np.array(mapping) - 1] = data
+    np.testing.assert_array_equal(outdata, expected)
+
+
+def test_output_float64():
+    data = np.linspace(-1, 1, 500).reshape(-1, 2)
+    ctx = sd._CallbackContext()
+    ctx.frames = ctx.check_data(data, [2, 1], None)
+    outdata = play_blocks(ctx, 2, 256)
+    np.testing.assert_array_equal(outdata[:250],
+                                  data[:, ::-1].astype('float32'))
+
+
+@pytest.mark.parametrize('frames', [100, 256, 300])
+def test_output_loop(frames):
+    data = np.arange(2 * frames, dtype='float32').reshape(-1, 2)
+    ctx = sd._CallbackContext(loop=True)
+    ctx.frames = ctx.check_data(data, None, None)
+    outdata = play_blocks(ctx, 4, 256)
+    np.testing.assert_array_equal(
+        outdata, np.tile(data, (1024 // frames + 1, 1))[:1024])
+
+
+def test_output_loop_empty_data():
+    with pytest.raises(ValueError):
+        sd.play(np.zeros((0, 2), 'float32'), 48000, loop=True)
+    assert not sd._active_contexts
+    # Without loop=True, the stream finishes right away:
+    sd.play(np.zeros((0, 2), 'float32'), 48000, blocking=True)
+
+
+def test_output_mapping_errors():
+    ctx = sd._CallbackContext()
+    with pytest.raises(ValueError):
+        ctx.check_data(np.zeros((10, 2)), [1, 2, 3], None)
+    with pytest.raises(ValueError):
+        ctx.check_data(np.zeros((10, 2)), [1, 1], None)
+    with pytest.raises(ValueError):
+        ctx.check_data(np.zeros((10, 2, 1)), None, None)
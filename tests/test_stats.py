@@ -0,0 +1,135 @@
+"""Callback statistics (Stream.stats) and xruns."""
+import time
+
+import numpy as np
+import pytest
+
+import sounddevice as sd
+
+
+def run_callback(stream_class, calls, delay=0, **kwargs):
+    """Run a stream until its callback has been called *calls* times."""
+    count = 0
+
+    def callback(*args):
+        nonlocal count
+        count += 1
+        time.sleep(delay)
+        if count == calls:
+            raise sd.CallbackStop
+
+    with stream_class(callback=callback, channels=1, **kwargs) as stream:
+        while stream.active:
+            time.sleep(0.001)
+    return stream
+
+
+@pytest.mark.parametrize('stream_class', [
+    sd.InputStream, sd.OutputStream, sd.Stream])
+def test_stats(stream_class):
+    stream = run_callback(stream_class, 10, blocksize=256, stats=True)
+    stats = stream.stats
+    assert stats.count == 10
+    assert sum(stats._histograms['interval']) == 9
+    assert 0 < stats.percentile(50) <= stats.percentile(99) <= stats.max()
+    assert stats.percentile(100) == stats.max()
+    assert stats.max('lag') == pytest.approx(
+        stream.latency if stream_class is sd.InputStream
+        else sd._split(stream.latency)[-1], rel=0.2)
+    assert '10 callbacks' in repr(stats)
+    stats.reset()
+    assert stats.count == 0
+    assert stats.max() == 0
+    assert stats.percentile(50) == 0
+    assert repr(stats) == '<sounddevice.CallbackStats: no callbacks>'
+
+
+def test_overruns():
+    # Each block is 1 millisecond long:
+    stream = run_callback(sd.InputStream, 3, delay=0.002, blocksize=48,
+                          samplerate=48000, stats=True)
+    assert stream.stats.overruns == 3
+    assert stream.stats.max() >= 0.002
+
+
+def test_stats_errors():
+    stream = run_callback(sd.InputStream, 1, stats=True)
+    with pytest.raises(ValueError):
+        stream.stats.percentile(101)
+    with pytest.raises(ValueError):
+        stream.stats.max('nothing')
+
+
+def test_stats_are_optional():
+    assert run_callback(sd.InputStream, 1).stats is None
+    sd.default.stats = True
+    assert run_callback(sd.InputStream, 1).stats.count == 1
+
+
+def test_no_stats_for_blocking_streams():
+    with sd.Stream(channels=1, stats=True) as stream:
+        assert stream.stats is None
+
+
+def test_xrun_log():
+    log = sd.XrunLog(size=2)
+    assert repr(log) == '<sounddevice.XrunLog: no xruns>'
+    log._record(1.0, 2)  # Input overflow
+    log._record(2.0, 4 | 2)
+    log._record(3.0, 4)  # Output underflow
+    assert log.count == 3
+    assert log.input_overflows == 2
+    assert log.output_underflows == 2
+    assert log.input_underflows == log.output_overflows == 0
+    events = log.events()
+    assert [time for time, _ in events] == [2.0, 3.0]
+    assert events[0][1].input_overflow and events[0][1].output_underflow
+    assert not events[1][1].input_overflow
+    assert repr(log) == ('<sounddevice.XrunLog: 2 input overflows, '
+                         '2 output underflows>')
+    log.reset()
+    assert log.count == 0
+    assert log.events() == []
+
+
+def test_xruns_callback(library):
+    calls = 0
+
+    def callback(outdata, frames, time, status):
+        nonlocal calls
+        calls += 1
+        outdata.fill(0)
+        if calls in (2, 4):
+            library.inject_xrun(output_underflow=True)
+        if calls == 10:
+            raise sd.CallbackStop
+
+    with sd.OutputStream(channels=1, blocksize=100,
+                         callback=callback) as stream:
+        while stream.active:
+            time.sleep(0.001)
+    # Xruns are recorded even without stats=True:
+    assert stream.stats is None
+    assert stream.xruns.output_underflows == 2
+    assert stream.xruns.count == 2
+    events = stream.xruns.events()
+    assert len(events) == 2
+    assert all(flags.output_underflow for _, flags in events)
+    assert events[0][0] < events[1][0]
+
+
+def test_xruns_blocking(library):
+    with sd.Stream(channels=1) as stream:
+        library.inject_xrun(input_overflow=True, output_underflow=True)
+        _, overflowed = stream.read(16)
+        assert overflowed
+        assert stream.write(np.zeros((16, 1), dtype='float32'))
+        stream.read(16)
+        stream.write(np.zeros((16, 1), dtype='float32'))
+    assert stream.xruns.input_overflows == 1
+    assert stream.xruns.output_underflows == 1
+    (_, first), (_, second) = stream.xruns.events()
+    assert first.input_overflow and not first.output_underflow
+    assert second.output_underflow and not second.input_overflow
+    stream.xruns.reset()
+    assert repr(stream.xruns) == '<sounddevice.XrunLog: no xruns>'
@@ -0,0 +1,96 @@
+"""Blocking and callback streams."""
+import time
+
+import numpy as np
+import pytest
+
+import sounddevice as sd
+
+
+def wait(stream):
+    while stream.active:
+        time.sleep(0.001)
+
+
+def test_read_into():
+    out = np.zeros((256, 2), 'float32')
+    with sd.InputStream(channels=2, dtype='float32') as stream:
+        for _ in range(3):
+            frames, overflowed = stream.read_into(out)
+            assert frames == len(out)
+            assert overflowed in (False, True)
+    # Mono streams also accept one-dimensional arrays:
+    with sd.InputStream(channels=1) as stream:
+        frames, _ = stream.read_into(np.zeros(100, 'float32'))
+        assert frames == 100
+
+
+def test_read_into_checks():
+    with sd.InputStream(channels=2, dtype='float32') as stream:
+        with pytest.raises(ValueError):
+            stream.read_into(np.zeros((16, 3), 'float32'))
+        with pytest.raises(ValueError):
+            stream.read_into(np.zeros((16, 2, 1), 'float32'))
+        with pytest.raises(TypeError):
+            stream.read_into(np.zeros((16, 2), 'float64'))
+        with pytest.raises(TypeError):
+            stream.read_into(np.zeros((2, 16), 'float32').T)
+        readonly = np.zeros((16, 2), 'float32')
+        readonly.flags.writeable = False
+        with pytest.raises(TypeError):
+            stream.read_into(readonly)
+
+
+def test_raw_readinto():
+    buffer = bytearray(1024)
+    with sd.RawInputStream(channels=2, dtype='int16') as stream:
+        for _ in range(3):
+            frames, overflowed = stream.readinto(buffer)
+            assert frames == 256
+            assert overflowed in (False, True)
+        frames, _ = stream.readinto(memoryview(np.zeros(64, 'int32')))
+        assert frames == 64
+        with pytest.raises(ValueError):
+            stream.readinto(bytearray(3))
+
+
+@pytest.mark.parametrize('use_default', [False, True])
+def test_reuse_arrays(use_default):
+    seen = []
+
+    def callback(indata, outdata, frames, time, status):
+        seen.append((indata, outdata, status))
+        outdata.fill(0)
+        if len(seen) == 4:
+            raise sd.CallbackStop
+
+    if use_default:
+        sd.default.reuse_arrays = True
+        kwargs = {}
+    else:
+        kwargs = {'reuse_arrays': True}
+    with sd.Stream(channels=2, blocksize=128, callback=callback,
+                   **kwargs) as stream:
+        wait(stream)
+    assert seen[0][0].shape == seen[0][1].shape == (128, 2)
+    # One array per buffer address provided by PortAudio:
+    arrays = {}
+    for indata, outdata, status in seen:
+        for array in indata, outdata:
+            address = array.__array_interface__['data'][0]
+            assert arrays.setdefault(address, array) is array
+        assert status is seen[0][2]
+
+
+def test_new_arrays_by_default():
+    seen = []
+
+    def callback(indata, frames, time, status):
+        seen.append((indata, status))
+        if len(seen) == 2:
+            raise sd.CallbackStop
+
+    with sd.InputStream(channels=1, callback=callback) as stream:
+        wait(stream)
+    assert seen[0][0] is not seen[1][0]
+    assert seen[0][1] is not seen[1][1]
@@ -0,0 +1,201 @@
+"""The virtual backend itself, see sounddevice_virtual.py."""
+import time
+
+import numpy as np
+import pytest
+
+import sounddevice as sd
+
+
+def random_data(frames, channels, dtype='float32'):
+    rng = np.random.default_rng(42)
+    if dtype == 'int24':
+        return rng.integers(-2**23, 2**23, (frames, channels), 'int32')
+    data = rng.uniform(-1, 1, (frames, channels))
+    if dtype != 'float32':
+        data *= 100
+    return data.astype(dtype)
+
+
+def wait(stream):
+    # sd.sleep() doesn't wait at all if the virtual devices are unthrottled
+    while stream.active:
+        time.sleep(0.001)
+
+
+def test_devices():
+    devices = sd.query_devices()
+    assert [device['name'] for device in devices] == [
+        'Virtual Loopback', 'Virtual Null']
+    assert sd.query_devices(kind='input')['name'] == 'Virtual Loopback'
+    assert sd.query_hostapis(0)['devices'] == [0, 1]
+
+
+@pytest.mark.parametrize('dtype', [
+    'float32', 'int32', 'int24', 'int16', 'uint8'])
+def test_blocking_loopback(dtype):
+    data = random_data(1024, 2, dtype)
+    with sd.Stream(channels=2, dtype=dtype, blocksize=256) as stream:
+        stream.write(data)
+        recorded, overflowed = stream.read(len(data))
+    assert not overflowed
+    assert recorded.dtype == data.dtype
+    np.testing.assert_array_equal(recorded, data)
+
+
+@pytest.mark.parametrize('blocksize', [0, 100])
+def test_write_non_contiguous(blocksize):
+    data = random_data(1500, 4)
+    with sd.Stream(channels=2, blocksize=blocksize) as stream:
+        # A subset of the columns and the transpose of a planar array:
+        stream.write(data[:, 1:3])
+        stream.write(data[:, :2].T.copy().T)
+        recorded, _ = stream.read(3000)
+    np.testing.assert_array_equal(recorded[:1500], data[:, 1:3])
+    np.testing.assert_array_equal(recorded[1500:], data[:, :2])
+    # Mono data with a stride:
+    with sd.Stream(channels=1, blocksize=blocksize) as stream:
+        stream.write(data[::2, 0])
+        recorded, _ = stream.read(750)
+    np.testing.assert_array_equal(recorded[:, 0], data[::2, 0])
+
+
+@pytest.mark.parametrize('dtype', ['float32', 'int24'])
+def test_read_into_loopback(dtype):
+    data = random_data(1024, 2, dtype)
+    out = np.zeros((256, 2), data.dtype)
+    blocks = []
+    with sd.Stream(channels=2, dtype=dtype, blocksize=256) as stream:
+        stream.write(data)
+        for _ in range(4):
+            frames, overflowed = stream.read_into(out)
+            assert frames == len(out)
+            assert not overflowed
+            blocks.append(out.copy())
+    np.testing.assert_array_equal(np.concatenate(blocks), data)
+
+
+def test_raw_readinto_loopback():
+    data = bytes(range(256)) * 16
+    buffer = bytearray(1024)
+    received = bytearray()
+    with sd.RawStream(channels=2, dtype='int16', blocksize=256) as stream:
+        stream.write(data)
+        for _ in range(4):
+            frames, _ = stream.readinto(buffer)
+            assert frames == 256
+            received += buffer
+    assert received == data
+
+
+def test_planar_write_read():
+    data = random_data(1024, 3).T.copy()
+    with sd.Stream(channels=3, blocksize=256, planar=True) as stream:
+        stream.write(data)
+        recorded, _ = stream.read(data.shape[1])
+        assert recorded.shape == data.shape
+        np.testing.assert_array_equal(recorded, data)
+        # A subset of the rows of a larger array:
+        larger = np.concatenate([data, data])
+        stream.write(larger[2:5])
+        out = np.zeros((3, 1024), 'float32')
+        stream.read_into(out)
+        np.testing.assert_array_equal(out, larger[2:5])
+        # Rows which are not contiguous:
+        stream.write(data[:, ::2])
+        out = np.zeros((3, 512), 'float32')
+        stream.read_into(out)
+        np.testing.assert_array_equal(out, data[:, ::2])
+        # The row pointers are re-used:
+        pointers = stream._planar_write_pointers
+        stream.write(data)
+        assert stream._planar_write_pointers is pointers
+
+
+def test_planar_errors():
+    with pytest.raises(ValueError):
+        sd.Stream(channels=2, dtype='int24', planar=True,
+                  callback=lambda *args: None)
+    with sd.InputStream(channels=2, planar=True) as stream:
+        with pytest.raises(ValueError):
+            stream.read_into(np.zeros((1024, 2), 'float32'))
+
+
+@pytest.mark.parametrize('planar, dtype', [
+    (False, 'float32'), (False, 'int24'), (True, 'float32')])
+def test_callback_loopback(planar, dtype):
+    data = random_data(256 * 8, 2, dtype)
+    position = 0
+    recorded = []
+
+    def callback(indata, outdata, frames, time, status):
+        nonlocal position
+        if planar:
+            indata, outdata = indata.T, outdata.T
+        recorded.append(indata.copy())
+        chunk = data[position:position + frames]
+        position += frames
+        if len(chunk) < frames:
+            raise sd.CallbackStop
+        outdata[:] = chunk
+
+    with sd.Stream(channels=2, dtype=dtype, blocksize=256, planar=planar,
+                   callback=callback) as stream:
+        wait(stream)
+    recorded = np.concatenate(recorded)
+    # The loopback device has a latency of one block:
+    np.testing.assert_array_equal(recorded[256:len(data)], data[:-256])
+
+
+def test_different_format_records_silence():
+    with sd.Stream(channels=2, dtype=('int16', 'float32')) as stream:
+        stream.write(random_data(512, 2))
+        recorded, _ = stream.read(512)
+    assert not recorded.any()
+
+
+def test_null_device():
+    with sd.Stream(device='null', channels=1) as stream:
+        stream.write(np.ones((512, 1), 'float32'))
+        recorded, _ = stream.read(512)
+    assert not recorded.any()
+
+
+def test_inject_xrun_blocking(library):
+    with sd.Stream(channels=1) as stream:
+        library.inject_xrun(input_overflow=True, output_underflow=True)
+        _, overflowed = stream.read(16)
+        assert overflowed
+        _, overflowed = stream.read(16)
+        assert not overflowed
+        assert stream.write(np.zeros((16, 1), 'float32'))
+        assert not stream.write(np.zeros((16, 1), 'float32'))
+
+
+def test_inject_xrun_callback(library):
+    flags = []
+
+    def callback(indata, outdata, frames, time, status):
+        flags.append(status)
+        outdata.fill(0)
+        if len(flags) == 1:
+            library.inject_xrun(output_underflow=True)
+        elif len(flags) == 3:
+            raise sd.CallbackStop
+
+    with sd.Stream(channels=1, callback=callback) as stream:
+        wait(stream)
+    assert [bool(status) for status in flags] == [False, True, False]
+    assert flags[1].output_underflow
+    assert not flags[1].input_overflow
+
+
+def test_speed(library):
+    library.speed = 10
+    start = time.monotonic()
+    with sd.InputStream(channels=1, samplerate=48000) as stream:
+        stream.read(4800)  # 0.1 seconds, i.e. 0.01 seconds at speed 10
+    assert 0.005 < time.monotonic() - start < 0.5
+    start = time.monotonic()
+    sd.sleep(500)
+    assert 0.03 < time.monotonic() - start < 0.5